@@ -1,11 +1,27 @@
 import argparse
 import os
 import sys
-import subprocess
+
+# Subcommands, mapped to the module providing their main(argv)
+COMMANDS = {
+    "serve": "access_cli_sealuzh.daemon",
+    "history": "access_cli_sealuzh.history",
+    "loadtest": "access_cli_sealuzh.loadtest",
+    "diff-image": "access_cli_sealuzh.diffimage",
+    "merge-reports": "access_cli_sealuzh.report",
+    "mutate": "access_cli_sealuzh.mutate",
+    "replay": "access_cli_sealuzh.replay",
+}
 
 def main():
-    from access_cli_sealuzh.main import AccessValidator, autodetect
+    if len(sys.argv) > 1 and sys.argv[1] in COMMANDS:
+        import importlib
+        module = importlib.import_module(COMMANDS[sys.argv[1]])
+        sys.exit(module.main(sys.argv[2:]))
 
+    from access_cli_sealuzh.budget import parse_duration
+    from access_cli_sealuzh.sampling import parse_sample
+    from access_cli_sealuzh.sharding import parse_shard
     parser = argparse.ArgumentParser(
         prog = 'access-cli',
         description = 'Validate ACCESS course configurations using the CLI')
@@ -29,6 +45,9 @@ def main():
     parser.add_argument('-G', '--grade-solution',
         action=argparse.BooleanOptionalAction,
         help = "grade the solution and expect max-points to be awarded.")
+    parser.add_argument('-V', '--grade-variants',
+        action=argparse.BooleanOptionalAction,
+        help = "grade the solution variants declared by tasks and expect their points to be awarded.")
     parser.add_argument('-s', '--solve-command', type=str,
         help = "shell command which solves the exercise (e.g.: 'cp -R solution/* task/' or 'xcopy solution\* task\ /E /I /Y'")
     parser.add_argument('-f', '--global-file', action='append', default=[],
@@ -46,7 +65,69 @@ def main():
         help = "recurse into nested structures (assignments/tasks) if applicable")
     parser.add_argument('-A', '--auto-detect', action='store_true', default=False,
         help = "attempt to auto-detect what is being validated")
-    args = parser.parse_args()
+    parser.add_argument('--dump-model', type=str,
+        help = "write the course model (structure and file dependencies) as JSON to the given path")
+    parser.add_argument('courses', nargs='*', default=[],
+        help = "validate several courses in one run (implies --auto-detect)")
+    parser.add_argument('-M', '--manifest', type=str,
+        help = "file listing course roots to validate, one per line (implies --auto-detect)")
+    parser.add_argument('--glob', type=str,
+        help = "glob pattern matching course roots to validate, e.g. 'courses/*' (implies --auto-detect)")
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+        help = "number of docker executions to run in parallel")
+    parser.add_argument('--profile', default=False,
+        action=argparse.BooleanOptionalAction,
+        help = "print how much time was spent in which phase and on which task")
+    parser.add_argument('--profile-top', type=int, default=10,
+        help = "number of slowest tasks to show with --profile")
+    parser.add_argument('--trace', type=str,
+        help = "write a timeline of the run (validation, executions and their phases, per thread) to the given path")
+    parser.add_argument('--trace-format', choices=['chrome', 'otlp'], default='chrome',
+        help = "format of --trace: Chrome trace events (chrome://tracing, Perfetto) or OTLP/JSON (OpenTelemetry)")
+    parser.add_argument('--usage', default=False,
+        action=argparse.BooleanOptionalAction,
+        help = "measure cpu time, peak memory and block I/O of each execution (requires sh in the image)")
+    parser.add_argument('--report', type=str,
+        help = "write a JSON report of all results and executions (including their resource usage) to the given path")
+    parser.add_argument('--calibrate', type=int, metavar='RUNS',
+        help = "execute all commands RUNS times and suggest a timeout for each command of each task")
+    parser.add_argument('--safety-factor', type=float, default=3.0,
+        help = "multiple of the 95th percentile duration suggested as timeout by --calibrate")
+    parser.add_argument('--write-timeouts', action='store_true', default=False,
+        help = "write the timeouts suggested by --calibrate to [evaluator.timeout] in each task's config.toml")
+    parser.add_argument('--repeat', type=int, metavar='N',
+        help = "execute each command N times concurrently and report commands whose return code or points vary")
+    parser.add_argument('--perturb', action='store_true', default=False,
+        help = "execute each command with a random cpu limit and PYTHONHASHSEED (e.g., with --repeat)")
+    parser.add_argument('--history', type=str,
+        help = "record the executions of this run in the given history database (default: $ACCESS_CLI_HISTORY or ~/.cache/access-cli/history.sqlite), see access-cli history")
+    parser.add_argument('--no-history', action='store_true', default=False,
+        help = "do not record this run in the history database")
+    parser.add_argument('--shard', type=parse_shard, metavar='I/N',
+        help = "only validate the I-th of N parts of the tasks, balanced by their number of commands and files (see access-cli merge-reports)")
+    parser.add_argument('--shard-by-history', action='store_true', default=False,
+        help = "balance shards by the durations recorded in the history database instead, which all shards must share")
+    parser.add_argument('--journal', type=str, metavar='PATH',
+        help = "append each completed task with its results to this journal, see --resume")
+    parser.add_argument('--resume', action='store_true', default=False,
+        help = "restore tasks whose inputs did not change since they were recorded in the --journal")
+    parser.add_argument('--time-budget', type=parse_duration, metavar='DURATION',
+        help = "run all static checks, then executions by value until the budget (e.g. 600, 90s or 10m) is nearly used up, and list the skipped checks")
+    parser.add_argument('--changed-since', type=str, metavar='REF',
+        help = "with --time-budget, prioritize tasks with files changed since this git revision (default: modified since their last recorded run)")
+    parser.add_argument('--sample', type=parse_sample, metavar='FRACTION|N',
+        help = "only execute the commands of a random sample of the tasks (e.g. 0.1 or 20), covering every docker image")
+    parser.add_argument('--seed', type=int, default=0,
+        help = "seed of --sample, rotate it to cover other tasks")
+    parser.add_argument('--dedupe-files', action='store_true', default=False,
+        help = "hash the files of all tasks once and clone identical files into workspaces from a store for this run (needs reflinks)")
+    parser.add_argument('--file-store', type=str, metavar='DIR',
+        help = "like --dedupe-files, but keep the store and the hashes of unchanged files in DIR across runs")
+    parser.add_argument('--rev', action='append', metavar='REV',
+        help = "validate the directory at this git revision without checking it out (can be repeated)")
+    parser.add_argument('--socket', type=str,
+        help = "forward the validation to an access-cli daemon (see access-cli serve) listening on this unix socket. Can also be set via ACCESS_CLI_SOCKET")
+    args = parser.parse_intermixed_args()
 
     if not args.solve_command:
         if args.grade_solution:
@@ -62,6 +143,126 @@ def main():
             print("If --global-file is passed without --auto-detect, then --course-root must be provided")
             sys.exit(12)
 
+    if args.calibrate and (args.courses or args.manifest or args.glob):
+        print("--calibrate cannot be combined with validating several courses")
+        sys.exit(16)
+
+    if args.repeat and (args.calibrate or args.courses or args.manifest or args.glob):
+        print("--repeat cannot be combined with --calibrate or validating several courses")
+        sys.exit(17)
+
+    if args.shard and (args.courses or args.manifest or args.glob):
+        print("--shard cannot be combined with validating several courses")
+        sys.exit(18)
+    if args.shard_by_history and (not args.shard or args.no_history):
+        print("If --shard-by-history is passed, --shard must be provided and --no-history must not")
+        sys.exit(18)
+
+    if args.resume and not args.journal:
+        print("If --resume is passed, --journal must be provided")
+        sys.exit(19)
+    if args.journal and (args.calibrate or args.repeat or args.courses or args.manifest or args.glob):
+        print("--journal cannot be combined with --calibrate, --repeat or validating several courses")
+        sys.exit(19)
+
+    if args.changed_since and not args.time_budget:
+        print("If --changed-since is passed, --time-budget must be provided")
+        sys.exit(20)
+    if args.time_budget and (args.calibrate or args.repeat or args.journal or
+                             args.courses or args.manifest or args.glob):
+        print("--time-budget cannot be combined with --calibrate, --repeat, --journal or validating several courses")
+        sys.exit(20)
+
+    if args.rev and (args.calibrate or args.repeat or args.courses or args.manifest or args.glob):
+        print("--rev cannot be combined with --calibrate, --repeat or validating several courses")
+        sys.exit(21)
+
+    if args.no_history:
+        args.history = None
+    elif args.history is None:
+        from access_cli_sealuzh.history import default_path
+        args.history = default_path()
+
+    if args.user == "autodetect":
+        try:
+            args.user = str(os.getuid())
+        except AttributeError:
+            args.user = None
+
+    socket_path = args.socket or os.environ.get("ACCESS_CLI_SOCKET")
+    if socket_path:
+        from access_cli_sealuzh.daemon import forward
+        returncode = forward(args, socket_path, required=args.socket is not None)
+        if returncode is not None:
+            sys.exit(returncode)
+
+    sys.exit(validate(args))
+
+def validate(args, session=None):
+    """Validate according to the parsed arguments and print a summary.
+    Returns the exit code. Shared by the CLI and the daemon."""
+    # Deferred until after argument parsing so that --help stays fast
+    from access_cli_sealuzh.main import Session, with_defaults
+    args = with_defaults(args)
+    if session is None:
+        session = Session(args.jobs)
+    if not (args.profile or args.trace):
+        return dispatch(args, session)
+    previous = session.enable_profiling()
+    try:
+        return dispatch(args, session)
+    finally:
+        # later runs sharing the session (e.g., of the daemon) are not profiled
+        session.use_profiler(previous)
+
+def dispatch(args, session):
+    """Validate a batch, revisions or a single directory, see validate()"""
+    from access_cli_sealuzh.main import AccessValidator
+    if args.courses or args.manifest or args.glob:
+        from access_cli_sealuzh.batch import validate_batch
+        returncode = validate_batch(args, session)
+        print_profile(args, session)
+        write_trace(args, session)
+        return returncode
+
+    if args.rev:
+        from access_cli_sealuzh.gitfs import validate_revisions
+        returncode = validate_revisions(args, session)
+        print_profile(args, session)
+        write_trace(args, session)
+        return returncode
+
+    args = configure(args, session)
+
+    if args.calibrate:
+        from access_cli_sealuzh.calibrate import calibrate
+        return calibrate(args, session)
+
+    if args.repeat:
+        from access_cli_sealuzh.repeat import repeat
+        return repeat(args, session)
+
+    validator = AccessValidator(args, session)
+    logger = validator.run()
+    if args.dump_model:
+        validator.model.save(args.dump_model)
+
+    print_results(logger)
+    print_skipped(logger)
+    print_warnings(args)
+    write_outputs(args, [logger])
+    print_profile(args, session)
+    write_trace(args, session)
+
+    if logger.error_results():
+        return 1
+    return 0
+
+def configure(args, session):
+    """Complete the arguments of validating a single course, assignment or
+    task, either auto-detected or set manually, and make sure docker works
+    if anything is executed"""
+    from access_cli_sealuzh.main import autodetect
     if not args.auto_detect:
         if args.test_solution == None:
            args.test_solution = False
@@ -69,48 +270,44 @@ def main():
            args.grade_template = False
         if args.grade_solution == None:
            args.grade_solution = False
+        if args.grade_variants == None:
+           args.grade_variants = False
         if args.recursive == None:
            args.recursive = False
         if not args.level:
             print("Unless --auto-detect is set, must specify level")
             sys.exit(10)
     else:
-        args = autodetect(args)
-
-    if args.user == "autodetect":
-        try:
-            args.user = str(os.getuid())
-        except AttributeError:
-            args.user = None
+        args = autodetect(args, session)
 
     if (args.run or args.test or args.test_solution or args.grade_solution or
-        args.grade_template):
-        try:
-            instructions = ["docker", "run", "--rm"]
-            if args.user is not None:
-                instructions.extend(["--user", args.user])
-            instructions.append("hello-world")
-            subprocess.check_output(instructions)
-        except subprocess.CalledProcessError:
+        args.grade_template or args.grade_variants):
+        if not session.check_docker(args.user):
             print("Docker is required for this validation, but it's not working correctly: exiting.")
             sys.exit(14)
 
+    return args
 
-
-    logger = AccessValidator(args).run()
-
+def print_results(logger, title="Validation"):
     if not logger.error_results():
-        print(f"❰ Validation successful ❱")
+        print(f"❰ {title} successful ❱")
         for subject, messages in logger.results.items():
             if not messages:
                 print(f" ✓ {subject}")
     else:
-        print(f"❰ Validation failed ❱")
+        print(f"❰ {title} failed ❱")
         for subject, messages in logger.results.items():
             if messages:
                 for m in messages:
                     print(f" ✗ {m}")
 
+def print_skipped(logger):
+    if logger.skipped:
+        print(f"❰ Time budget used up: {len(logger.skipped)} checks skipped ❱")
+        for check in logger.skipped:
+            print(f" - {check['subject']} {check['check']} (estimated {check['estimate']:.1f}s)")
+
+def print_warnings(args):
     if args.verbose and (
             False is args.grade_solution or
             False is args.test_solution or
@@ -131,7 +328,25 @@ def main():
             print("grade_command on template has not been validated!")
         print(" -- Please refer to access-cli -h and README.md --")
 
-    if logger.error_results():
-        sys.exit(1)
-    sys.exit(0)
+def write_outputs(args, loggers):
+    """Write the report and record the run in the history, if requested.
+    Runs which did not execute anything are not recorded, nor perturbed runs
+    (their durations are not comparable)."""
+    if args.report:
+        from access_cli_sealuzh.report import write_report
+        write_report(args.report, loggers, args.shard)
+    if args.history and not args.perturb and any(logger.executions for logger in loggers):
+        from access_cli_sealuzh.history import record
+        record(args.history, loggers, args.directory)
+
+def print_profile(args, session):
+    if args.profile:
+        for line in session.profiler.report(args.profile_top):
+            print(line)
 
+def write_trace(args, session):
+    if args.trace:
+        if args.trace_format == "otlp":
+            session.profiler.write_otlp(args.trace)
+        else:
+            session.profiler.write_chrome_trace(args.trace)
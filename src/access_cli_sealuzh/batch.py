@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+
+# Validation of several courses in a single invocation. All courses share one
+# Session, so docker is probed once, every image is pulled at most once for
+# the whole batch and the execution result cache is shared across courses.
+# Each course is auto-detected on its own, so its course root and global files
+# are determined exactly as if access-cli -A had been run inside it.
+
+import os
+import sys
+import copy
+
+# Errors of reading and parsing configs (e.g., tomli.TOMLDecodeError is a
+# ValueError), which fail the course rather than the batch
+CONFIG_ERRORS = (OSError, ValueError, KeyError)
+
+def discover_courses(paths=None, manifest=None, pattern=None):
+    """Return the course roots given explicitly, listed in a manifest file (one
+    path per line, relative to the manifest, '#' starts a comment) and matched
+    by a glob pattern (only directories containing a config.toml)."""
+    roots = list(paths or [])
+    if manifest:
+        base = os.path.dirname(os.path.abspath(manifest))
+        with open(manifest) as f:
+            for line in f:
+                line = line.split("#", 1)[0].strip()
+                if line:
+                    roots.append(os.path.join(base, line))
+    if pattern:
+        import glob
+        roots.extend(path for path in sorted(glob.glob(pattern))
+                     if os.path.isfile(os.path.join(path, "config.toml")))
+    unique = []
+    for root in roots:
+        if os.path.abspath(root) not in map(os.path.abspath, unique):
+            unique.append(root)
+    return unique
+
+def course_arguments(args, root):
+    """Copy of args for validating a single course of the batch"""
+    from access_cli_sealuzh.main import autodetect
+    course_args = copy.copy(args)
+    course_args.directory = root
+    course_args.courses, course_args.manifest, course_args.glob = None, None, None
+    course_args.auto_detect = True
+    # autodetect adds the course's global files to the set, don't share it
+    course_args.global_file = set(args.global_file)
+    return autodetect(course_args)
+
+def validate_batch(args, session):
+    from access_cli_sealuzh import print_results, print_warnings, write_outputs
+    from access_cli_sealuzh.main import AccessValidator
+    from access_cli_sealuzh.logger import Logger
+    roots = discover_courses(args.courses, args.manifest, args.glob)
+    if not roots:
+        print("No courses found to validate")
+        return 1
+
+    validators = {}
+    # why each course which could not be auto-detected failed
+    errors = {}
+    for root in roots:
+        try:
+            validators[root] = AccessValidator(course_arguments(args, root), session)
+        except SystemExit:
+            # autodetect printed why
+            validators[root] = None
+        except CONFIG_ERRORS as e:
+            validators[root] = None
+            errors[root] = f"{type(e).__name__}: {e}"
+
+    executing = [v for v in validators.values() if v is not None and v.executes()]
+    if executing and not session.check_docker(args.user):
+        print("Docker is required for this validation, but it's not working correctly: exiting.")
+        sys.exit(14)
+    # Pull the images of all courses up front and concurrently
+    if executing:
+        images = set()
+        for validator in executing:
+            try:
+                images.update(validator.build_model().images())
+            except CONFIG_ERRORS:
+                # reported when the course is validated
+                pass
+        session.executor.pull(images)
+
+    results = {}
+    for root, validator in validators.items():
+        if validator is None:
+            logger = Logger()
+            logger.set_subject(root)
+            logger.error(f"{root} could not be auto-detected (missing or invalid config.toml?)"
+                         + (f": {errors[root]}" if root in errors else ""))
+        else:
+            try:
+                logger = validator.run()
+            except CONFIG_ERRORS as e:
+                logger = validator.logger
+                logger.error(f"{root} could not be validated: {type(e).__name__}: {e}")
+        results[root] = logger
+        print_results(logger, f"{root}: Validation")
+    print_warnings(next((v.args for v in validators.values() if v is not None), args))
+    write_outputs(args, results.values())
+
+    failed = [root for root, logger in results.items() if logger.error_results()]
+    print(f"❰ {len(roots) - len(failed)} of {len(roots)} courses passed validation ❱")
+    for root in roots:
+        print(f" {'✗' if root in failed else '✓'} {root}")
+    return 1 if failed else 0
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+
+# Time-budgeted validation (--time-budget 10m). All static checks run first,
+# as the executions of every task are held back until the traversal is done.
+# The executions are then scheduled by value: checks of changed tasks first,
+# then of tasks which failed in their last recorded run, then of tasks never
+# executed before, each by increasing estimated cost (the median of their
+# recorded durations, see history.py). An execution is skipped instead of
+# started if its estimated cost exceeds the time remaining before the budget
+# is nearly used up. Skipped checks are listed in the summary and report.
+#
+# Changed tasks are those with files differing from --changed-since REF
+# according to git, or else those with files modified since their last
+# recorded execution.
+
+import os
+import re
+import time
+import argparse
+
+# Fraction of the budget kept for finishing the running executions and
+# writing the summary
+RESERVE = 0.05
+# Seconds an execution is assumed to take if nothing has been recorded
+DEFAULT_ESTIMATE = 10.0
+# Value of a check of a task which changed, failed in its last run or was
+# never executed
+CHANGED, FAILING, UNTESTED = 4, 2, 1
+
+UNITS = {"s": 1, "m": 60, "h": 3600}
+
+def parse_duration(value):
+    """Parse a duration such as 600, 90s, 10m or 1h30m as seconds"""
+    parts = re.findall(r"(\d+(?:\.\d+)?)([smh]?)", value)
+    if not parts or "".join(number + unit for number, unit in parts) != value.strip():
+        raise argparse.ArgumentTypeError(f"expected a duration, e.g. 10m, not {value}")
+    return sum(float(number) * UNITS[unit or "s"] for number, unit in parts)
+
+def changed_files(directory, ref):
+    """Absolute paths of the files differing from ref (including untracked
+    files) in the git repository containing directory, or None"""
+    import subprocess
+    try:
+        top = subprocess.check_output(["git", "-C", directory, "rev-parse", "--show-toplevel"],
+            stderr=subprocess.DEVNULL, text=True).strip()
+        diff = subprocess.check_output(["git", "-C", top, "diff", "--name-only", ref, "--"],
+            stderr=subprocess.DEVNULL, text=True)
+        untracked = subprocess.check_output(["git", "-C", top, "ls-files", "--others",
+            "--exclude-standard"], stderr=subprocess.DEVNULL, text=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return {os.path.normpath(os.path.join(top, line))
+            for line in (diff + untracked).splitlines() if line}
+
+class Budget:
+
+    def __init__(self, seconds, history=None, changed=None):
+        self.seconds = seconds
+        self.started = time.monotonic()
+        self.deadline = self.started + seconds * (1 - RESERVE)
+        # changed files by absolute path, if known from git
+        self.changed = changed
+        self.estimates = {}
+        self.failing = set()
+        self.last_executed = {}
+        if history and os.path.isfile(history):
+            self.load(history)
+        estimates = sorted(self.estimates.values())
+        self.fallback = estimates[len(estimates) // 2] if estimates else DEFAULT_ESTIMATE
+
+    def load(self, history):
+        import statistics
+        from access_cli_sealuzh.history import connect, durations, last_executed, last_results
+        connection = connect(history)
+        self.estimates = {key: statistics.median(walls)
+                          for key, walls in durations(connection).items()}
+        self.failing = {subject for subject, passed in last_results(connection).items()
+                        if not passed}
+        self.last_executed = last_executed(connection)
+        connection.close()
+
+    def estimate(self, subject, command_type, solution):
+        return self.estimates.get((os.path.abspath(subject), command_type, solution), self.fallback)
+
+    def value(self, task, files):
+        """Value of executing the checks of task, given the absolute paths
+        of its files"""
+        subject = os.path.abspath(task)
+        value = 0
+        if self.changed is not None:
+            # files removed from the task are changed, but no longer in files
+            prefix = subject + os.sep
+            if (any(path in self.changed for path in files) or
+                    any(path.startswith(prefix) for path in self.changed)):
+                value += CHANGED
+        elif subject in self.last_executed:
+            if any(modified(path) > self.last_executed[subject] for path in files):
+                value += CHANGED
+        if subject in self.failing:
+            value += FAILING
+        if subject not in self.last_executed:
+            value += UNTESTED
+        return value
+
+    def allows(self, cost):
+        """Whether an execution of the given estimated cost still fits"""
+        return time.monotonic() + cost <= self.deadline
+
+    def elapsed(self):
+        return time.monotonic() - self.started
+
+def modified(path):
+    try:
+        return os.path.getmtime(path)
+    except OSError:
+        return 0
+
+def task_files(task, fs):
+    """Absolute paths of all files in the directory of task"""
+    paths = []
+    for root, dirs, files in fs.walk(os.path.abspath(task)):
+        paths += [os.path.join(root, name) for name in files]
+    return paths
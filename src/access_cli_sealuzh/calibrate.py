@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+
+# Timeout calibration (--calibrate RUNS). Validates the same courses, tasks or
+# assignments several times without the execution result cache, and suggests
+# a timeout for each command of each task: the 95th percentile of its
+# durations on template and solution, multiplied by a safety factor and
+# rounded up to whole seconds (at least MINIMUM_TIMEOUT, to absorb jitter in
+# container startup). With --write-timeouts, the suggestions are written to
+# [evaluator.timeout] in the task's config.toml.
+
+import os
+import math
+
+MINIMUM_TIMEOUT = 5
+
+def percentile(values, fraction):
+    """Nearest-rank percentile"""
+    values = sorted(values)
+    return values[max(0, math.ceil(fraction * len(values)) - 1)]
+
+def suggest(durations, safety_factor):
+    return max(MINIMUM_TIMEOUT, math.ceil(percentile(durations, 0.95) * safety_factor))
+
+def write_timeouts(path, timeouts):
+    """Replace the [evaluator.timeout] table of the config at path with
+    timeouts, or append it. Returns False if the config defines timeouts in
+    another way (e.g., inline in [evaluator]) and was left unchanged."""
+    import tomli
+    with open(path) as f:
+        original = f.read()
+    config = tomli.loads(original)
+    lines = original.splitlines()
+    table = ["[evaluator.timeout]"] + [f"{command_type} = {seconds}"
+        for command_type, seconds in sorted(timeouts.items())]
+    headers = [i for i, line in enumerate(lines) if line.strip() == "[evaluator.timeout]"]
+    if headers:
+        start = headers[0]
+        end = next((i for i in range(start + 1, len(lines))
+                    if lines[i].lstrip().startswith("[")), len(lines))
+        lines[start:end] = table + ([""] if end < len(lines) else [])
+    elif "timeout" in config.get("evaluator", {}):
+        return False
+    else:
+        lines += [""] + table
+    updated = "\n".join(lines) + "\n"
+    try:
+        tomli.loads(updated)
+    except tomli.TOMLDecodeError:
+        return False
+    with open(path, "w") as f:
+        f.write(updated)
+    return True
+
+def calibrate(args, session):
+    from access_cli_sealuzh import print_results
+    from access_cli_sealuzh.main import AccessValidator, DEFAULT_TIMEOUT
+    durations = {}
+    timed_out = set()
+    session.executor.caching = False
+    try:
+        for run in range(args.calibrate):
+            print(f" > Calibration run {run + 1} of {args.calibrate}")
+            validator = AccessValidator(args, session)
+            logger = validator.run()
+            for execution in logger.executions:
+                key = (execution["subject"], execution["command_type"])
+                if execution["timed_out"]:
+                    timed_out.add(key)
+                else:
+                    durations.setdefault(execution["subject"], {}).setdefault(
+                        execution["command_type"], []).append(execution["usage"]["wall"])
+    finally:
+        session.executor.caching = True
+    print_results(logger)
+
+    print(f"❰ Timeout calibration ({args.calibrate} runs, safety factor {args.safety_factor:g}) ❱")
+    for subject in sorted(set(durations) | {subject for subject, _ in timed_out}):
+        path = os.path.join(subject, "config.toml")
+        configured = validator.model.config(subject).get("evaluator", {}).get("timeout", {})
+        timeouts = dict(configured)
+        measured = durations.get(subject, {})
+        for command_type in sorted(set(measured) | {c for s, c in timed_out if s == subject}):
+            if (subject, command_type) in timed_out:
+                print(f" {subject} {command_type}: timed out, not calibrated")
+                continue
+            walls = measured[command_type]
+            timeouts[command_type] = suggest(walls, args.safety_factor)
+            current = configured.get(command_type, DEFAULT_TIMEOUT)
+            print(f" {subject} {command_type}: {timeouts[command_type]}s "
+                  f"(p95 {percentile(walls, 0.95):.2f}s of {len(walls)}, currently {current}s)")
+        if args.write_timeouts:
+            if write_timeouts(path, timeouts):
+                print(f"   wrote [evaluator.timeout] to {path}")
+            else:
+                print(f"   could not write timeouts to {path}, please update it manually")
+    return 1 if logger.error_results() or timed_out else 0
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+
+# A long-lived validation daemon. `access-cli serve` listens on a local unix
+# socket and validates on behalf of `access-cli --socket` clients, keeping one
+# Session (compiled schemas, parsed configs, docker probe) warm between runs.
+# Each request gets an executor of its own (see Session.for_request), sized by
+# its --jobs, so that it executes exactly what an in-process run would.
+#
+# Protocol: the client sends a single JSON line {"cwd": ..., "args": {...}}
+# containing its working directory and parsed arguments. The daemon answers
+# with JSON lines {"out": ...} carrying the output as it is produced, followed
+# by {"exit": returncode}. Validation runs in the client's working directory
+# and prints exactly what an in-process run would.
+#
+# Requests run solve commands in a shell as the daemon's user, so the socket is
+# only accessible to that user (mode 0600), and where the platform reports the
+# credentials of peers, connections of other users are refused.
+
+import os
+import sys
+import json
+import argparse
+import socketserver
+
+def default_socket():
+    import tempfile
+    uid = os.getuid() if hasattr(os, "getuid") else "user"
+    return os.environ.get("ACCESS_CLI_SOCKET",
+        os.path.join(tempfile.gettempdir(), f"access-cli-{uid}.sock"))
+
+class StreamWriter:
+    """File-like object forwarding everything written to it to the client"""
+
+    def __init__(self, wfile):
+        self.wfile = wfile
+
+    def write(self, text):
+        if text:
+            self.wfile.write((json.dumps({"out": text}) + "\n").encode("utf-8"))
+            self.wfile.flush()
+        return len(text)
+
+    def flush(self):
+        pass
+
+class ValidationHandler(socketserver.StreamRequestHandler):
+
+    def handle(self):
+        import contextlib
+        import traceback
+        from access_cli_sealuzh import validate
+        from access_cli_sealuzh.main import with_defaults
+        line = self.rfile.readline()
+        if not line:
+            return
+        request = json.loads(line)
+        args = with_defaults(argparse.Namespace(**request["args"]))
+        args.global_file = set(args.global_file)
+        session = self.server.session.for_request(args.jobs)
+        out = StreamWriter(self.wfile)
+        cwd = os.getcwd()
+        # Requests are handled one at a time, so changing the working directory
+        # and redirecting stdout for the duration of a request is safe.
+        try:
+            os.chdir(request["cwd"])
+            with contextlib.redirect_stdout(out):
+                try:
+                    returncode = validate(args, session)
+                except SystemExit as e:
+                    returncode = e.code if isinstance(e.code, int) else int(e.code is not None)
+                except ConnectionError:
+                    raise
+                except Exception:
+                    print(traceback.format_exc())
+                    returncode = 1
+            self.wfile.write((json.dumps({"exit": returncode}) + "\n").encode("utf-8"))
+        except ConnectionError:
+            # the client went away, abandon the request
+            pass
+        finally:
+            session.executor.shutdown()
+            os.chdir(cwd)
+
+class ValidationServer(socketserver.UnixStreamServer):
+
+    def __init__(self, socket_path):
+        from access_cli_sealuzh.main import Session
+        self.session = Session()
+        super().__init__(socket_path, ValidationHandler)
+
+    def server_bind(self):
+        # create the socket without access for others, rather than restricting
+        # it after it has been bound
+        umask = os.umask(0o177)
+        try:
+            super().server_bind()
+        finally:
+            os.umask(umask)
+        os.chmod(self.server_address, 0o600)
+
+    def verify_request(self, request, client_address):
+        return peer_uid(request) in (None, os.getuid())
+
+def peer_uid(sock):
+    """User id of the process connected to sock, or None if the platform does
+    not report it"""
+    import socket
+    import struct
+    if not hasattr(socket, "SO_PEERCRED"):
+        return None
+    credentials = sock.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize("3i"))
+    return struct.unpack("3i", credentials)[1]
+
+def forward(args, socket_path, required=False):
+    """Forward the parsed arguments to the daemon and print its output.
+    Returns the exit code, or None if no daemon is listening and the
+    validation should run in-process instead."""
+    import socket
+    try:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.connect(socket_path)
+    except (OSError, AttributeError):
+        if required:
+            print(f"Could not connect to access-cli daemon at {socket_path}")
+            return 15
+        return None
+    request = dict(vars(args))
+    request["global_file"] = sorted(args.global_file)
+    stdout = sys.stdout
+    with sock, sock.makefile("rwb") as f:
+        f.write((json.dumps({"cwd": os.getcwd(), "args": request}) + "\n").encode("utf-8"))
+        f.flush()
+        for line in f:
+            message = json.loads(line)
+            if "out" in message:
+                stdout.write(message["out"])
+                stdout.flush()
+            if "exit" in message:
+                return message["exit"]
+    print("access-cli daemon closed the connection unexpectedly")
+    return 15
+
+def is_listening(socket_path):
+    import socket
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.connect(socket_path)
+        return True
+    except OSError:
+        return False
+
+def main(argv):
+    parser = argparse.ArgumentParser(
+        prog = 'access-cli serve',
+        description = 'Run a validation daemon for access-cli clients')
+    parser.add_argument('--socket', default=default_socket(),
+        help = "path of the unix socket to listen on")
+    args = parser.parse_args(argv)
+
+    if os.path.exists(args.socket):
+        if is_listening(args.socket):
+            print(f"An access-cli daemon is already listening on {args.socket}")
+            return 1
+        os.unlink(args.socket)
+    server = ValidationServer(args.socket)
+    print(f"access-cli daemon listening on {args.socket}")
+    print(f"Use access-cli --socket {args.socket} or set ACCESS_CLI_SOCKET to forward validations")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        os.unlink(args.socket)
+    return 0
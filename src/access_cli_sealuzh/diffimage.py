@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+
+# Differential image upgrade run (access-cli diff-image). Runs the checks of
+# every task using the old docker_image (run, test and grade command on the
+# template and, given a solve command, test and grade command on the solution
+# and the solution variants) under both the old and the new image, and lists
+# the checks whose return code, points or (optionally) output differ.
+#
+# Both sides are executed concurrently from one shared stage of each task's
+# files. Results are stored in a persistent result cache keyed by image id
+# (see Executor.cache_directory), so repeating the comparison only executes
+# the checks under an image which changed since, usually the new one. Results
+# not used for --cache-max-age days are removed, so that the results of old
+# images don't accumulate.
+
+import os
+import sys
+import json
+import argparse
+from access_cli_sealuzh.main import AccessValidator
+
+FIELDS = ["returncode", "points", "timed_out"]
+# Durations (e.g., "Ran 3 tests in 0.012s") differ between any two runs, so
+# they are masked when comparing output
+DURATION = r"\b\d+(\.\d+)?\s?(ms|s)\b"
+
+def default_cache_directory():
+    cache = os.environ.get("XDG_CACHE_HOME", os.path.join(os.path.expanduser("~"), ".cache"))
+    return os.path.join(cache, "access-cli", "results")
+
+class DiffValidator(AccessValidator):
+    """Also records the output of each execution, to compare it"""
+
+    def record_execution(self, task, docker_image, command_type, command, solve_command, result, submission=None, variant=None):
+        execution = super().record_execution(task, docker_image, command_type, command,
+                                             solve_command, result, submission, variant)
+        if result.failed:
+            # nothing was executed, so there is nothing to compare
+            self.error(f"{task} {command_type}: docker failed: {result.stderr.strip()}")
+        import re
+        execution["output"] = re.sub(DURATION, "<duration>", result.stdout + result.stderr)
+        return execution
+
+def checks(task, config, solve_command=None):
+    """(name, command type, further arguments of execute_command) of each
+    check of task"""
+    evaluator = config["evaluator"]
+    checks = []
+    if "run_command" in evaluator:
+        checks.append(("run_command", "run_command", {}))
+    if "test_command" in evaluator:
+        checks.append(("test_command", "test_command", {}))
+        if solve_command:
+            checks.append(("test_command on solution", "test_command",
+                {"solve_command": solve_command}))
+    if "grade_command" in evaluator:
+        checks.append(("grade_command", "grade_command", {}))
+        if solve_command:
+            checks.append(("grade_command on solution", "grade_command",
+                {"solve_command": solve_command}))
+        for variant in config.get("variants", []):
+            submission = None
+            if "directory" in variant:
+                submission = os.path.join(task, variant["directory"])
+            checks.append((f"grade_command on variant {variant['name']}", "grade_command",
+                {"submission": submission, "solve_command": variant.get("solve_command")}))
+    return checks
+
+def compare(old, new, output=False):
+    """Differences between two executions of a check as (field, old, new)"""
+    fields = FIELDS + (["output"] if output else [])
+    return [(field, old.get(field), new.get(field)) for field in fields
+            if old.get(field) != new.get(field)]
+
+def diff_images(validator, old_image, new_image, solve_command=None, output=False):
+    """Run the checks of each task using old_image under both images, and
+    return a summary with the differences"""
+    from access_cli_sealuzh.loadtest import task_config
+    from access_cli_sealuzh.pipeline import Job, Pipeline
+    model = validator.build_model()
+    validator.model = model
+    executor = validator.session.executor
+    executor.pull([old_image, new_image])
+    validator.shared_staging = True
+    validator.pipeline = Pipeline(executor.get_pool(), executor.jobs)
+    validator.pipeline.start()
+    tasks = []
+    try:
+        for node in model.tasks_using_image(old_image):
+            task = os.path.normpath(os.path.join(model.root, node["path"]))
+            validator.logger.set_subject(task)
+            config = task_config(validator, task)
+            if config is None:
+                continue
+            tasks.append(task)
+            for name, command_type, arguments in checks(task, config, solve_command):
+                for image in [old_image, new_image]:
+                    image_config = dict(config, evaluator=dict(config["evaluator"], docker_image=image))
+                    job = Job(task, validator.execute_command, task, image_config,
+                              command_type, **arguments)
+                    job.check = name
+                    validator.pipeline.put(job)
+    finally:
+        jobs = validator.pipeline.finish()
+        validator.pipeline = None
+        validator.remove_stages()
+
+    summary = {"from": old_image, "to": new_image, "tasks": tasks, "checks": 0,
+               "cached": {old_image: 0, new_image: 0}, "differences": [], "errors": []}
+    for old, new in zip(jobs[::2], jobs[1::2]):
+        summary["checks"] += 1
+        executions = {}
+        for image, job in [(old_image, old), (new_image, new)]:
+            executions[image] = job.executions[0] if job.executions else {}
+            summary["cached"][image] += sum(e["cached"] for e in job.executions)
+            summary["errors"].extend(f"{image}: {error}" for error in job.errors)
+        differences = compare(executions[old_image], executions[new_image], output)
+        if differences:
+            summary["differences"].append({"task": old.subject, "check": old.check,
+                "fields": {field: {"from": a, "to": b} for field, a, b in differences}})
+    return summary
+
+def print_summary(summary):
+    print(f"❰ Image diff: {summary['from']} → {summary['to']}, {len(summary['tasks'])} tasks, "
+          f"{summary['checks']} checks, {len(summary['differences'])} differences ❱")
+    for difference in summary["differences"]:
+        changes = []
+        for field, values in difference["fields"].items():
+            if field == "output":
+                changes.append("output differs")
+            else:
+                changes.append(f"{field} {values['from']} → {values['to']}")
+        print(f" ✗ {difference['task']} {difference['check']}: {', '.join(changes)}")
+    for error in summary["errors"]:
+        print(f" ! {error}")
+    print("from cache: " + ", ".join(f"{image} {count} of {summary['checks']}"
+                                     for image, count in summary["cached"].items()))
+
+def main(argv):
+    parser = argparse.ArgumentParser(
+        prog = 'access-cli diff-image',
+        description = "Run the checks of all tasks using an image under a new image and compare the results")
+    parser.add_argument('--from', dest='from_image', required=True,
+        help = "docker_image currently used by the tasks")
+    parser.add_argument('--to', dest='to_image', required=True,
+        help = "docker_image to compare against")
+    parser.add_argument('-d', '--directory', default=".",
+        help = "path to the course, assignment or task")
+    parser.add_argument('-s', '--solve-command', type=str,
+        help = "shell command which solves the tasks, to also compare the checks on the solution")
+    parser.add_argument('--output', action='store_true', default=False,
+        help = "also compare the output (stdout and stderr) of the checks")
+    parser.add_argument('-j', '--jobs', type=int, default=4,
+        help = "number of checks executed in parallel")
+    parser.add_argument('-u', '--user', default="autodetect",
+        help = "set docker user uid")
+    parser.add_argument('-f', '--global-file', action='append', default=[],
+        help = "global files (relative to course root)")
+    parser.add_argument('-C', '--course-root',
+        help = "path to course root (default: auto-detected)")
+    parser.add_argument('--cache', default=default_cache_directory(),
+        help = "directory of the persistent result cache (default: ~/.cache/access-cli/results)")
+    parser.add_argument('--no-cache', action='store_true', default=False,
+        help = "neither read nor write the persistent result cache")
+    parser.add_argument('--cache-max-age', type=float, default=30, metavar='DAYS',
+        help = "remove cached results not used for this many days (default: 30)")
+    parser.add_argument('--clear-cache', action='store_true', default=False,
+        help = "remove all cached results before comparing")
+    parser.add_argument('--report', type=str,
+        help = "write the differences as JSON to the given path")
+    args = parser.parse_args(argv)
+
+    from access_cli_sealuzh.loadtest import task_arguments
+    from access_cli_sealuzh.main import Session
+    if args.user == "autodetect":
+        args.user = str(os.getuid()) if hasattr(os, "getuid") else None
+    validator_args = task_arguments(args.directory, args.solve_command, args.user, args.jobs,
+        course_root=args.course_root, global_files=args.global_file)
+    session = Session(args.jobs)
+    if not session.check_docker(args.user):
+        print("Docker is required for comparing images, but it's not working correctly: exiting.")
+        return 14
+    # without the id of an image, results could not be attributed to it
+    session.executor.pull([args.from_image, args.to_image])
+    unknown = [image for image in [args.from_image, args.to_image]
+               if not session.executor.images.get(image)]
+    if unknown:
+        session.executor.shutdown()
+        print(f"Could not pull or inspect {', '.join(unknown)}: exiting.")
+        return 1
+    if args.clear_cache:
+        import shutil
+        shutil.rmtree(args.cache, ignore_errors=True)
+    if not args.no_cache:
+        session.executor.cache_directory = args.cache
+        if os.path.isdir(args.cache):
+            session.executor.prune_results(args.cache_max_age * 24 * 60 * 60)
+    validator = DiffValidator(validator_args, session)
+    summary = diff_images(validator, args.from_image, args.to_image,
+                          args.solve_command, args.output)
+    session.executor.shutdown()
+
+    print_summary(summary)
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(summary, f, indent=2)
+    return 1 if summary["differences"] or summary["errors"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+
+# The executor runs commands in docker containers on behalf of validators. One
+# executor is shared by all validators of a session (e.g., all courses of a
+# batch run, or all requests to the daemon), so that images are pulled at most
+# once and identical executions are only performed once.
+
+import os
+import threading
+from collections import OrderedDict
+
+# Number of results kept in memory, least recently used evicted first, so that
+# long-lived sessions (e.g., of the daemon) don't grow without bound
+RESULT_CACHE_SIZE = 1024
+# Output of docker itself (rather than the command) when the docker daemon
+# failed, e.g. to start a container. Such results are never cached.
+DAEMON_ERRORS = ("Error response from daemon", "Cannot connect to the Docker daemon")
+
+# To measure resource usage, the command is wrapped in a shell script which,
+# once the command has finished, copies the cgroup statistics of the container
+# (cgroup v2, or v1 as a fallback) to a file in the workspace. The cgroup of a
+# container disappears when it exits, so they cannot be read from outside.
+USAGE_FILE = ".access-cli-usage"
+CGROUP_FILES = [
+    "/sys/fs/cgroup/cpu.stat",
+    "/sys/fs/cgroup/memory.peak",
+    "/sys/fs/cgroup/io.stat",
+    "/sys/fs/cgroup/cpuacct/cpuacct.usage",
+    "/sys/fs/cgroup/memory/memory.max_usage_in_bytes",
+    "/sys/fs/cgroup/blkio/blkio.throttle.io_service_bytes",
+]
+USAGE_SCRIPT = ('"$@"; status=$?; for f in ' + " ".join(CGROUP_FILES) +
+    '; do if [ -r "$f" ]; then echo "==> $f"; cat "$f"; fi; done > ' +
+    USAGE_FILE + ' 2>/dev/null; exit $status')
+
+class ExecutionResult:
+
+    def __init__(self, returncode=None, stdout="", stderr="", grade_results=None,
+                 timed_out=False, cid=None, cached=False, usage=None, failed=False):
+        self.returncode = returncode
+        self.stdout = stdout
+        self.stderr = stderr
+        self.grade_results = grade_results
+        self.timed_out = timed_out
+        self.cid = cid
+        self.cached = cached
+        # wall time and, if measured, cpu time, peak memory and block I/O
+        self.usage = usage if usage is not None else {}
+        # whether docker failed to run the command at all
+        self.failed = failed
+
+    def to_dict(self):
+        return {"returncode": self.returncode, "stdout": self.stdout,
+                "stderr": self.stderr, "grade_results": self.grade_results,
+                "timed_out": self.timed_out, "usage": self.usage}
+
+    @classmethod
+    def from_dict(cls, data, cached=False):
+        return cls(data["returncode"], data["stdout"], data["stderr"],
+                   data["grade_results"], data["timed_out"], cached=cached,
+                   usage=data.get("usage"))
+
+def parse_usage(text):
+    """Parse the cgroup statistics written by USAGE_SCRIPT into cpu (seconds),
+    memory (peak bytes), io_read and io_write (bytes)"""
+    usage = {}
+    path = None
+    for line in text.splitlines():
+        if line.startswith("==> "):
+            path = line[4:]
+            continue
+        fields = line.split()
+        if not fields:
+            continue
+        name = os.path.basename(path or "")
+        if name == "cpu.stat" and fields[0] == "usage_usec":
+            usage["cpu"] = int(fields[1]) / 1e6
+        elif name == "cpuacct.usage":
+            usage["cpu"] = int(fields[0]) / 1e9
+        elif name in ("memory.peak", "memory.max_usage_in_bytes"):
+            usage["memory"] = int(fields[0])
+        elif name == "io.stat":
+            for field in fields[1:]:
+                key, _, value = field.partition("=")
+                if key in ("rbytes", "wbytes"):
+                    io = "io_read" if key == "rbytes" else "io_write"
+                    usage[io] = usage.get(io, 0) + int(value)
+        elif name == "blkio.throttle.io_service_bytes" and len(fields) == 3:
+            if fields[1] in ("Read", "Write"):
+                io = "io_read" if fields[1] == "Read" else "io_write"
+                usage[io] = usage.get(io, 0) + int(fields[2])
+    return usage
+
+def format_bytes(size):
+    for unit in ["B", "KiB", "MiB"]:
+        if size < 1024:
+            return f"{size:.1f} {unit}" if unit != "B" else f"{size} B"
+        size /= 1024
+    return f"{size:.1f} GiB"
+
+def format_usage(usage):
+    parts = []
+    if "wall" in usage: parts.append(f"wall {usage['wall']:.2f}s")
+    if "cpu" in usage: parts.append(f"cpu {usage['cpu']:.2f}s")
+    if "memory" in usage: parts.append(f"peak memory {format_bytes(usage['memory'])}")
+    if "io_read" in usage: parts.append(f"read {format_bytes(usage['io_read'])}")
+    if "io_write" in usage: parts.append(f"written {format_bytes(usage['io_write'])}")
+    return ", ".join(parts)
+
+def workspace_digest(workspace):
+    """Hash of all file paths and contents in a workspace"""
+    import hashlib
+    digest = hashlib.sha256()
+    for root, dirs, files in os.walk(workspace):
+        dirs.sort()
+        for name in sorted(files):
+            path = os.path.join(root, name)
+            digest.update(os.path.relpath(path, workspace).encode("utf-8") + b"\0")
+            with open(path, "rb") as f:
+                for chunk in iter(lambda: f.read(1 << 16), b""):
+                    digest.update(chunk)
+            digest.update(b"\0")
+    return digest.hexdigest()
+
+class Executor:
+
+    def __init__(self, jobs=1, profiler=None):
+        from access_cli_sealuzh.profiler import NullProfiler
+        self.jobs = jobs
+        self.profiler = profiler if profiler is not None else NullProfiler()
+        self.pool = None
+        # ids of docker images known to be available locally, by name
+        self.images = {}
+        # results of previous executions by execution key, unless disabled
+        # (e.g., to measure repeated executions)
+        self.cache = OrderedDict()
+        self.cache_size = RESULT_CACHE_SIZE
+        self.caching = True
+        # directory in which results are also stored across runs, if set
+        self.cache_directory = None
+        self.lock = threading.Lock()
+
+    def get_pool(self):
+        with self.lock:
+            if self.pool is None:
+                from concurrent.futures import ThreadPoolExecutor
+                self.pool = ThreadPoolExecutor(max_workers=self.jobs,
+                    thread_name_prefix="access-cli-executor")
+            return self.pool
+
+    def shutdown(self):
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+
+    def pull(self, images):
+        """Make sure the given images are available, pulling missing ones
+        concurrently. Failures are ignored, docker run will report them."""
+        images = set(images) - set(self.images)
+        if not images:
+            return
+        list(self.get_pool().map(self.pull_image, sorted(images)))
+
+    def pull_image(self, image):
+        with self.profiler.span("pull", command_type=image):
+            self.ensure_image(image)
+
+    def ensure_image(self, image):
+        import subprocess
+        instruction = ["docker", "image", "inspect", "--format", "{{.Id}}", image]
+        try:
+            inspect = subprocess.run(instruction, capture_output=True)
+        except OSError:
+            return
+        if inspect.returncode != 0:
+            pull = subprocess.run(["docker", "pull", image], capture_output=True)
+            if pull.returncode != 0:
+                return
+            inspect = subprocess.run(instruction, capture_output=True)
+        with self.lock:
+            self.images[image] = inspect.stdout.decode("utf-8").strip()
+
+    def execution_key(self, workspace, docker_image, command, user, usage=False, options=()):
+        import hashlib
+        # include the image id if known, so that updated images are not
+        # answered with results obtained from an older version
+        image_id = self.images.get(docker_image, "")
+        return hashlib.sha256("\0".join([docker_image, image_id, command,
+            str(user), str(usage), *options, workspace_digest(workspace)]).encode("utf-8")).hexdigest()
+
+    def run(self, workspace, docker_image, command, user=None, timeout=30,
+            subject=None, command_type=None, usage=False, options=()):
+        """Run command in docker_image with the workspace mounted. Identical
+        executions (same image, command, user, options and workspace content)
+        are answered from the result cache. If usage is set, the resource
+        usage of the container is measured (see USAGE_SCRIPT). options are
+        passed on to docker create (e.g., to limit cpus)."""
+        with self.profiler.span("cache", subject, command_type):
+            key = self.execution_key(workspace, docker_image, command, user, usage, options)
+        with self.lock:
+            if self.caching and key in self.cache:
+                self.cache.move_to_end(key)
+                return ExecutionResult.from_dict(self.cache[key], cached=True)
+        # results are only stored across runs if it is known which version of
+        # the image produced them
+        persistent = self.cache_directory is not None and bool(self.images.get(docker_image))
+        if self.caching and persistent:
+            stored = self.load_result(key)
+            if stored is not None:
+                self.remember(key, stored)
+                return ExecutionResult.from_dict(stored, cached=True)
+        result = self.execute(workspace, docker_image, command, user, timeout,
+                              subject, command_type, usage, options)
+        # timeouts and failures of docker may not recur
+        if not result.timed_out and not result.failed:
+            self.remember(key, result.to_dict())
+            if persistent:
+                self.store_result(key, result.to_dict())
+        return result
+
+    def remember(self, key, result):
+        with self.lock:
+            self.cache[key] = result
+            self.cache.move_to_end(key)
+            while len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+
+    def result_path(self, key):
+        return os.path.join(self.cache_directory, key[:2], key + ".json")
+
+    def load_result(self, key):
+        import json
+        try:
+            with open(self.result_path(key)) as f:
+                result = json.load(f)
+            # the modification time of a result is when it was last used,
+            # see prune_results()
+            os.utime(self.result_path(key))
+            return result
+        except (OSError, ValueError):
+            return None
+
+    def prune_results(self, max_age):
+        """Remove the results in the cache directory not used for max_age
+        seconds, returning how many were removed"""
+        import time
+        removed = 0
+        oldest = time.time() - max_age
+        for root, dirs, files in os.walk(self.cache_directory):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    if os.stat(path).st_mtime < oldest:
+                        os.remove(path)
+                        removed += 1
+                except FileNotFoundError:
+                    # removed by a concurrent run
+                    pass
+        return removed
+
+    def store_result(self, key, result):
+        """Store a result in the cache directory. Results are written to a
+        temporary file first, so that concurrent runs never read partial
+        results."""
+        import json
+        import tempfile
+        path = self.result_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        descriptor, temporary = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(descriptor, "w") as f:
+            json.dump(result, f)
+        os.replace(temporary, path)
+
+    def execute(self, workspace, docker_image, command, user, timeout,
+                subject=None, command_type=None, usage=False, options=()):
+        import json
+        import time
+        import subprocess
+        # The container is created, started and removed in separate steps so
+        # that each phase of its lifecycle can be timed. The container ID is
+        # needed to kill it if it stalls.
+        arguments = command.split()
+        if usage:
+            arguments = ["sh", "-c", USAGE_SCRIPT, "sh", *arguments]
+        instruction = [
+           "docker", "create",
+           "--network", "none",
+           "-v", f"{workspace}:/workspace", "-w", "/workspace",
+           *options,
+           docker_image,
+           *arguments
+        ]
+        # Windows doesn't have os.getuid(), so we only use it otherwise
+        if user is not None:
+            instruction.insert(2, "--user")
+            instruction.insert(3, user)
+        with self.profiler.span("create", subject, command_type):
+            created = subprocess.run(instruction, capture_output=True)
+        if created.returncode != 0:
+            return ExecutionResult(created.returncode, "", created.stderr.decode("utf-8"),
+                                   failed=True)
+        cid = created.stdout.decode("utf-8").strip()
+        start = time.perf_counter()
+        try:
+            with self.profiler.span("docker", subject, command_type):
+                result = subprocess.run(["docker", "start", "--attach", cid],
+                                        capture_output=True, timeout=timeout)
+            wall = time.perf_counter() - start
+        except subprocess.TimeoutExpired:
+            with self.profiler.span("kill", subject, command_type):
+                subprocess.run(["docker", "kill", cid], capture_output=True)
+            return ExecutionResult(timed_out=True, cid=cid,
+                                   usage={"wall": time.perf_counter() - start})
+        finally:
+            with self.profiler.span("remove", subject, command_type):
+                subprocess.run(["docker", "rm", "--force", cid], capture_output=True)
+        with self.profiler.span("results", subject, command_type):
+            grade_results = None
+            if os.path.isfile(os.path.join(workspace, "grade_results.json")):
+                with open(os.path.join(workspace, "grade_results.json")) as grade_result:
+                    grade_results = json.load(grade_result)
+            measured = {"wall": wall}
+            usage_file = os.path.join(workspace, USAGE_FILE)
+            if os.path.isfile(usage_file):
+                with open(usage_file) as f:
+                    measured.update(parse_usage(f.read()))
+                os.remove(usage_file)
+            stderr = result.stderr.decode("utf-8")
+            return ExecutionResult(result.returncode,
+                result.stdout.decode("utf-8"), stderr, grade_results, usage=measured,
+                failed=stderr.startswith(DAEMON_ERRORS))
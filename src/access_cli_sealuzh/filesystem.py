@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+
+# File access of the validator. Courses are usually validated from a directory
+# (LocalFS), but can also be validated straight from a zip or tar archive
+# (ArchiveFS, e.g. access-cli -A -d course.zip) without extracting it: configs
+# are parsed and file references checked against the archive's index, and only
+# the members a workspace needs are streamed into it when staging an
+# execution. Paths into an archive are formed as if the archive were the
+# course directory (e.g. course.zip/assignment_1/config.toml), so the rest of
+# the validator handles both alike. Paths outside the archive (e.g. a course
+# root given with -C) are accessed on disk. Git revisions are mounted the same
+# way, see gitfs.py.
+
+import io
+import os
+import shutil
+import threading
+
+class LocalFS:
+    """Files on disk"""
+
+    def name(self, path):
+        # not in any index, see IndexedFS
+        return None
+
+    def isfile(self, path):
+        return os.path.isfile(path)
+
+    def isdir(self, path):
+        return os.path.isdir(path)
+
+    def exists(self, path):
+        return os.path.exists(path)
+
+    def open(self, path):
+        return open(path, "rb")
+
+    def stat_key(self, path):
+        """Changes whenever the file changes, to validate cached contents"""
+        stat = os.stat(path)
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def walk(self, path):
+        return os.walk(path)
+
+    def copy(self, path, target):
+        shutil.copyfile(path, target)
+
+class IndexedFS:
+    """Files listed in an index (members, by their name relative to the
+    index's root), mounted at path as if they were on disk. Paths outside
+    path are accessed on disk."""
+
+    def __init__(self, path, members, prefix=""):
+        self.path = os.path.abspath(path)
+        self.local = LocalFS()
+        self.members = members
+        # name of the directory mounted at path
+        self.prefix = prefix
+        self.directories = {""}
+        for name in self.members:
+            parent = os.path.dirname(name)
+            while parent not in self.directories:
+                self.directories.add(parent)
+                parent = os.path.dirname(parent)
+        # subdirectories and files of each directory, by name
+        self.children = {directory: ([], []) for directory in self.directories}
+        for directory in sorted(self.directories - {""}):
+            self.children[os.path.dirname(directory)][0].append(os.path.basename(directory))
+        for name in sorted(self.members):
+            self.children[os.path.dirname(name)][1].append(os.path.basename(name))
+
+    def name(self, path):
+        """Name of path in the index, or None if it is outside"""
+        relative = os.path.relpath(os.path.abspath(path), self.path)
+        if relative == os.curdir:
+            return self.prefix
+        if relative == os.pardir or relative.startswith(os.pardir + os.sep):
+            return None
+        return os.path.normpath(os.path.join(self.prefix, relative))
+
+    def isfile(self, path):
+        name = self.name(path)
+        if name is None:
+            return self.local.isfile(path)
+        return name in self.members
+
+    def isdir(self, path):
+        name = self.name(path)
+        if name is None:
+            return self.local.isdir(path)
+        return name in self.directories
+
+    def exists(self, path):
+        return self.isfile(path) or self.isdir(path)
+
+    def member(self, path):
+        name = self.name(path)
+        if name not in self.members:
+            raise FileNotFoundError(path)
+        return self.members[name]
+
+    def open(self, path):
+        if self.name(path) is None:
+            return self.local.open(path)
+        return io.BytesIO(self.read(self.member(path)))
+
+    def walk(self, path):
+        name = self.name(path)
+        if name is None:
+            yield from self.local.walk(path)
+            return
+        pending = [(path, name)] if name in self.directories else []
+        while pending:
+            root, directory = pending.pop(0)
+            directories, files = self.children[directory]
+            yield root, list(directories), list(files)
+            pending.extend((os.path.join(root, child), os.path.join(directory, child))
+                           for child in directories)
+
+    def copy(self, path, target):
+        if self.name(path) is None:
+            return self.local.copy(path, target)
+        with open(target, "wb") as f:
+            f.write(self.read(self.member(path)))
+
+class ArchiveFS(IndexedFS):
+    """Members of a zip or tar archive, as if extracted to the archive's path.
+    If all members are within a single directory containing a config.toml,
+    that directory is the root."""
+
+    def __init__(self, path):
+        import zipfile
+        import tarfile
+        stat = os.stat(path)
+        self.key = (stat.st_mtime_ns, stat.st_size)
+        # members can't be read concurrently from the shared file object
+        self.lock = threading.Lock()
+        members = {}
+        if zipfile.is_zipfile(path):
+            self.archive = zipfile.ZipFile(path)
+            for info in self.archive.infolist():
+                if not info.is_dir():
+                    members[os.path.normpath(info.filename)] = info
+        else:
+            self.archive = tarfile.open(path)
+            for info in self.archive.getmembers():
+                if info.isfile():
+                    members[os.path.normpath(info.name)] = info
+        prefix = ""
+        tops = {name.split(os.sep, 1)[0] for name in members}
+        if "config.toml" not in members and len(tops) == 1:
+            top = tops.pop()
+            if os.path.join(top, "config.toml") in members:
+                prefix = top
+        super().__init__(path, members, prefix)
+
+    def current(self):
+        """Whether the archive is unchanged since it was indexed"""
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return False
+        return self.key == (stat.st_mtime_ns, stat.st_size)
+
+    def extract(self, info):
+        if hasattr(self.archive, "extractfile"):
+            return self.archive.extractfile(info)
+        return self.archive.open(info)
+
+    def read(self, info):
+        with self.lock, self.extract(info) as f:
+            return f.read()
+
+    def stat_key(self, path):
+        if self.name(path) is None:
+            return self.local.stat_key(path)
+        self.member(path)
+        return self.key
+
+    def copy(self, path, target):
+        if self.name(path) is None:
+            return self.local.copy(path, target)
+        info = self.member(path)
+        with self.lock, self.extract(info) as f, open(target, "wb") as out:
+            shutil.copyfileobj(f, out)
+
+def is_archive(path):
+    if not os.path.isfile(path):
+        return False
+    import zipfile
+    import tarfile
+    return zipfile.is_zipfile(path) or tarfile.is_tarfile(path)
+
+def archive_of(path):
+    """Path of the archive containing path (e.g., course.zip for
+    course.zip/assignment), or None if it is not within an archive"""
+    path = os.path.abspath(path)
+    while not os.path.exists(path):
+        parent = os.path.dirname(path)
+        if parent == path:
+            return None
+        path = parent
+    return path if is_archive(path) else None
+
+def open_filesystem(directory):
+    """The file system containing directory: an archive or the disk"""
+    archive = archive_of(directory)
+    if archive is not None:
+        return ArchiveFS(archive)
+    return LocalFS()
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+
+# Validation of git revisions without checking them out (--rev REV, possibly
+# several times). The tree of each revision is listed once with git ls-tree
+# and mounted as a file system (see filesystem.py) at the repository's path
+# suffixed with @REV, e.g. /home/me/course@v1.2/assignment_1/config.toml.
+# Configs and the files of workspaces are read from a single long-running
+# git cat-file --batch process per repository. Blob contents are cached by
+# their id for all revisions of the session, so files which did not change
+# between revisions are read once.
+
+import os
+import copy
+import threading
+import subprocess
+from collections import OrderedDict
+from access_cli_sealuzh.filesystem import IndexedFS
+
+# Total size of the blob contents kept in memory
+BLOB_CACHE_SIZE = 256 << 20
+
+class BlobCache:
+    """Contents of blobs by id, least recently used evicted first. Blobs are
+    immutable, so cached contents never go stale."""
+
+    def __init__(self, limit=BLOB_CACHE_SIZE):
+        self.limit = limit
+        self.size = 0
+        self.contents = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    def get(self, blob, read):
+        with self.lock:
+            if blob in self.contents:
+                self.hits += 1
+                self.contents.move_to_end(blob)
+                return self.contents[blob]
+            self.misses += 1
+        content = read(blob)
+        if len(content) <= self.limit:
+            with self.lock:
+                if blob not in self.contents:
+                    self.contents[blob] = content
+                    self.size += len(content)
+                while self.size > self.limit:
+                    _, evicted = self.contents.popitem(last=False)
+                    self.size -= len(evicted)
+        return content
+
+class GitRepository:
+    """Objects of a repository, read through one git cat-file --batch
+    process started on first use"""
+
+    def __init__(self, top):
+        self.top = top
+        self.process = None
+        self.lock = threading.Lock()
+
+    def git(self, *args):
+        return subprocess.check_output(["git", "-C", self.top, *args], stderr=subprocess.DEVNULL)
+
+    def resolve(self, rev):
+        """Id of the commit rev refers to, or None"""
+        try:
+            return self.git("rev-parse", "--verify", f"{rev}^{{commit}}").decode().strip()
+        except subprocess.CalledProcessError:
+            return None
+
+    def tree(self, commit):
+        """Ids of the blobs of commit by path"""
+        blobs = {}
+        for entry in self.git("ls-tree", "-r", "-z", "--full-tree", commit).split(b"\0"):
+            if not entry:
+                continue
+            info, path = entry.split(b"\t", 1)
+            mode, kind, blob = info.decode().split()
+            # neither submodules nor symbolic links
+            if kind == "blob" and mode != "120000":
+                blobs[os.path.normpath(os.fsdecode(path))] = blob
+        return blobs
+
+    def read(self, blob):
+        with self.lock:
+            if self.process is None:
+                self.process = subprocess.Popen(["git", "-C", self.top, "cat-file", "--batch"],
+                    stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+            self.process.stdin.write(blob.encode() + b"\n")
+            self.process.stdin.flush()
+            header = self.process.stdout.readline().split()
+            if len(header) != 3:
+                raise FileNotFoundError(blob)
+            content = self.process.stdout.read(int(header[2]))
+            # each object is followed by a newline
+            self.process.stdout.read(1)
+            return content
+
+    def close(self):
+        with self.lock:
+            if self.process is not None:
+                self.process.stdin.close()
+                self.process.wait()
+                self.process.stdout.close()
+                self.process = None
+
+def mount_path(top, rev):
+    """Path at which rev of the repository at top is mounted. Slashes in rev
+    (e.g. origin/main) are escaped, so that no revision is mounted within
+    another one (e.g. feature/x within feature)."""
+    return f"{top}@{rev.replace('%', '%25').replace('/', '%2F')}"
+
+class GitFS(IndexedFS):
+    """The tree of a commit, mounted at the repository's path suffixed with
+    @rev (see mount_path)"""
+
+    def __init__(self, repository, rev, commit, blobs):
+        self.repository = repository
+        self.rev = rev
+        self.commit = commit
+        self.blobs = blobs
+        super().__init__(mount_path(repository.top, rev), repository.tree(commit))
+
+    def current(self):
+        return True
+
+    def read(self, blob):
+        return self.blobs.get(blob, self.repository.read)
+
+    def stat_key(self, path):
+        if self.name(path) is None:
+            return self.local.stat_key(path)
+        return self.member(path)
+
+    def mounted(self, path):
+        """Path of path (in the working tree) in this revision, unless it is
+        outside the repository"""
+        relative = os.path.relpath(os.path.abspath(path), self.repository.top)
+        if relative == os.pardir or relative.startswith(os.pardir + os.sep):
+            return path
+        return os.path.normpath(os.path.join(self.path, relative))
+
+def revision_filesystem(session, directory, rev):
+    """The file system of rev of the repository containing directory, or
+    None if there is no such repository or revision"""
+    # the directory may not exist in the working tree
+    existing = os.path.abspath(directory)
+    while not os.path.isdir(existing):
+        existing = os.path.dirname(existing)
+    try:
+        top = subprocess.check_output(["git", "-C", existing, "rev-parse", "--show-toplevel"],
+            stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    repository = session.repositories.setdefault(top, GitRepository(top))
+    commit = repository.resolve(rev)
+    if commit is None:
+        return None
+    if session.blobs is None:
+        session.blobs = BlobCache()
+    path = mount_path(top, rev)
+    fs = session.filesystems.get(path)
+    if not isinstance(fs, GitFS) or fs.commit != commit:
+        fs = session.filesystems[path] = GitFS(repository, rev, commit, session.blobs)
+    return fs
+
+def close_repositories(session):
+    for repository in session.repositories.values():
+        repository.close()
+
+def validate_revisions(args, session):
+    """Validate args.directory at each revision in args.rev"""
+    from access_cli_sealuzh import configure, print_results, print_skipped, print_warnings, write_outputs
+    from access_cli_sealuzh.main import AccessValidator
+    from access_cli_sealuzh.logger import Logger
+    loggers = {}
+    configured = args
+    try:
+        for rev in args.rev:
+            fs = revision_filesystem(session, args.directory, rev)
+            if fs is None:
+                logger = Logger()
+                logger.set_subject(f"{args.directory}@{rev}")
+                logger.error(f"{args.directory} is not in a git repository with a revision {rev}")
+            else:
+                rev_args = copy.copy(args)
+                rev_args.rev = None
+                rev_args.directory = fs.mounted(args.directory)
+                if args.course_root:
+                    rev_args.course_root = fs.mounted(args.course_root)
+                rev_args.global_file = set(args.global_file)
+                rev_args = configured = configure(rev_args, session)
+                logger = AccessValidator(rev_args, session).run()
+            loggers[rev] = logger
+            print_results(logger, f"{rev}: Validation")
+            print_skipped(logger)
+    finally:
+        close_repositories(session)
+    print_warnings(configured)
+    write_outputs(args, loggers.values())
+
+    failed = [rev for rev, logger in loggers.items() if logger.error_results()]
+    print(f"❰ {len(loggers) - len(failed)} of {len(loggers)} revisions passed validation ❱")
+    for rev in loggers:
+        print(f" {'✗' if rev in failed else '✓'} {rev}")
+    return 1 if failed else 0
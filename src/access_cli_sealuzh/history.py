@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+
+# Historical timing database. Every CLI run which executes commands appends
+# the executions it performed (duration, resource usage and outcome per task
+# and command) to a local SQLite database. `access-cli history` shows how the
+# duration of each command developed and flags commands whose latest duration
+# regressed compared to the median of their previous runs (the rolling
+# baseline). Whether each subject passed is recorded, too, to prioritize
+# previously failing tasks (see budget.py). Executions of solution variants
+# and submissions are recorded with the variant's name or the submission's
+# path, so that only the template and solution form the duration series.
+
+import os
+import sys
+import re
+import time
+import argparse
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    started REAL NOT NULL,
+    directory TEXT NOT NULL,
+    passed INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS executions (
+    run INTEGER NOT NULL REFERENCES runs(id),
+    subject TEXT NOT NULL,
+    command_type TEXT NOT NULL,
+    solution INTEGER NOT NULL,
+    docker_image TEXT,
+    command TEXT,
+    returncode INTEGER,
+    timed_out INTEGER NOT NULL,
+    cached INTEGER NOT NULL,
+    wall REAL,
+    cpu REAL,
+    memory INTEGER,
+    io_read INTEGER,
+    io_write INTEGER,
+    variant TEXT NOT NULL DEFAULT ''
+);
+CREATE TABLE IF NOT EXISTS results (
+    run INTEGER NOT NULL REFERENCES runs(id),
+    subject TEXT NOT NULL,
+    passed INTEGER NOT NULL
+);
+"""
+
+def default_path():
+    cache = os.environ.get("XDG_CACHE_HOME", os.path.join(os.path.expanduser("~"), ".cache"))
+    return os.environ.get("ACCESS_CLI_HISTORY",
+        os.path.join(cache, "access-cli", "history.sqlite"))
+
+def subject_path(subject):
+    """Absolute path of a subject as reported by the logger, i.e., without
+    the slug appended to it"""
+    return os.path.abspath(re.sub(r" \([^()]*\)$", "", subject))
+
+def connect(path):
+    import sqlite3
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    connection = sqlite3.connect(path)
+    connection.executescript(SCHEMA)
+    # databases recorded before variants were told apart
+    columns = [row[1] for row in connection.execute("PRAGMA table_info(executions)")]
+    if "variant" not in columns:
+        connection.execute("ALTER TABLE executions ADD COLUMN variant TEXT NOT NULL DEFAULT ''")
+    connection.execute("""CREATE INDEX IF NOT EXISTS executions_by_check
+        ON executions (subject, command_type, solution, variant, run)""")
+    return connection
+
+def variant_of(execution):
+    """Name of the variant or path of the submission an execution graded,
+    or '' for the template and solution"""
+    if execution.get("variant"):
+        return execution["variant"]
+    if execution.get("submission"):
+        return os.path.abspath(execution["submission"])
+    return ""
+
+def record(path, loggers, directory):
+    """Append a run with the executions of the given loggers"""
+    loggers = list(loggers)
+    passed = not any(logger.error_results() for logger in loggers)
+    with connect(path) as connection:
+        run = connection.execute("INSERT INTO runs (started, directory, passed) VALUES (?, ?, ?)",
+            (time.time(), os.path.abspath(directory), int(passed))).lastrowid
+        for logger in loggers:
+            connection.executemany("""INSERT INTO executions VALUES
+                (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                [(run, os.path.abspath(e["subject"]), e["command_type"], int(e["solution"]),
+                  e["docker_image"], e["command"], e["returncode"], int(e["timed_out"]),
+                  int(e["cached"]), e["usage"].get("wall"), e["usage"].get("cpu"),
+                  e["usage"].get("memory"), e["usage"].get("io_read"), e["usage"].get("io_write"),
+                  variant_of(e))
+                 for e in logger.executions])
+            # subjects with checks skipped (see budget.py) did not fully pass
+            skipped = {check["subject"] for check in logger.skipped}
+            connection.executemany("INSERT INTO results VALUES (?, ?, ?)",
+                [(run, subject_path(subject), int(not messages))
+                 for subject, messages in logger.results.items() if subject not in skipped])
+    connection.close()
+    return run
+
+def durations(connection, subject=None, limit=20, relative=False):
+    """Wall times of the last limit runs of each command on the template or
+    solution by (subject, command_type, solution), oldest first. Cached
+    executions are skipped as they did not run, timeouts as they were cut
+    short, and variants and submissions as they ran other code. If relative
+    is set, subjects are relative to the directory validated by their run
+    (e.g., to compare runs of checkouts at different paths)."""
+    query = """SELECT subject, command_type, solution, wall, directory FROM executions
+               LEFT JOIN runs ON executions.run = runs.id
+               WHERE NOT cached AND NOT timed_out AND wall IS NOT NULL AND variant = ''"""
+    parameters = []
+    if subject:
+        query += " AND subject LIKE ?"
+        parameters.append(f"%{subject}%")
+    series = {}
+    for subject, command_type, solution, wall, directory in connection.execute(
+            query + " ORDER BY run", parameters):
+        if relative and directory:
+            subject = os.path.relpath(subject, directory)
+        series.setdefault((subject, command_type, bool(solution)), []).append(wall)
+    return {key: walls[-limit:] for key, walls in series.items()}
+
+def last_results(connection):
+    """Whether each subject passed in the last run which recorded it"""
+    return {subject: bool(passed) for subject, passed in connection.execute(
+        "SELECT subject, passed FROM results ORDER BY run")}
+
+def last_executed(connection):
+    """Start time of the last run which executed each subject's commands"""
+    return dict(connection.execute("""SELECT subject, MAX(started) FROM executions
+        JOIN runs ON executions.run = runs.id GROUP BY subject"""))
+
+def regression(walls, window=5, threshold=0.5):
+    """Ratio of the latest duration to the median of the previous window
+    durations if it exceeds 1 + threshold, otherwise None"""
+    import statistics
+    if len(walls) < 2:
+        return None
+    baseline = statistics.median(walls[-window - 1:-1])
+    if baseline > 0 and walls[-1] > baseline * (1 + threshold):
+        return walls[-1] / baseline
+    return None
+
+def describe(key):
+    subject, command_type, solution = key
+    return f"{subject} {command_type}{' on solution' if solution else ''}"
+
+def main(argv):
+    parser = argparse.ArgumentParser(
+        prog = 'access-cli history',
+        description = 'Show execution duration trends and flag regressions')
+    parser.add_argument('--history', default=default_path(),
+        help = "path of the history database (default: $ACCESS_CLI_HISTORY or ~/.cache/access-cli/history.sqlite)")
+    parser.add_argument('-s', '--subject',
+        help = "only show tasks whose path contains this string")
+    parser.add_argument('-n', '--runs', type=int, default=10,
+        help = "number of most recent durations to show per command")
+    parser.add_argument('-w', '--window', type=int, default=5,
+        help = "number of previous runs whose median forms the baseline")
+    parser.add_argument('-t', '--threshold', type=float, default=0.5,
+        help = "flag commands slower than their baseline by more than this fraction")
+    parser.add_argument('-r', '--regressions', action='store_true',
+        help = "only show regressed commands")
+    args = parser.parse_args(argv)
+
+    if not os.path.isfile(args.history):
+        print(f"No history recorded in {args.history} yet")
+        return 0
+    connection = connect(args.history)
+    series = durations(connection, args.subject, max(args.runs, args.window + 1))
+    connection.close()
+    regressed = 0
+    for key, walls in sorted(series.items()):
+        ratio = regression(walls, args.window, args.threshold)
+        if ratio is not None:
+            regressed += 1
+        elif args.regressions:
+            continue
+        trend = " ".join(f"{wall:.2f}" for wall in walls[-args.runs:])
+        flag = f"  ✗ {ratio:.2f}x baseline" if ratio is not None else ""
+        print(f"{describe(key)}: {trend}{flag}")
+    if regressed:
+        print(f"❰ {regressed} command(s) regressed beyond {args.threshold:.0%} ❱")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
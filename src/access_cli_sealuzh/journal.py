@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+
+# Checkpoint journal of a validation run (--journal PATH, --resume). Once a
+# task and all its executions are complete, a line with its results and a key
+# hashing everything they depended on is appended to the journal: the task's
+# config and files (including global files and the directories of solution
+# variants), the docker image and its id, and the arguments which affect
+# what is checked. With --resume, tasks whose key is unchanged are restored
+# from the journal instead of being validated again. Restored executions are
+# put through the pipeline like any other job, so the summary and report are
+# in the same order as those of an uninterrupted run.
+
+import os
+import json
+import hashlib
+import threading
+
+# Arguments which affect the results of validating a task
+ARGUMENTS = ["run", "test", "test_solution", "grade_template", "grade_solution",
+             "grade_variants", "solve_command", "user", "usage", "repeat", "perturb",
+             "sample", "seed"]
+
+def file_digest(path, fs):
+    digest = hashlib.sha256()
+    try:
+        with fs.open(path) as f:
+            for chunk in iter(lambda: f.read(1 << 16), b""):
+                digest.update(chunk)
+    except OSError:
+        return None
+    return digest.hexdigest()
+
+class Journal:
+
+    def __init__(self, path, resume=False):
+        self.path = path
+        # latest entry of each task, by absolute path
+        self.entries = self.load(path) if resume else {}
+        self.file = open(path, "a" if resume else "w")
+        self.lock = threading.Lock()
+        # entries waiting for jobs, by job
+        self.pending = {}
+
+    @staticmethod
+    def load(path):
+        entries = {}
+        if not os.path.isfile(path):
+            return entries
+        with open(path) as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # the line being written when the run was interrupted
+                    continue
+                entries[entry["task"]] = entry
+        return entries
+
+    def close(self):
+        self.file.close()
+
+    def key(self, validator, task):
+        """Hash of everything the results of validating task depend on"""
+        args = validator.args
+        inputs = {"arguments": {name: getattr(args, name, None) for name in ARGUMENTS},
+                  "global_files": sorted(args.global_file), "files": {}}
+        paths = [os.path.join(task, "config.toml")]
+        model = validator.model
+        node = model.node(task) if model is not None else None
+        if node is not None:
+            paths += [os.path.join(model.root, file) for file in model.files_of(node["path"])]
+            image = node.get("docker_image")
+            inputs["image"] = [image, validator.session.executor.images.get(image)]
+            config = model.try_config(task) or {}
+            for variant in config.get("variants", []):
+                if isinstance(variant, dict) and isinstance(variant.get("directory"), str):
+                    for root, dirs, files in validator.fs.walk(os.path.join(task, variant["directory"])):
+                        paths += [os.path.join(root, name) for name in files]
+        for path in sorted(set(paths)):
+            inputs["files"][os.path.relpath(path, task)] = file_digest(path, validator.fs)
+        return hashlib.sha256(json.dumps(inputs, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def validate(self, validator, task):
+        """Restore task from the journal if its entry is still valid, or
+        validate it and record it once all its executions are complete"""
+        name = os.path.abspath(task)
+        key = self.key(validator, task)
+        entry = self.entries.get(name)
+        if entry is not None and entry["key"] == key:
+            validator.restore_task(entry)
+            return
+        pipeline = validator.pipeline
+        start = len(pipeline.jobs) if pipeline is not None else 0
+        validator.check_task(task)
+        subject = validator.logger.current_subject
+        entry = {"task": name, "key": key, "subject": subject,
+                 "static": list(validator.logger.results[subject])}
+        jobs = pipeline.jobs[start:] if pipeline is not None else []
+        with self.lock:
+            entry["jobs"] = jobs
+            entry["remaining"] = len([job for job in jobs if not getattr(job, "journaled", False)])
+            for job in jobs:
+                self.pending[job] = entry
+            self.complete(entry)
+
+    def job_done(self, job):
+        """Pipeline callback, called once each job has run"""
+        with self.lock:
+            job.journaled = True
+            entry = self.pending.pop(job, None)
+            if entry is not None:
+                entry["remaining"] -= 1
+                self.complete(entry)
+
+    def complete(self, entry):
+        if entry["remaining"] > 0:
+            return
+        jobs = entry.pop("jobs")
+        del entry["remaining"]
+        entry["errors"] = [message for job in jobs for message in job.errors]
+        entry["executions"] = [execution for job in jobs for execution in job.executions]
+        self.file.write(json.dumps(entry) + "\n")
+        self.file.flush()
+        os.fsync(self.file.fileno())
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+
+# Load test of a task's grader (access-cli loadtest). Grades the template, the
+# solution and optionally sample submissions over and over at a given
+# concurrency, as the backend does before a deadline, and reports throughput,
+# latency percentiles, timeouts and whether the points awarded to the same
+# submission are consistent. Submissions are staged and graded exactly as
+# during validation (see AccessValidator.execute_command), but never answered
+# from the execution cache.
+
+import os
+import sys
+import argparse
+
+def sample_submissions(directory):
+    """Each subdirectory of directory is a submission, containing (some of)
+    the task's editable files at the same relative paths"""
+    return [os.path.join(directory, name) for name in sorted(os.listdir(directory))
+            if os.path.isdir(os.path.join(directory, name))]
+
+def task_arguments(directory, solve_command=None, user=None, jobs=1,
+                   course_root=None, global_files=()):
+    """Arguments for validating directory (e.g., a task) as with access-cli -A"""
+    from access_cli_sealuzh.main import autodetect, with_defaults
+    args = with_defaults(argparse.Namespace(directory=directory, level=None,
+        auto_detect=True, global_file=set(global_files), course_root=course_root, user=user,
+        run=None, test=None, test_solution=None, grade_template=None,
+        grade_solution=None, solve_command=solve_command, verbose=False,
+        debug=False, recursive=False, jobs=jobs))
+    return autodetect(args)
+
+def task_config(validator, task):
+    """The task's normalized config, or None after printing its schema errors"""
+    path, config = validator.read_directory_config(task)
+    v = validator.schema_validator("task_schema")
+    normalized = validator.normalize(v, config, task)
+    if normalized is None:
+        print(f"{path} schema errors:\n\t{validator.pformat(v.errors)}")
+    return normalized
+
+def percentile(values, fraction):
+    """Nearest-rank percentile, or None if there are no values"""
+    import math
+    if not values:
+        return None
+    values = sorted(values)
+    return values[max(0, math.ceil(fraction * len(values)) - 1)]
+
+def grade_concurrently(validator, task, config, submissions, concurrency):
+    """Grade each (name, solve_command, submission directory) on the
+    executor's pool and return the finished jobs in order"""
+    from access_cli_sealuzh.pipeline import Job, Pipeline
+    executor = validator.session.executor
+    executor.caching = False
+    executor.pull([config["evaluator"]["docker_image"]])
+    validator.pipeline = Pipeline(executor.get_pool(), concurrency)
+    validator.pipeline.start()
+    try:
+        for name, solve_command, submission in submissions:
+            validator.pipeline.put(Job(name, validator.execute_command, task, config,
+                "grade_command", solve_command=solve_command, submission=submission))
+    finally:
+        jobs = validator.pipeline.finish()
+        validator.pipeline = None
+        executor.caching = True
+    return jobs
+
+def summarize(jobs, expected, total):
+    """Statistics of a load test. expected maps submission names to the
+    points they should be awarded (if known)."""
+    latencies = [job.finished - job.started for job in jobs]
+    points = {}
+    timeouts, errors = 0, []
+    for job in jobs:
+        errors.extend(job.errors)
+        for execution in job.executions:
+            if execution["timed_out"]:
+                timeouts += 1
+            else:
+                points.setdefault(job.subject, []).append(execution["points"])
+    consistency = {}
+    for name, awarded in points.items():
+        distinct = sorted(set(awarded), key=lambda p: (p is None, p))
+        consistency[name] = {"submissions": len(awarded), "points": distinct,
+            "expected": expected.get(name),
+            "consistent": len(distinct) == 1 and expected.get(name, distinct[0]) == distinct[0]}
+    return {"submissions": len(jobs), "total": total,
+            "throughput": len(jobs) / total if total > 0 else 0,
+            "latency": {f"p{int(p * 100)}": percentile(latencies, p) for p in [0.5, 0.9, 0.95, 0.99]}
+                       | {"max": max(latencies) if latencies else None},
+            "timeouts": timeouts, "errors": errors, "points": consistency}
+
+def print_summary(summary, concurrency):
+    print(f"❰ Load test: {summary['submissions']} submissions at concurrency {concurrency} ❱")
+    print(f"throughput: {summary['throughput']:.2f} submissions/s ({summary['total']:.2f}s total)")
+    print("latency: " + ", ".join(f"{name} {seconds:.2f}s" if seconds is not None else f"{name} n/a"
+                                  for name, seconds in summary["latency"].items()))
+    print(f"timeouts: {summary['timeouts']}")
+    print("points:")
+    for name, result in summary["points"].items():
+        expected = f", expected {result['expected']:g}" if result["expected"] is not None else ""
+        awarded = ", ".join("none" if p is None else f"{p:g}" for p in result["points"])
+        print(f" {'✓' if result['consistent'] else '✗'} {name}: {awarded} "
+              f"({result['submissions']} submissions{expected})")
+    for error in summary["errors"]:
+        print(f" ✗ {error}")
+
+def main(argv):
+    parser = argparse.ArgumentParser(
+        prog = 'access-cli loadtest',
+        description = "Load test a task's grade_command with concurrent submissions")
+    parser.add_argument('task', help = "path to the task directory")
+    parser.add_argument('-c', '--concurrency', type=int, default=4,
+        help = "number of submissions graded at the same time")
+    parser.add_argument('-n', '--submissions', type=int, default=20,
+        help = "total number of submissions to grade")
+    parser.add_argument('-s', '--solve-command', type=str,
+        help = "shell command which solves the task, to also grade the solution")
+    parser.add_argument('-S', '--samples', type=str,
+        help = "directory containing one subdirectory per sample submission, to grade those as well")
+    parser.add_argument('-u', '--user', default="autodetect",
+        help = "set docker user uid")
+    parser.add_argument('-f', '--global-file', action='append', default=[],
+        help = "global files (relative to course root)")
+    parser.add_argument('-C', '--course-root',
+        help = "path to course root (default: two levels above the task)")
+    parser.add_argument('--report', type=str,
+        help = "write the statistics as JSON to the given path")
+    args = parser.parse_args(argv)
+
+    from access_cli_sealuzh.main import AccessValidator, Session
+    if args.user == "autodetect":
+        args.user = str(os.getuid()) if hasattr(os, "getuid") else None
+    task_args = task_arguments(args.task, args.solve_command, args.user, args.concurrency,
+                               args.course_root, args.global_file)
+    if task_args.level != "task":
+        print(f"{args.task} is not a task directory")
+        return 1
+    session = Session(args.concurrency)
+    validator = AccessValidator(task_args, session)
+    validator.logger.set_subject(args.task)
+    config = task_config(validator, args.task)
+    if config is None:
+        return 1
+    if "grade_command" not in config["evaluator"]:
+        print(f"{args.task} has no grade_command")
+        return 1
+    if not session.check_docker(args.user):
+        print("Docker is required for load testing, but it's not working correctly: exiting.")
+        return 14
+
+    sources = [("template", None, None)]
+    expected = {"template": 0}
+    if args.solve_command:
+        sources.append(("solution", args.solve_command, None))
+        expected["solution"] = config["max_points"]
+    if args.samples:
+        sources.extend((os.path.basename(sample), None, sample)
+                       for sample in sample_submissions(args.samples))
+    submissions = [sources[i % len(sources)] for i in range(args.submissions)]
+
+    import time
+    start = time.perf_counter()
+    jobs = grade_concurrently(validator, args.task, config, submissions, args.concurrency)
+    summary = summarize(jobs, expected, time.perf_counter() - start)
+    session.executor.shutdown()
+    print_summary(summary, args.concurrency)
+    if args.report:
+        import json
+        with open(args.report, "w") as f:
+            json.dump(summary, f, indent=2)
+    consistent = all(result["consistent"] for result in summary["points"].values())
+    return 0 if consistent and not summary["timeouts"] and not summary["errors"] else 1
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
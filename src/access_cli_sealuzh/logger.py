@@ -6,12 +6,20 @@ class Logger():
         self.stdout = stdout
         self.current_subject = "unknown"
         self.results = {}
+        # executions performed, see AccessValidator.record_execution
+        self.executions = []
+        # checks skipped for lack of time, see budget.py
+        self.skipped = []
+        # tasks of this shard and of the whole course, see sharding.py
+        self.partition = None
 
     def print(self, levelname, message):
         if self.stdout: print(f"\n>>{levelname}: {message}")
 
-    def error(self, message):
-        self.results[self.current_subject].append(message)
+    def error(self, message, subject=None):
+        if subject is None:
+            subject = self.current_subject
+        self.results[subject].append(message)
         self.print("error", message)
 
     def set_subject(self, subject):
@@ -1,21 +1,84 @@
 #!/usr/bin/env python3
 
+# Imports of anything not needed for every invocation are deferred to the code
+# paths which need them, see tests/test_startup.py for the startup budget.
 import os
-import tomli
-import pprint
-import tempfile
-import subprocess
-import json
-import shutil
-from pathlib import Path
+import sys
+import threading
+import contextlib
 from access_cli_sealuzh.logger import Logger
-from cerberus import Validator
-from access_cli_sealuzh.schema import *
+from access_cli_sealuzh.model import CourseModel
 
-def autodetect(args):
+# Seconds after which an execution is killed, unless the task configures a
+# timeout for the command type in [evaluator.timeout]
+DEFAULT_TIMEOUT = 30
+# Seconds after which the solve command is aborted
+SOLVE_TIMEOUT = 3
+
+# Arguments which callers constructing the arguments themselves (e.g., tests
+# using a SimpleNamespace) may omit, and the values they default to
+OPTIONAL_ARGUMENTS = {
+    "course_root": None,
+    "auto_detect": False,
+    "dump_model": None,
+    "courses": None,
+    "manifest": None,
+    "glob": None,
+    "jobs": 1,
+    "profile": False,
+    "profile_top": 10,
+    "trace": None,
+    "trace_format": "chrome",
+    "usage": False,
+    "report": None,
+    "history": None,
+    "calibrate": None,
+    "safety_factor": 3.0,
+    "write_timeouts": False,
+    "grade_variants": False,
+    "repeat": None,
+    "perturb": False,
+    "shard": None,
+    "shard_by_history": False,
+    "journal": None,
+    "resume": False,
+    "time_budget": None,
+    "changed_since": None,
+    "sample": None,
+    "seed": 0,
+    "rev": None,
+    "dedupe_files": False,
+    "file_store": None,
+}
+
+def with_defaults(args):
+    for name, value in OPTIONAL_ARGUMENTS.items():
+        if not hasattr(args, name):
+            setattr(args, name, value)
+    return args
+
+def traced(level):
+    """Record a span of category "subject" around validating a course,
+    assignment or task, named after the joined directory arguments"""
+    def decorator(function):
+        import functools
+        @functools.wraps(function)
+        def wrapper(self, *args, **kwargs):
+            parts = [a for a in [*args, *kwargs.values()] if a is not None]
+            with self.profiler.span(level, os.path.join(*parts), category="subject"):
+                return function(self, *args, **kwargs)
+        return wrapper
+    return decorator
+
+def autodetect(args, session=None):
     # if a directory has been specified, assume that's what we're validating
+    if session is not None:
+        fs = session.filesystem(args.directory)
+    else:
+        from access_cli_sealuzh.filesystem import open_filesystem
+        fs = open_filesystem(args.directory)
     config = AccessValidator.read_config(
-        os.path.join(args.directory, "config.toml"))
+        os.path.join(args.directory, "config.toml"), fs)
     # detect course config
     level = None
     if "visibility" in config:
@@ -30,12 +93,14 @@ def autodetect(args):
     if args.test_solution == None: args.test_solution = args.solve_command != None
     if args.grade_template == None: args.grade_template = True
     if args.grade_solution == None: args.grade_solution = args.solve_command != None
+    if getattr(args, "grade_variants", None) == None: args.grade_variants = True
     if args.recursive == None: args.recursive = True
     if args.run == None: args.run = 0
     if args.test == None: args.test = 1
 
     # set course root if not set manually
     if args.course_root == None:
+        from pathlib import Path
         if level == "course":
             course_config = config
             course_root = args.directory
@@ -45,13 +110,13 @@ def autodetect(args):
             elif level == "task":
                 course_root = Path(args.directory).absolute().parent.parent
             course_config_path = os.path.join(course_root, "config.toml")
-            if os.path.exists(course_config_path):
-                course_config = AccessValidator.read_config(course_config_path)
+            if fs.isfile(course_config_path):
+                course_config = AccessValidator.read_config(course_config_path, fs)
             else:
                 print(f"Given level {level}, assumed {course_config_path} would be the course config.toml, but it does not exist. You must set --course manually")
                 sys.exit(11)
 
-        args.global_file.update(set(course_config["global_files"]["grading"]))
+        args.global_file.update(set(course_config.get("global_files", {}).get("grading", [])))
         args.course_root = course_root
 
     if args.debug:
@@ -59,57 +124,215 @@ def autodetect(args):
         print(str(args)[len("Namespace("):-1])
     return args
 
+class Session:
+    """State which outlives a single AccessValidator: compiled schema
+    validators, parsed configs, the result of probing docker and the executor
+    with its pulled images and result cache. The daemon keeps one session for
+    its whole lifetime, batch runs share one session across all courses."""
+
+    def __init__(self, jobs=1):
+        from access_cli_sealuzh.executor import Executor
+        from access_cli_sealuzh.profiler import NullProfiler
+        self.validators = {}
+        self.configs = {}
+        self.docker_users = set()
+        self.profiler = NullProfiler()
+        self.executor = Executor(jobs, self.profiler)
+        # file systems of archives and revisions by path, see filesystem.py
+        self.filesystems = {}
+        # git repositories by path and the contents of their blobs read so
+        # far, shared by all revisions (see gitfs.py)
+        self.repositories = {}
+        self.blobs = None
+
+    def for_request(self, jobs=1):
+        """A session for one request to the daemon, sharing the compiled
+        schemas, parsed configs and docker probe of this one. It has its own
+        executor, which runs jobs commands in parallel and inspects images
+        anew, as they may have been pulled or rebuilt since the last request."""
+        session = Session(jobs)
+        session.validators = self.validators
+        session.configs = self.configs
+        session.docker_users = self.docker_users
+        return session
+
+    def enable_profiling(self):
+        """Record spans from now on, returning the profiler used so far"""
+        from access_cli_sealuzh.profiler import Profiler
+        previous = self.profiler
+        self.use_profiler(Profiler())
+        return previous
+
+    def use_profiler(self, profiler):
+        self.profiler = profiler
+        self.executor.profiler = profiler
+
+    def filesystem(self, directory):
+        """The file system containing directory: an archive or revision
+        mounted in this session (see filesystem.py and gitfs.py), or else
+        the disk. Archives are indexed once per session, unless they change."""
+        from access_cli_sealuzh.filesystem import ArchiveFS, LocalFS, archive_of
+        for fs in self.filesystems.values():
+            if fs.name(directory) is not None and fs.current():
+                return fs
+        archive = archive_of(directory)
+        if archive is None:
+            return LocalFS()
+        fs = self.filesystems[archive] = ArchiveFS(archive)
+        return fs
+
+    def check_docker(self, user):
+        if user in self.docker_users:
+            return True
+        import subprocess
+        try:
+            instructions = ["docker", "run", "--rm"]
+            if user is not None:
+                instructions.extend(["--user", user])
+            instructions.append("hello-world")
+            subprocess.check_output(instructions)
+        except subprocess.CalledProcessError:
+            return False
+        self.docker_users.add(user)
+        return True
+
 class AccessValidator:
 
-    def __init__(self, args):
-        self.args = args
+    def __init__(self, args, session=None):
+        self.args = with_defaults(args)
         self.logger = Logger()
-        self.v = Validator()
-        self.pp = pprint.PrettyPrinter(indent=2)
+        self.session = session if session is not None else Session()
+        self.validators = self.session.validators
+        self.profiler = self.session.profiler
+        self.fs = self.session.filesystem(self.args.directory)
+        # content-addressed store of the files copied into workspaces, see store.py
+        self.store = None
+        self.model = None
+        self.pipeline = None
+        # paths (in the model) of the tasks validated by this shard, if any
+        self.shard_tasks = None
+        # paths (in the model) of the tasks sampled to execute, if any
+        self.sampled_tasks = None
+        self.journal = None
+        # with a time budget, executions are held back until all static
+        # checks are done and then scheduled by value (see budget.py)
+        self.budget = None
+        self.deferred = None
+        # With shared staging, the files of a task are staged once and
+        # copied into the workspace of each execution (see staging.py)
+        self.shared_staging = False
+        self.stages = {}
+        self.stages_directory = None
+        self.stages_lock = threading.Lock()
 
     @staticmethod
-    def read_config(path):
-        with open(path, "rb") as f:
+    def read_config(path, fs=None):
+        import tomli
+        with (fs.open(path) if fs is not None else open(path, "rb")) as f:
             return tomli.load(f)
 
+    def schema_validator(self, name):
+        """Return the cerberus Validator for the named schema, built on first use"""
+        if name not in self.validators:
+            from cerberus import Validator
+            from access_cli_sealuzh import schema
+            self.validators[name] = Validator(getattr(schema, name))
+        return self.validators[name]
+
+    def normalize(self, v, config, subject):
+        """Validate config with v, returning the normalized config or None if
+        it does not conform to the schema (see v.errors)"""
+        with self.profiler.span("schema", subject):
+            if not v.validate(config):
+                return None
+            return v.normalized(config)
+
+    def pformat(self, errors):
+        import pprint
+        return pprint.PrettyPrinter(indent=2).pformat(errors)
+
     def read_directory_config(self, directory):
-        if not os.path.isdir(directory):
+        if not self.fs.isdir(directory):
             self.logger.error(f"config directory {directory} is not a directory")
         path = os.path.join(directory, "config.toml")
-        if not os.path.isfile(path):
+        if not self.fs.isfile(path):
             self.logger.error(f"{path} does not exist or is not a file")
             raise FileNotFoundError
-        return path, self.read_config(path)
+        if self.model is not None:
+            return path, self.model.config(directory)
+        return path, self.read_config(path, self.fs)
 
+    @traced("course")
     def validate_course(self, course):
         self.print(f" > Validating course {course}", True)
         self.logger.set_subject(course)
         try: path, config = self.read_directory_config(course)
         except FileNotFoundError: return
         # schema validation
-        if not self.v.validate(config, course_schema):
-            self.logger.error(f"{path} schema errors:\n\t{self.pp.pformat(self.v.errors)}")
+        v = self.schema_validator("course_schema")
+        normalized = self.normalize(v, config, course)
+        if normalized is None:
+            self.logger.error(f"{path} schema errors:\n\t{self.pformat(v.errors)}")
             return
-        config = self.v.normalized(config, course_schema)
+        config = normalized
         self.logger.update_subject(f'{course} ({config["slug"]})')
+        if self.checks_structure():
+            self.check_course(course, path, config)
+        self.report_static_errors()
+        # Check assignments if recursive
+        if self.args.recursive:
+            if "assignments" in config:
+                for assignment in config["assignments"]:
+                    self.validate_assignment(course, assignment)
+            if "examples" in config:
+                for example in config["examples"]:
+                    self.validate_task(course_dir=course, assignment_dir=None, task_dir=example)
+
+    @traced("assignment")
+    def validate_assignment(self, course_dir=None, assignment_dir=None):
+        if course_dir == None:
+            assignment = assignment_dir
+        else:
+            assignment = os.path.join(course_dir, assignment_dir)
+        self.print(f" > Validating assignment {assignment}", True)
+        self.logger.set_subject(assignment)
+        try: path, config = self.read_directory_config(assignment)
+        except FileNotFoundError: return
+        # schema validation
+        v = self.schema_validator("assignment_schema")
+        normalized = self.normalize(v, config, assignment)
+        if normalized is None:
+            self.logger.error(f"{path} schema errors:\n\t{self.pformat(v.errors)}")
+            return
+        config = normalized
+        self.logger.update_subject(f'{assignment} ({config["slug"]})')
+        if self.checks_structure():
+            self.check_assignment(assignment, path, config)
+        self.report_static_errors()
+        # Check tasks if recursive
+        if self.args.recursive:
+            for task in config["tasks"]:
+                self.validate_task(course_dir, assignment_dir, task)
+
+    def check_course(self, course, path, config):
         # MANUALLY CHECK:
         # - if referenced icon exists
         if "logo" in config:
             name = config["logo"]
-            if not os.path.isfile(os.path.join(course, name)):
+            if not self.fs.isfile(os.path.join(course, name)):
                 self.logger.error(f"{path} references non-existing logo: {name}")
         # - if referenced assignments exist and contain config.toml
         for name in config["assignments"]:
-            if not os.path.isdir(os.path.join(course, name)):
+            if not self.fs.isdir(os.path.join(course, name)):
                 self.logger.error(f"{path} references non-existing assignment: {name}")
-            elif not os.path.isfile(os.path.join(course, name, "config.toml")):
+            elif not self.fs.isfile(os.path.join(course, name, "config.toml")):
                 self.logger.error(f"{path} references assignment without config.toml: {name}")
         # - if referenced examples exist and contain config.toml
         if "examples" in config:
             for name in config["examples"]:
-                if not os.path.isdir(os.path.join(course, name)):
+                if not self.fs.isdir(os.path.join(course, name)):
                     self.logger.error(f"{path} references non-existing example: {name}")
-                elif not os.path.isfile(os.path.join(course, name, "config.toml")):
+                elif not self.fs.isfile(os.path.join(course, name, "config.toml")):
                     self.logger.error(f"{path} references example without config.toml: {name}")
         # - if override start is before override end
         if "override_start" in config["visibility"] and "override_end" in config["visibility"]:
@@ -120,45 +343,24 @@ class AccessValidator:
             self.logger.error(f"{path} is missing information for language 'en'")
         # - if information conforms to information_schema
         else:
+            v = self.schema_validator("course_information_schema")
             for name, info in config["information"].items():
-                if not self.v.validate(info, course_information_schema):
-                    self.logger.error(f"{path}.{name} information schema errors: {self.pp.pformat(self.v.errors)}")
+                if not v.validate(info):
+                    self.logger.error(f"{path}.{name} information schema errors: {self.pformat(v.errors)}")
         # - if each file in global_files actually exists
         if "global_files" in config:
             for context, files in config["global_files"].items():
                 for file in files:
-                    if not os.path.isfile(os.path.join(course, file)):
+                    if not self.fs.isfile(os.path.join(course, file)):
                         self.logger.error(f"{path} global files references non-existing file: {file}")
-        # Check assignments if recursive
-        if self.args.recursive:
-            if "assignments" in config:
-                for assignment in config["assignments"]:
-                    self.validate_assignment(course, assignment)
-            if "examples" in config:
-                for example in config["examples"]:
-                    self.validate_task(course_dir=course, assignment_dir=None, task_dir=example)
 
-    def validate_assignment(self, course_dir=None, assignment_dir=None):
-        if course_dir == None:
-            assignment = assignment_dir
-        else:
-            assignment = os.path.join(course_dir, assignment_dir)
-        self.print(f" > Validating assignment {assignment}", True)
-        self.logger.set_subject(assignment)
-        try: path, config = self.read_directory_config(assignment)
-        except FileNotFoundError: return
-        # schema validation
-        if not self.v.validate(config, assignment_schema):
-            self.logger.error(f"{path} schema errors:\n\t{self.pp.pformat(self.v.errors)}")
-            return
-        config = self.v.normalized(config, assignment_schema)
-        self.logger.update_subject(f'{assignment} ({config["slug"]})')
+    def check_assignment(self, assignment, path, config):
         # MANUALLY CHECK:
         # - if referenced task exist and contain config.toml
         for name in config["tasks"]:
-            if not os.path.isdir(os.path.join(assignment, name)):
+            if not self.fs.isdir(os.path.join(assignment, name)):
                 self.logger.error(f"{path} references non-existing task: {name}")
-            elif not os.path.isfile(os.path.join(assignment, name, "config.toml")):
+            elif not self.fs.isfile(os.path.join(assignment, name, "config.toml")):
                 self.logger.error(f"{path} references task without config.toml: {name}")
         # - if start is before end
         if "end" in config and config["start"] >= config["end"]:
@@ -168,14 +370,17 @@ class AccessValidator:
             self.logger.error(f"{path} is missing information for language 'en'")
         # - if information conforms to information_schema
         else:
+            v = self.schema_validator("assignment_information_schema")
             for name, info in config["information"].items():
-                if not self.v.validate(info, assignment_information_schema):
-                    self.logger.error(f"{path}.{name} information schema errors: {self.pp.pformat(self.v.errors)}")
-        # Check tasks if recursive
-        if self.args.recursive:
-            for task in config["tasks"]:
-                self.validate_task(course_dir, assignment_dir, task)
+                if not v.validate(info):
+                    self.logger.error(f"{path}.{name} information schema errors: {self.pformat(v.errors)}")
+
+    def checks_structure(self):
+        """Whether to check course and assignment configs, which only the
+        first shard does (see sharding.py)"""
+        return self.args.shard is None or self.args.shard[0] == 1
 
+    @traced("task")
     def validate_task(self, course_dir=None, assignment_dir=None, task_dir=None):
         if course_dir is None and assignment_dir is None:
             task = task_dir
@@ -185,15 +390,25 @@ class AccessValidator:
             task = os.path.join(course_dir, task_dir)
         else:
             task = os.path.join(course_dir, assignment_dir, task_dir)
+        if self.shard_tasks is not None and self.model.relpath(task) not in self.shard_tasks:
+            return
+        if self.journal is not None:
+            self.journal.validate(self, task)
+        else:
+            self.check_task(task)
+
+    def check_task(self, task):
         self.print(f" > Validating task {task}", True)
         self.logger.set_subject(task)
         try: path, config = self.read_directory_config(task)
         except FileNotFoundError: return
         # schema validation
-        if not self.v.validate(config, task_schema):
-            self.logger.error(f"{path} schema errors:\n\t{self.pp.pformat(self.v.errors)}")
+        v = self.schema_validator("task_schema")
+        normalized = self.normalize(v, config, task)
+        if normalized is None:
+            self.logger.error(f"{path} schema errors:\n\t{self.pformat(v.errors)}")
             return
-        config = self.v.normalized(config, task_schema)
+        config = normalized
         self.logger.update_subject(f'{task} ({config["slug"]})')
         # MANUALLY CHECK:
         # - if at least "en" information is given (restriction to be lifted later)
@@ -201,13 +416,14 @@ class AccessValidator:
             self.logger.error(f"{path} is missing information for language 'en'")
         # - if information conforms to information_schema
         else:
+            v = self.schema_validator("task_information_schema")
             for name, info in config["information"].items():
-                if not self.v.validate(info, task_information_schema):
-                    self.logger.error(f"{path} {name} information schema errors: {self.pp.pformat(self.v.errors)}")
+                if not v.validate(info):
+                    self.logger.error(f"{path} {name} information schema errors: {self.pformat(v.errors)}")
                 # - if referenced instructions_file exists
                 if "instructions_file" in info:
                     instructions_file = info["instructions_file"]
-                    if not os.path.isfile(os.path.join(task, instructions_file)):
+                    if not self.fs.isfile(os.path.join(task, instructions_file)):
                         self.logger.error(f"{path} {name} references non-existing {instructions_file}")
         # - if each file in files actually exists
         for context, files in config["files"].items():
@@ -215,7 +431,7 @@ class AccessValidator:
             if context == "persist":
                 continue
             for file in files:
-                if not os.path.isfile(os.path.join(task, file)):
+                if not self.fs.isfile(os.path.join(task, file)):
                     self.logger.error(f"{path} files references non-existing file: {file}")
         if "grade_command" not in config["evaluator"]:
             self.logger.error(f"{path} missing grade_command")
@@ -234,57 +450,257 @@ class AccessValidator:
         if file in config["files"]["editable"]:
             if file not in config["files"]["visible"]:
                 self.logger.error(f"{path} invisible file {file} marked as editable")
+        # - that variants are unique, solvable, exist and within max_points
+        names = set()
+        for variant in config.get("variants", []):
+            name = variant["name"]
+            if name in names:
+                self.logger.error(f"{path} variant {name} defined more than once")
+            names.add(name)
+            if "solve_command" not in variant and "directory" not in variant:
+                self.logger.error(f"{path} variant {name} has neither solve_command nor directory")
+            if "directory" in variant and not self.fs.isdir(os.path.join(task, variant["directory"])):
+                self.logger.error(f"{path} variant {name} references non-existing directory {variant['directory']}")
+            if variant["points"] > config["max_points"]:
+                self.logger.error(f"{path} variant {name} expects more than max_points")
+        self.report_static_errors()
         # - OPTIONALLY: that the run, test and grade commands execute correctly
+        #   (only for tasks which passed the static checks)
+        if self.logger.results[self.logger.current_subject]:
+            if self.executes():
+                self.print(f" > Skipping executions for {task} due to errors", True)
+            return
+        if self.sampled_tasks is not None and self.model.relpath(task) not in self.sampled_tasks:
+            self.print(f" > Skipping executions for {task}, not sampled")
+            return
         if type(self.args.run) == int and "run_command" in config["evaluator"]:
-            self.execute_command(task, config, "run_command", self.args.run)
+            self.schedule(self.execute_command, task, config, "run_command", self.args.run)
         if type(self.args.test) == int and "test_command" in config["evaluator"]:
-            self.execute_command(task, config, "test_command", self.args.test)
+            self.schedule(self.execute_command, task, config, "test_command", self.args.test)
         if self.args.test_solution and "test_command" in config["evaluator"]:
-            self.execute_command(task, config, "test_command", 0, solve_command=self.args.solve_command)
+            self.schedule(self.execute_command, task, config, "test_command", 0, solve_command=self.args.solve_command)
         if self.args.grade_template:
-            self.execute_grade_command(task, config, 0)
+            self.schedule(self.execute_grade_command, task, config, 0)
         if self.args.grade_solution:
-            self.execute_grade_command(task, config, config["max_points"], self.args.solve_command)
+            self.schedule(self.execute_grade_command, task, config, config["max_points"], self.args.solve_command)
+        if self.args.grade_variants:
+            for variant in config.get("variants", []):
+                self.schedule(self.execute_variant, task, config, variant)
+
+    def restore_task(self, entry):
+        """Restore the results of a task from the journal (see journal.py)"""
+        self.print(f" > Restoring task {entry['subject']} from journal", True)
+        self.logger.set_subject(entry["subject"])
+        for message in entry["static"]:
+            self.logger.error(message)
+        self.report_static_errors()
+        if self.pipeline is not None and (entry["errors"] or entry["executions"]):
+            from access_cli_sealuzh.pipeline import Job
+            self.pipeline.put(Job(entry["subject"], self.restore_executions, entry))
+
+    def restore_executions(self, entry):
+        job = self.pipeline.current_job()
+        job.errors.extend(entry["errors"])
+        job.executions.extend(entry["executions"])
+
+    def schedule(self, function, *args, **kwargs):
+        """Enqueue an execution for the current subject (--repeat times), or
+        run it right away if there is no pipeline (i.e., when not called
+        through run())"""
+        if self.pipeline is None:
+            function(*args, **kwargs)
+            return
+        from access_cli_sealuzh.pipeline import Job
+        for _ in range(self.args.repeat or 1):
+            job = Job(self.logger.current_subject, function, *args, **kwargs)
+            if self.deferred is not None:
+                self.deferred.append(job)
+            else:
+                self.pipeline.put(job)
+
+    def check_of(self, job):
+        """(name, command type, whether on the solution) of the check
+        performed by a job scheduled by check_task"""
+        function, args, kwargs = job.function, job.args, job.kwargs
+        if function == self.execute_variant:
+            variant = args[2]
+            return (f"grade_command on variant {variant['name']}", "grade_command",
+                    "solve_command" in variant)
+        if function == self.execute_grade_command:
+            solution = len(args) > 3 or "solve_command" in kwargs
+            return (f"grade_command on {'solution' if solution else 'template'}",
+                    "grade_command", solution)
+        command_type = args[2]
+        solution = "solve_command" in kwargs
+        return (f"{command_type}{' on solution' if solution else ''}", command_type, solution)
+
+    def schedule_by_value(self):
+        """Enqueue the held back executions by decreasing value and
+        increasing estimated cost, see budget.py"""
+        from access_cli_sealuzh.budget import task_files
+        from access_cli_sealuzh.pipeline import Job
+        values = {}
+        ranked = []
+        for index, job in enumerate(self.deferred):
+            task = job.args[0]
+            if task not in values:
+                files = task_files(task, self.fs)
+                node = self.model.node(task)
+                if node is not None:
+                    files += [os.path.join(self.model.root, file)
+                              for file in self.model.files_of(node["path"])]
+                values[task] = self.budget.value(task, [os.path.abspath(file) for file in files])
+            name, command_type, solution = self.check_of(job)
+            cost = self.budget.estimate(task, command_type, solution)
+            ranked.append((-values[task], cost, index, job, name))
+        self.deferred = None
+        for _, cost, _, job, name in sorted(ranked, key=lambda item: item[:3]):
+            self.pipeline.put(Job(job.subject, self.run_within_budget, name, cost,
+                                  job.function, *job.args, **job.kwargs))
+
+    def run_within_budget(self, name, cost, function, *args, **kwargs):
+        """Run an execution unless its estimated cost exceeds the time left"""
+        if not self.budget.allows(cost):
+            job = self.pipeline.current_job()
+            job.skipped = {"subject": job.subject, "check": name, "estimate": round(cost, 3)}
+            return
+        function(*args, **kwargs)
+
+    def report_static_errors(self):
+        """While executions are running in the background, print static errors
+        right away instead of only in the final summary"""
+        if self.pipeline is not None:
+            for message in self.logger.results[self.logger.current_subject]:
+                print(f" ✗ {message}")
+
+    def error(self, message):
+        """Record an error of the current subject, or of the current job if
+        called from an execution running in the pipeline"""
+        job = self.pipeline.current_job() if self.pipeline is not None else None
+        if job is not None:
+            job.errors.append(message)
+        else:
+            self.logger.error(message)
+
+    def record_execution(self, task, docker_image, command_type, command, solve_command, result, submission=None, variant=None):
+        """Record an execution for structured reports, in the current job if
+        called from the pipeline"""
+        execution = {"subject": os.path.normpath(task), "command_type": command_type,
+            "solution": solve_command is not None, "solve_command": solve_command,
+            "submission": submission, "variant": variant,
+            "docker_image": docker_image, "command": command,
+            "returncode": result.returncode, "timed_out": result.timed_out,
+            "cached": result.cached, "usage": result.usage,
+            "points": (result.grade_results or {}).get("points")}
+        job = self.pipeline.current_job() if self.pipeline is not None else None
+        if job is not None:
+            job.executions.append(execution)
+        else:
+            self.logger.executions.append(execution)
+        return execution
 
     def execute_grade_command(self, task, config, expected_points, solve_command=None):
         grade_results = self.execute_command(task, config, "grade_command", solve_command=solve_command)
         if grade_results == None:
-            self.logger.error(f"{task} grading did not produce grade_results.json")
+            self.error(f"{task} grading did not produce grade_results.json")
         elif grade_results["points"] != expected_points:
             for_version = "template" if expected_points == 0 else "solution"
-            self.logger.error(f"{task} {for_version}: {grade_results['points']} points awarded instead of expected {expected_points}")
+            self.error(f"{task} {for_version}: {grade_results['points']} points awarded instead of expected {expected_points}")
+
+    def execute_variant(self, task, config, variant):
+        """Grade a solution variant and expect its points to be awarded. All
+        variants of a task share one stage, as they are graded concurrently."""
+        submission = None
+        if "directory" in variant:
+            submission = os.path.join(task, variant["directory"])
+        grade_results = self.execute_command(task, config, "grade_command",
+            solve_command=variant.get("solve_command"), submission=submission, shared=True,
+            variant=variant["name"])
+        if grade_results == None:
+            self.error(f"{task} variant {variant['name']}: grading did not produce grade_results.json")
+        elif grade_results["points"] != variant["points"]:
+            self.error(f"{task} variant {variant['name']}: {grade_results['points']} points awarded instead of expected {variant['points']}")
 
-    def copy_file(self, task, file_path, workspace):
+    def copy_file(self, task, file_path, workspace, dedupe=False):
+        """Copy a file of task into workspace, from the file store if there is
+        one and dedupe is set"""
         abs_root = os.path.abspath(task)
         abs_file = os.path.join(abs_root, file_path)
-        if not os.path.exists(abs_file):
-            self.logger.error(f"referenced file {file_path} does not exist")
+        if not self.fs.exists(abs_file):
+            self.error(f"referenced file {file_path} does not exist")
             return
-        os.makedirs(os.path.join(workspace, os.path.dirname(file_path)), exist_ok=True)
-        shutil.copyfile(abs_file, os.path.join(workspace, file_path))
+        target = os.path.join(workspace, file_path)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        # replace rather than write to a file staged before (e.g. from a stage)
+        if os.path.lexists(target):
+            os.remove(target)
+        if dedupe and self.store is not None:
+            self.store.copy(abs_file, self.fs, target)
+        else:
+            self.fs.copy(abs_file, target)
+
+    def stage_files(self, task, config, command_type, workspace):
+        # Copy task to a temporary directory for execution. Only editable
+        # files are replaced by solutions and submissions, the others can be
+        # copied from the file store.
+        editable = config["files"]["editable"]
+        for file in config["files"]["visible"]:
+            self.copy_file(task, file, workspace, dedupe=file not in editable)
+        # If grading, also copy necessary files
+        if command_type == "grade_command":
+            for file in config["files"]["grading"]:
+                self.copy_file(task, file, workspace, dedupe=True)
+            # Copy global files, once (and also for tasks without grading
+            # files of their own)
+            for file in self.args.global_file:
+                course_root = self.args.course_root
+                self.copy_file(os.path.abspath(course_root), file, workspace, dedupe=True)
 
-    def execute_command(self, task, config, command_type, expected_returncode=None, solve_command=None):
+    def stage(self, task, config, command_type):
+        """The files of task staged once for all executions of command_type,
+        see staging.py"""
+        from access_cli_sealuzh.staging import Stage
+        key = (os.path.abspath(task), command_type == "grade_command")
+        with self.stages_lock:
+            if key not in self.stages:
+                import tempfile
+                if self.stages_directory is None:
+                    self.stages_directory = tempfile.TemporaryDirectory()
+                directory = tempfile.mkdtemp(dir=self.stages_directory.name)
+                self.stage_files(task, config, command_type, directory)
+                self.stages[key] = Stage(directory)
+            return self.stages[key]
+
+    def remove_stages(self):
+        if self.stages_directory is not None:
+            self.stages_directory.cleanup()
+            self.stages_directory = None
+        self.stages = {}
+
+    def execute_command(self, task, config, command_type, expected_returncode=None, solve_command=None, submission=None, shared=False, variant=None):
         docker_image = config["evaluator"]["docker_image"]
         if command_type not in config["evaluator"]:
-            print(f"{command_type} command not specified in config, skipping...")
+            self.print(f"{command_type} command not specified in config, skipping...", True)
             return
         command = config["evaluator"][command_type]
-        with tempfile.TemporaryDirectory() as workspace:
-            # Copy task to a temporary directory for execution
-            for file in config["files"]["visible"]:
-                self.copy_file(task, file, workspace)
-            # If grading, also copy necessary files
-            if command_type == "grade_command":
-                for file in config["files"]["grading"]:
-                    self.copy_file(task, file, workspace)
-                    # Copy global files
-                    for file in self.args.global_file:
-                        course_root = self.args.course_root
-                        self.copy_file(os.path.abspath(course_root), file, workspace)
-            # If grading solution, copy solution files, too
-            if solve_command != None:
-                for file in config["files"]["solution"]:
-                    self.copy_file(task, file, workspace)
+        import subprocess
+        with self.profiler.span("execution", task, command_type, category="subject"), \
+             self.workspace(task, command_type) as workspace:
+            with self.profiler.span("staging", task, command_type):
+                if shared or self.shared_staging:
+                    self.stage(task, config, command_type).populate(workspace)
+                else:
+                    self.stage_files(task, config, command_type, workspace)
+                # If grading solution, copy solution files, too
+                if solve_command != None:
+                    for file in config["files"]["solution"]:
+                        self.copy_file(task, file, workspace)
+                # If executing a submission, copy the editable files it contains
+                # over those of the template
+                if submission is not None:
+                    for file in config["files"]["editable"]:
+                        if self.fs.isfile(os.path.join(submission, file)):
+                            self.copy_file(submission, file, workspace)
             header = []
 
             if solve_command:
@@ -300,53 +716,56 @@ class AccessValidator:
             self.print(     "├──"+ "─"*header_len +"──╯")
 
             if solve_command:
-                subprocess.run(solve_command, timeout=3, cwd=workspace, shell=True)
-
-            # In case docker stalls, we need the container ID to kill it afterwards
-            cid_file = os.path.join(workspace, '.cid')
-            try:
-                # Run the task command in docker
-                instruction = [
-                   "docker", "run", "--rm",
-                   "--cidfile", cid_file,
-                   "--network", "none",
-                   "-v", f"{workspace}:/workspace", "-w", "/workspace",
-                   docker_image,
-                   *command.split()
-                ]
-                # Windows doesn't have os.getuid(), so we only use it otherwise
-                if self.args.user is not None:
-                    instruction.insert(3, "--user")
-                    instruction.insert(4, self.args.user)
-                result = subprocess.run(instruction, capture_output=True, timeout=30)
-                # Print results
-                self.print_command_result(
-                    docker_image, command_type, command,
-                    result.returncode,
-                    result.stdout.decode("utf-8"),
-                    result.stderr.decode("utf-8")
-                )
-                self.print(f"╰────" + "─" * header_len)
-                # Check return codes
-                if expected_returncode != None:
-                    if expected_returncode != result.returncode:
-                        if solve_command != None:
-                            self.logger.error(f"{task} {command} ({command_type} on solution): Expected returncode {expected_returncode} but got {result.returncode}")
-                        else:
-                            self.logger.error(f"{task} {command} ({command_type}): Expected returncode {expected_returncode} but got {result.returncode}")
-                if os.path.isfile(os.path.join(workspace, "grade_results.json")):
-                    with open(os.path.join(workspace, "grade_results.json")) as grade_result:
-                        return json.load(grade_result)
-            except subprocess.TimeoutExpired:
-                with open(cid_file) as cidf:
-                    cid = cidf.read()
-                    self.logger.error(f"{task} {command}: Timeout during executiong (infinite loop?)")
-                    self.print(f"killing container {cid}")
-                    result = subprocess.run(["docker", "kill", cid], capture_output=True)
-
-    def print_command_result(self, docker_image, command_type, command, returncode, stdout, stderr):
+                with self.profiler.span("solve", task, command_type):
+                    subprocess.run(solve_command, timeout=SOLVE_TIMEOUT, cwd=workspace, shell=True)
+
+            # Run the task command in docker
+            timeout = config["evaluator"].get("timeout", {}).get(command_type, DEFAULT_TIMEOUT)
+            options = ()
+            if self.args.perturb:
+                from access_cli_sealuzh.repeat import perturbation
+                options = perturbation()
+            result = self.session.executor.run(workspace, docker_image, command,
+                self.args.user, timeout=timeout, subject=task, command_type=command_type,
+                usage=self.args.usage, options=options)
+            self.record_execution(task, docker_image, command_type, command,
+                                  solve_command, result, submission, variant)
+            if result.timed_out:
+                self.error(f"{task} {command}: Timeout during execution (infinite loop?)")
+                self.print(f"killed container {result.cid}")
+                return
+            # Print results
+            self.print_command_result(
+                docker_image, command_type, command,
+                result.returncode, result.stdout, result.stderr, result.usage
+            )
+            self.print(f"╰────" + "─" * header_len)
+            # Check return codes
+            if expected_returncode != None:
+                if expected_returncode != result.returncode:
+                    if solve_command != None:
+                        self.error(f"{task} {command} ({command_type} on solution): Expected returncode {expected_returncode} but got {result.returncode}")
+                    else:
+                        self.error(f"{task} {command} ({command_type}): Expected returncode {expected_returncode} but got {result.returncode}")
+            return result.grade_results
+
+    @contextlib.contextmanager
+    def workspace(self, task, command_type):
+        """Temporary directory for an execution, timing its removal"""
+        import tempfile
+        directory = tempfile.TemporaryDirectory()
+        try:
+            yield directory.name
+        finally:
+            with self.profiler.span("teardown", task, command_type):
+                directory.cleanup()
+
+    def print_command_result(self, docker_image, command_type, command, returncode, stdout, stderr, usage=None):
         self.print(f"│{command} ")
         self.print(f"├─────╼ return code: {returncode }")
+        if usage:
+            from access_cli_sealuzh.executor import format_usage
+            self.print(f"├─────╼ usage: {format_usage(usage)}")
         self.print(f"├─────╼ stdout:")
         for line in stdout.splitlines(): self.print(f"│{line}")
         self.print(f"├─────╼ stderr:")
@@ -354,12 +773,107 @@ class AccessValidator:
 
     def print(self, string, verbose=False):
         if self.args.verbose or verbose:
-            print(string)
+            job = self.pipeline.current_job() if self.pipeline is not None else None
+            if job is not None:
+                job.output.append(string)
+            else:
+                print(string)
+
+    def build_model(self):
+        return CourseModel.build(self.args.directory, self.args.level,
+            self.args.global_file, self.args.course_root,
+            cache=self.session.configs, profiler=self.profiler, fs=self.fs)
+
+    def executes(self):
+        """Whether any commands will be executed in docker"""
+        return bool(type(self.args.run) == int or type(self.args.test) == int or
+            self.args.test_solution or self.args.grade_template or
+            self.args.grade_solution or self.args.grade_variants)
+
+    def plan_shard(self):
+        from access_cli_sealuzh.sharding import partition, task_costs
+        index, count = self.args.shard
+        costs = task_costs(self.model, self.args.history if self.args.shard_by_history else None)
+        tasks, loads = partition(costs, count)
+        self.shard_tasks = set(tasks[index - 1])
+        self.logger.partition = {"tasks": sorted(tasks[index - 1]), "course_tasks": sorted(costs)}
+        self.print(f" > Shard {index}/{count}: {len(tasks[index - 1])} of {len(costs)} tasks "
+                   f"(estimated cost {loads[index - 1]:.1f} of {sum(loads):.1f})", True)
+
+    def plan_sample(self):
+        from access_cli_sealuzh.sampling import sample_tasks
+        self.sampled_tasks = sample_tasks(self.model, self.args.sample, self.args.seed,
+                                          self.shard_tasks)
+        count = len([node for node in self.model.tasks()
+                     if self.shard_tasks is None or node["path"] in self.shard_tasks])
+        self.print(f" > Sample (seed {self.args.seed}): executing {len(self.sampled_tasks)} "
+                   f"of {count} tasks", True)
+
+    def plan_budget(self):
+        from access_cli_sealuzh.budget import Budget, changed_files
+        changed = None
+        if self.args.changed_since:
+            changed = changed_files(self.args.directory, self.args.changed_since)
+            if changed is None:
+                print(f"Could not determine the files changed since {self.args.changed_since}, "
+                      "using their modification times instead")
+        self.budget = Budget(self.args.time_budget, self.args.history, changed)
+        self.deferred = []
 
     def run(self):
-        match self.args.level:
-            case "course": self.validate_course(self.args.directory)
-            case "assignment": self.validate_assignment(assignment_dir = self.args.directory)
-            case "task": self.validate_task(task_dir = self.args.directory)
+        self.model = self.build_model()
+        if self.args.shard:
+            self.plan_shard()
+        if self.args.journal:
+            from access_cli_sealuzh.journal import Journal
+            self.journal = Journal(self.args.journal, self.args.resume)
+        if self.args.sample and self.executes():
+            self.plan_sample()
+        if self.args.time_budget and self.executes():
+            self.plan_budget()
+        if (self.args.dedupe_files or self.args.file_store) and self.executes():
+            import tempfile
+            from access_cli_sealuzh.store import FileStore
+            from access_cli_sealuzh.staging import can_clone
+            self.store = FileStore(self.args.file_store)
+            # workspaces are created in the temporary directory
+            if not can_clone(self.store.objects_directory(), tempfile.gettempdir()):
+                self.print(f"Not deduplicating files: {self.store.directory} and the temporary "
+                           f"directory are not on one file system supporting reflinks", verbose=True)
+                self.store.close()
+                self.store = None
+        if self.executes():
+            from access_cli_sealuzh.pipeline import Pipeline
+            executor = self.session.executor
+            executor.pull(self.model.images(self.sampled_tasks if self.sampled_tasks is not None
+                                            else self.shard_tasks))
+            done = self.journal.job_done if self.journal is not None else None
+            self.pipeline = Pipeline(executor.get_pool(), executor.jobs, done=done, retain=True)
+            self.pipeline.start()
+        try:
+            match self.args.level:
+                case "course": self.validate_course(self.args.directory)
+                case "assignment": self.validate_assignment(assignment_dir = self.args.directory)
+                case "task": self.validate_task(task_dir = self.args.directory)
+            if self.deferred is not None:
+                self.schedule_by_value()
+        finally:
+            if self.pipeline is not None:
+                jobs = self.pipeline.finish()
+                self.pipeline = None
+                # record execution errors in a deterministic order
+                for job in jobs:
+                    for message in job.errors:
+                        self.logger.error(message, job.subject)
+                    self.logger.executions.extend(job.executions)
+                    if getattr(job, "skipped", None):
+                        self.logger.skipped.append(job.skipped)
+            self.remove_stages()
+            if self.store is not None:
+                self.store.close()
+                self.store = None
+            if self.journal is not None:
+                self.journal.close()
+                self.journal = None
         return self.logger
 
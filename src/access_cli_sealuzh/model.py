@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+
+# The course model is an explicit, serializable representation of a course's
+# structure. Nodes are the course, its assignments, tasks and examples. Edges
+# record which task consumes which file (including global course files) in
+# which context. The model is built once per run and shared by all checks.
+
+import os
+
+def as_list(value):
+    # configs are only schema-validated later, so tolerate malformed entries
+    return value if isinstance(value, list) else []
+
+def as_dict(value):
+    return value if isinstance(value, dict) else {}
+
+class CourseModel:
+
+    def __init__(self, root, cache=None, profiler=None, fs=None):
+        self.root = os.path.abspath(root)
+        self.nodes = {}
+        self.edges = []
+        # Parsed config.toml files by absolute directory. Not serialized.
+        self.configs = {}
+        # Optional cache of parsed configs shared across models, keyed by
+        # path and validated against the file's modification time and size
+        self.cache = cache
+        if profiler is None:
+            from access_cli_sealuzh.profiler import NullProfiler
+            profiler = NullProfiler()
+        self.profiler = profiler
+        # where configs are read from, see filesystem.py
+        if fs is None:
+            from access_cli_sealuzh.filesystem import LocalFS
+            fs = LocalFS()
+        self.fs = fs
+
+    @classmethod
+    def build(cls, directory, level, global_files=(), course_root=None,
+              cache=None, profiler=None, fs=None):
+        model = cls(directory, cache, profiler, fs)
+        if course_root is not None:
+            global_files = [model.relpath(os.path.join(course_root, f))
+                            for f in global_files]
+        else:
+            global_files = [os.path.normpath(f) for f in global_files]
+        match level:
+            case "course": model.add_course(directory, global_files)
+            case "assignment": model.add_assignment(directory, None, global_files)
+            case "task": model.add_task(directory, None, "task", global_files)
+        return model
+
+    @classmethod
+    def load(cls, path):
+        import json
+        with open(path) as f:
+            data = json.load(f)
+        model = cls(data["root"])
+        model.nodes = data["nodes"]
+        model.edges = data["edges"]
+        return model
+
+    def save(self, path):
+        import json
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    def to_dict(self):
+        return {"root": self.root, "nodes": self.nodes, "edges": self.edges}
+
+    def node(self, directory):
+        return self.nodes.get(self.relpath(directory))
+
+    def relpath(self, path):
+        return os.path.normpath(os.path.relpath(os.path.abspath(path), self.root))
+
+    def config(self, directory):
+        """Return the parsed config.toml of directory, reading it if necessary"""
+        directory = os.path.abspath(directory)
+        if directory not in self.configs:
+            path = os.path.join(directory, "config.toml")
+            if self.cache is not None:
+                key = self.fs.stat_key(path)
+                if path in self.cache and self.cache[path][0] == key:
+                    self.configs[directory] = self.cache[path][1]
+                    return self.configs[directory]
+            import tomli
+            with self.profiler.span("read_config", os.path.relpath(directory)):
+                with self.fs.open(path) as f:
+                    self.configs[directory] = tomli.load(f)
+            if self.cache is not None:
+                self.cache[path] = (key, self.configs[directory])
+        return self.configs[directory]
+
+    def try_config(self, directory):
+        import tomli
+        try: return self.config(directory)
+        except (OSError, tomli.TOMLDecodeError): return None
+
+    def add_node(self, directory, kind, parent, config):
+        node_id = self.relpath(directory)
+        self.nodes[node_id] = {
+            "kind": kind,
+            "path": node_id,
+            "slug": config.get("slug"),
+            "parent": parent,
+            "children": [],
+        }
+        if parent is not None:
+            self.nodes[parent]["children"].append(node_id)
+        return self.nodes[node_id]
+
+    def add_course(self, course, global_files):
+        config = self.try_config(course)
+        if config is None: return
+        node = self.add_node(course, "course", None, config)
+        node["global_files"] = {context: [os.path.normpath(f) for f in as_list(files)]
+            for context, files in as_dict(config.get("global_files")).items()}
+        global_files = set(global_files).union(node["global_files"].get("grading", []))
+        for name in as_list(config.get("assignments")):
+            self.add_assignment(os.path.join(course, name), node["path"], global_files)
+        for name in as_list(config.get("examples")):
+            self.add_task(os.path.join(course, name), node["path"], "example", global_files)
+
+    def add_assignment(self, assignment, parent, global_files):
+        config = self.try_config(assignment)
+        if config is None: return
+        node = self.add_node(assignment, "assignment", parent, config)
+        for name in as_list(config.get("tasks")):
+            self.add_task(os.path.join(assignment, name), node["path"], "task", global_files)
+
+    def add_task(self, task, parent, kind, global_files):
+        config = self.try_config(task)
+        if config is None: return
+        node = self.add_node(task, kind, parent, config)
+        evaluator = as_dict(config.get("evaluator"))
+        node["docker_image"] = evaluator.get("docker_image")
+        node["commands"] = {command_type: evaluator[command_type]
+            for command_type in ["run_command", "test_command", "grade_command"]
+            if command_type in evaluator}
+        node["max_points"] = config.get("max_points", 1)
+        node["files"] = {}
+        for context, files in as_dict(config.get("files")).items():
+            files = as_list(files)
+            node["files"][context] = files
+            for file in files:
+                self.edges.append({"task": node["path"], "context": context,
+                    "file": os.path.normpath(os.path.join(node["path"], file)),
+                    "global": False})
+        for file in sorted(global_files):
+            self.edges.append({"task": node["path"], "context": "grading",
+                "file": file, "global": True})
+
+    # Queries
+
+    def tasks(self):
+        return [node for node in self.nodes.values()
+                if node["kind"] in ("task", "example")]
+
+    def tasks_using_image(self, docker_image):
+        return [node for node in self.tasks()
+                if node.get("docker_image") == docker_image]
+
+    def tasks_depending_on(self, path):
+        path = os.path.normpath(path)
+        ids = {edge["task"] for edge in self.edges if edge["file"] == path}
+        return [node for node in self.tasks() if node["path"] in ids]
+
+    def files_of(self, task, contexts=None):
+        return [edge["file"] for edge in self.edges if edge["task"] == task
+                and (contexts is None or edge["context"] in contexts)]
+
+    def images(self, paths=None):
+        """Images used by the tasks (or those at the given paths)"""
+        return {node["docker_image"] for node in self.tasks()
+                if node.get("docker_image") and (paths is None or node["path"] in paths)}
@@ -0,0 +1,362 @@
+#!/usr/bin/env python3
+
+# Mutation testing of a task's grader (access-cli mutate). The task is solved
+# once, and many mutants of the solution are generated from the editable files
+# the solve command changed: operators are swapped, constants changed and
+# statements deleted (using the ast module for Python, and regular expressions
+# for Java). Each mutant is graded as a submission, and mutants which are
+# still awarded max_points "survive": the grader does not notice the change,
+# so it is probably too lenient.
+#
+# Mutants are graded in parallel from one shared stage of the task's files
+# (see staging.py), and identical mutants are only graded once.
+
+import os
+import re
+import sys
+import ast
+import json
+import argparse
+
+BINARY_OPERATORS = {ast.Add: ast.Sub, ast.Sub: ast.Add, ast.Mult: ast.Div,
+                    ast.Div: ast.Mult, ast.FloorDiv: ast.Mult, ast.Mod: ast.FloorDiv,
+                    ast.Pow: ast.Mult}
+COMPARE_OPERATORS = {ast.Eq: ast.NotEq, ast.NotEq: ast.Eq, ast.Lt: ast.LtE,
+                     ast.LtE: ast.Lt, ast.Gt: ast.GtE, ast.GtE: ast.Gt,
+                     ast.Is: ast.IsNot, ast.IsNot: ast.Is, ast.In: ast.NotIn,
+                     ast.NotIn: ast.In}
+BOOLEAN_OPERATORS = {ast.And: ast.Or, ast.Or: ast.And}
+DELETABLE_STATEMENTS = (ast.Expr, ast.Assign, ast.AugAssign, ast.AnnAssign,
+                        ast.Return, ast.If, ast.For, ast.While, ast.Raise,
+                        ast.Break, ast.Continue)
+
+# (pattern, replacement) pairs, applied to Java code outside of string
+# literals and comments
+JAVA_OPERATORS = [
+    (r"==", "!="), (r"!=", "=="), (r"<=", "<"), (r">=", ">"),
+    (r"(?<=\s)<(?=\s)", "<="), (r"(?<=\s)>(?=\s)", ">="),
+    (r"&&", "||"), (r"\|\|", "&&"),
+    (r"(?<=\s)\+(?=\s)", "-"), (r"(?<=\s)-(?=\s)", "+"),
+    (r"(?<=\s)\*(?=\s)", "/"), (r"(?<=\s)/(?=\s)", "*"),
+    (r"\+\+", "--"), (r"--", "++"),
+    (r"\btrue\b", "false"), (r"\bfalse\b", "true"),
+]
+JAVA_STRING = re.compile(r'"(?:\\.|[^"\\])*"')
+JAVA_INTEGER = re.compile(r"\b\d+\b")
+# Statements which can be deleted without breaking compilation: method calls,
+# assignments, increments and decrements
+JAVA_DELETABLE = re.compile(r"^\s*[\w.\[\]]+\s*(\(.*\)|[+\-*/%]?=[^=].*|\+\+|--)\s*;\s*$")
+
+def is_docstring(node):
+    return isinstance(node, ast.Expr) and isinstance(node.value, ast.Constant)
+
+class PythonMutator(ast.NodeTransformer):
+    """Registers each mutation site it visits, and applies the mutation of
+    the site with index target (if any)"""
+
+    def __init__(self, target=None):
+        self.target = target
+        self.sites = []
+
+    def site(self, node, description):
+        self.sites.append(f"line {node.lineno}: {description}")
+        return len(self.sites) - 1 == self.target
+
+    def visit(self, node):
+        node = super().visit(node)
+        if isinstance(node, DELETABLE_STATEMENTS) and not is_docstring(node):
+            if self.site(node, f"deleted {type(node).__name__.lower()} statement"):
+                return ast.copy_location(ast.Pass(), node)
+        return node
+
+    def visit_Expr(self, node):
+        # docstrings (and other bare constants) don't affect behavior, so
+        # neither their deletion nor their mutation could be detected
+        if is_docstring(node):
+            return node
+        self.generic_visit(node)
+        return node
+
+    def visit_BinOp(self, node):
+        self.generic_visit(node)
+        if type(node.op) in BINARY_OPERATORS:
+            mutant = BINARY_OPERATORS[type(node.op)]
+            if self.site(node, f"{type(node.op).__name__} → {mutant.__name__}"):
+                node.op = mutant()
+        return node
+
+    def visit_AugAssign(self, node):
+        self.generic_visit(node)
+        if type(node.op) in BINARY_OPERATORS:
+            mutant = BINARY_OPERATORS[type(node.op)]
+            if self.site(node, f"{type(node.op).__name__}= → {mutant.__name__}="):
+                node.op = mutant()
+        return node
+
+    def visit_Compare(self, node):
+        self.generic_visit(node)
+        for i, op in enumerate(node.ops):
+            if type(op) in COMPARE_OPERATORS:
+                mutant = COMPARE_OPERATORS[type(op)]
+                if self.site(node, f"{type(op).__name__} → {mutant.__name__}"):
+                    node.ops[i] = mutant()
+        return node
+
+    def visit_BoolOp(self, node):
+        self.generic_visit(node)
+        mutant = BOOLEAN_OPERATORS[type(node.op)]
+        if self.site(node, f"{type(node.op).__name__} → {mutant.__name__}"):
+            node.op = mutant()
+        return node
+
+    def visit_JoinedStr(self, node):
+        # the constant parts of f-strings are not worth mutating
+        return node
+
+    def visit_Constant(self, node):
+        value = node.value
+        if isinstance(value, bool):
+            if self.site(node, f"{value} → {not value}"):
+                node.value = not value
+        elif isinstance(value, (int, float)):
+            if self.site(node, f"{value!r} → {value + 1!r}"):
+                node.value = value + 1
+        elif isinstance(value, str) and value:
+            if self.site(node, f"{value!r} → ''"):
+                node.value = ""
+        return node
+
+def python_mutants(source):
+    """Yield (description, source) of each mutant of Python source"""
+    try:
+        sites = PythonMutator()
+        sites.visit(ast.parse(source))
+    except SyntaxError:
+        return
+    for target, description in enumerate(sites.sites):
+        tree = PythonMutator(target).visit(ast.parse(source))
+        yield description, ast.unparse(ast.fix_missing_locations(tree)) + "\n"
+
+def java_code_spans(line):
+    """Spans of line which are code, i.e., not string literals or comments"""
+    if line.lstrip().startswith(("//", "*", "/*", "import ", "package ")):
+        return []
+    end = line.find("//")
+    strings = [m.span() for m in JAVA_STRING.finditer(line)]
+    if end >= 0 and any(start < end < stop for start, stop in strings):
+        end = -1
+    code = len(line) if end < 0 else end
+    spans, position = [], 0
+    for start, stop in strings + [(code, code)]:
+        if start >= code:
+            break
+        spans.append((position, start))
+        position = stop
+    spans.append((position, code))
+    return [(start, stop) for start, stop in spans if start < stop]
+
+def java_mutants(source):
+    """Yield (description, source) of each mutant of Java source"""
+    lines = source.splitlines(keepends=True)
+    for number, line in enumerate(lines):
+        spans = java_code_spans(line)
+        def replace(start, stop, replacement):
+            mutant = lines[:number] + [line[:start] + replacement + line[stop:]] + lines[number + 1:]
+            return "".join(mutant)
+        for pattern, replacement in JAVA_OPERATORS:
+            for match in re.finditer(pattern, line):
+                if any(start <= match.start() and match.end() <= stop for start, stop in spans):
+                    yield (f"line {number + 1}: {match.group()} → {replacement}",
+                           replace(match.start(), match.end(), replacement))
+        for match in JAVA_INTEGER.finditer(line):
+            if any(start <= match.start() and match.end() <= stop for start, stop in spans):
+                value = int(match.group())
+                yield (f"line {number + 1}: {value} → {value + 1}",
+                       replace(match.start(), match.end(), str(value + 1)))
+        if spans and JAVA_DELETABLE.match(line[:spans[-1][1]]):
+            yield f"line {number + 1}: deleted statement", replace(0, len(line.rstrip("\r\n")), "")
+
+MUTATORS = {".py": python_mutants, ".java": java_mutants}
+
+def generate_mutants(files):
+    """Mutants of files (paths mapped to contents) as dicts of the mutated
+    path, a description and the mutated source. Mutants identical to the
+    original or to another mutant are skipped."""
+    mutants = []
+    for path, source in sorted(files.items()):
+        mutator = MUTATORS.get(os.path.splitext(path)[1])
+        if mutator is None:
+            continue
+        seen = {source}
+        for description, mutant in mutator(source):
+            if mutant not in seen:
+                seen.add(mutant)
+                mutants.append({"path": path, "description": description, "source": mutant})
+    return mutants
+
+def solved_files(validator, task, config, solve_command, directory):
+    """Solve the task in directory and return the editable files which the
+    solve command changed, mapped to their contents"""
+    import subprocess
+    from access_cli_sealuzh.main import SOLVE_TIMEOUT
+    for file in config["files"]["visible"] + config["files"]["solution"]:
+        validator.copy_file(task, file, directory)
+    template = {}
+    for file in config["files"]["editable"]:
+        if os.path.isfile(os.path.join(directory, file)):
+            with open(os.path.join(directory, file), errors="replace") as f:
+                template[file] = f.read()
+    subprocess.run(solve_command, timeout=SOLVE_TIMEOUT, cwd=directory, shell=True)
+    solved = {}
+    for file in config["files"]["editable"]:
+        if os.path.isfile(os.path.join(directory, file)):
+            with open(os.path.join(directory, file), errors="replace") as f:
+                source = f.read()
+            if source != template.get(file):
+                solved[file] = source
+    return solved
+
+def write_submission(directory, files):
+    for path, source in files.items():
+        os.makedirs(os.path.dirname(os.path.join(directory, path)), exist_ok=True)
+        with open(os.path.join(directory, path), "w") as f:
+            f.write(source)
+    return directory
+
+class Mutation:
+    """Outcome of grading the mutants, updated as they are graded"""
+
+    def __init__(self, max_points):
+        self.max_points = max_points
+        self.graded = 0
+        self.killed = 0
+        self.timeouts = 0
+        self.survivors = []
+        self.errors = []
+
+    def done(self, job):
+        self.graded += 1
+        for execution in job.executions:
+            if execution["timed_out"]:
+                # mutants may well loop forever, which is no error
+                self.timeouts += 1
+                self.killed += 1
+                return
+        self.errors.extend(job.errors)
+        for execution in job.executions:
+            if execution["points"] == self.max_points:
+                self.survivors.append({"path": job.mutant["path"],
+                    "description": job.mutant["description"]})
+            else:
+                self.killed += 1
+
+    def score(self):
+        """Fraction of mutants killed"""
+        return self.killed / self.graded if self.graded else 1.0
+
+    def to_dict(self):
+        return {"graded": self.graded, "killed": self.killed, "timeouts": self.timeouts,
+                "score": self.score(), "survivors": self.survivors, "errors": self.errors}
+
+def main(argv):
+    parser = argparse.ArgumentParser(
+        prog = 'access-cli mutate',
+        description = "Grade mutants of a task's solution and list those which are still awarded max_points")
+    parser.add_argument('task', help = "path to the task directory")
+    parser.add_argument('-s', '--solve-command', type=str, required=True,
+        help = "shell command which solves the task, e.g., 'cp -R solution/* task/'")
+    parser.add_argument('-j', '--jobs', type=int, default=4,
+        help = "number of mutants graded in parallel")
+    parser.add_argument('-n', '--max-mutants', type=int,
+        help = "grade at most this many mutants, sampled with --seed (default: all)")
+    parser.add_argument('--seed', type=int, default=0,
+        help = "seed for sampling mutants")
+    parser.add_argument('-u', '--user', default="autodetect",
+        help = "set docker user uid")
+    parser.add_argument('-f', '--global-file', action='append', default=[],
+        help = "global files (relative to course root)")
+    parser.add_argument('-C', '--course-root',
+        help = "path to course root (default: two levels above the task)")
+    parser.add_argument('--report', type=str,
+        help = "write the outcome (including all surviving mutants) as JSON to the given path")
+    args = parser.parse_args(argv)
+
+    import tempfile
+    from access_cli_sealuzh.loadtest import task_arguments, task_config
+    from access_cli_sealuzh.main import AccessValidator, Session
+    from access_cli_sealuzh.pipeline import Job, Pipeline
+    if args.user == "autodetect":
+        args.user = str(os.getuid()) if hasattr(os, "getuid") else None
+    task_args = task_arguments(args.task, None, args.user, args.jobs,
+                               args.course_root, args.global_file)
+    if task_args.level != "task":
+        print(f"{args.task} is not a task directory")
+        return 1
+    session = Session(args.jobs)
+    validator = AccessValidator(task_args, session)
+    validator.logger.set_subject(args.task)
+    config = task_config(validator, args.task)
+    if config is None:
+        return 1
+    if "grade_command" not in config["evaluator"]:
+        print(f"{args.task} has no grade_command")
+        return 1
+    if not session.check_docker(args.user):
+        print("Docker is required for mutation testing, but it's not working correctly: exiting.")
+        return 14
+
+    with tempfile.TemporaryDirectory() as tmp:
+        solved = solved_files(validator, args.task, config, args.solve_command,
+                              os.path.join(tmp, "solved"))
+        mutants = generate_mutants(solved)
+        if args.max_mutants is not None and len(mutants) > args.max_mutants:
+            import random
+            mutants = random.Random(args.seed).sample(mutants, args.max_mutants)
+        print(f"❰ Mutation testing: {len(mutants)} mutants of {', '.join(sorted(solved)) or 'nothing'} ❱")
+
+        executor = session.executor
+        executor.pull([config["evaluator"]["docker_image"]])
+        validator.shared_staging = True
+        outcome = Mutation(config["max_points"])
+        try:
+            # the unmutated solution must be awarded max_points for the
+            # survivors to mean anything
+            solution = write_submission(os.path.join(tmp, "solution"), solved)
+            grade_results = validator.execute_command(args.task, config, "grade_command",
+                                                      submission=solution)
+            points = (grade_results or {}).get("points")
+            if points != config["max_points"]:
+                print(f"The solution is awarded {points} points instead of {config['max_points']}: exiting.")
+                return 1
+            validator.pipeline = Pipeline(executor.get_pool(), args.jobs, done=outcome.done)
+            validator.pipeline.start()
+            try:
+                for i, mutant in enumerate(mutants):
+                    submission = write_submission(os.path.join(tmp, "mutants", str(i)),
+                                                  solved | {mutant["path"]: mutant["source"]})
+                    job = Job(args.task, validator.execute_command, args.task, config,
+                              "grade_command", submission=submission)
+                    job.mutant = mutant
+                    validator.pipeline.put(job)
+            finally:
+                # jobs whose outcome could not be recorded
+                for job in validator.pipeline.finish():
+                    outcome.errors.extend(job.errors)
+                validator.pipeline = None
+        finally:
+            validator.remove_stages()
+            executor.shutdown()
+
+    for survivor in outcome.survivors:
+        print(f" ✗ {survivor['path']} {survivor['description']}: awarded max_points")
+    for error in outcome.errors:
+        print(f" ✗ {error}")
+    print(f"{outcome.killed} of {outcome.graded} mutants killed ({outcome.score():.0%}), "
+          f"{outcome.timeouts} by timeout, {len(outcome.survivors)} survived")
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(outcome.to_dict(), f, indent=2)
+    return 1 if outcome.survivors or outcome.errors else 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+
+# Staged validation: the traversal and static checks act as a producer which
+# enqueues the execution jobs of every statically valid task into a bounded
+# queue. Consumers running on the executor's pool take jobs off the queue as
+# soon as they are available, so containers start while later tasks are still
+# being checked.
+
+import queue
+import threading
+import time
+import traceback
+
+class Job:
+    """A single execution (e.g., grading the template) of a task"""
+
+    def __init__(self, subject, function, *args, **kwargs):
+        self.subject = subject
+        self.function = function
+        self.args = args
+        self.kwargs = kwargs
+        # errors, output and executions produced while running, in order
+        self.errors = []
+        self.output = []
+        self.executions = []
+        self.started = self.finished = None
+
+    def run(self):
+        self.started = time.perf_counter()
+        try:
+            self.function(*self.args, **self.kwargs)
+        except Exception:
+            self.errors.append(f"{self.subject} internal error during execution:\n{traceback.format_exc()}")
+        finally:
+            self.finished = time.perf_counter()
+
+class Pipeline:
+
+    # thread-local context of the job being run by the current thread
+    current = threading.local()
+
+    def __init__(self, pool, workers, maxsize=None, done=None, retain=None):
+        self.pool = pool
+        self.workers = workers
+        # if given, called with each job once it has run. Unless retain is
+        # set, jobs are then not kept until finish() (e.g., to stream through
+        # many submissions), except those for which done failed.
+        self.done = done
+        self.retain = done is None if retain is None else retain
+        self.queue = queue.Queue(maxsize if maxsize is not None else max(64, 16 * workers))
+        self.jobs = []
+        self.futures = []
+        self.print_lock = threading.Lock()
+
+    @classmethod
+    def current_job(cls):
+        return getattr(cls.current, "job", None)
+
+    def start(self):
+        self.futures = [self.pool.submit(self.consume) for _ in range(self.workers)]
+
+    def put(self, job):
+        if self.retain:
+            self.jobs.append(job)
+        self.queue.put(job)
+
+    def consume(self):
+        while True:
+            job = self.queue.get()
+            if job is None:
+                return
+            Pipeline.current.job = job
+            try:
+                job.run()
+            finally:
+                Pipeline.current.job = None
+            # print the output of each job in one piece
+            with self.print_lock:
+                if job.output:
+                    try: print("\n".join(job.output))
+                    except OSError: pass
+                if self.done is not None:
+                    try:
+                        self.done(job)
+                    except Exception:
+                        # keep consuming, the producer may be waiting for room
+                        # in the queue
+                        job.errors.append(f"{job.subject} internal error after execution:\n{traceback.format_exc()}")
+                        if not self.retain:
+                            self.jobs.append(job)
+
+    def finish(self):
+        """Wait for all jobs to complete and return them in the order in
+        which they were enqueued"""
+        for _ in self.futures:
+            self.queue.put(None)
+        for future in self.futures:
+            future.result()
+        return self.jobs
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+
+# Timing instrumentation of the hot paths of a validation run. Spans are
+# recorded around config parsing, schema validation, workspace staging, the
+# solve command, docker executions, result parsing and workspace teardown,
+# tagged with the subject (task directory) and command type they belong to.
+# Spans of category "subject" wrap the validation of a whole course,
+# assignment or task, or a whole execution, and contain the phase spans. They
+# show up in exported traces (--trace) but not in the per-phase report.
+# Without --profile or --trace, a NullProfiler is used whose spans cost next
+# to nothing.
+
+import os
+import time
+import threading
+import contextlib
+
+class Span:
+
+    def __init__(self, span_id, parent, phase, category, subject, command_type, start, thread):
+        self.id = span_id
+        self.parent = parent
+        self.phase = phase
+        self.category = category
+        self.subject = subject
+        self.command_type = command_type
+        self.start = start
+        self.end = start
+        self.thread = thread
+
+    @property
+    def duration(self):
+        return self.end - self.start
+
+class NullProfiler:
+
+    enabled = False
+
+    def span(self, phase, subject=None, command_type=None, category="phase"):
+        return contextlib.nullcontext()
+
+class Profiler:
+
+    enabled = True
+
+    def __init__(self):
+        self.origin = time.perf_counter()
+        self.origin_ns = time.time_ns()
+        self.spans = []
+        self.lock = threading.Lock()
+        # stack of open spans per thread, to determine parents
+        self.local = threading.local()
+
+    @contextlib.contextmanager
+    def span(self, phase, subject=None, command_type=None, category="phase"):
+        if subject is not None:
+            subject = os.path.normpath(subject)
+        stack = self.local.__dict__.setdefault("stack", [])
+        with self.lock:
+            span = Span(len(self.spans) + 1, stack[-1].id if stack else None,
+                phase, category, subject, command_type,
+                time.perf_counter() - self.origin, threading.current_thread().name)
+            self.spans.append(span)
+        stack.append(span)
+        try:
+            yield span
+        finally:
+            span.end = time.perf_counter() - self.origin
+            stack.pop()
+
+    def phase_spans(self):
+        return [span for span in self.spans if span.category == "phase"]
+
+    def by_phase(self):
+        phases = {}
+        for span in self.phase_spans():
+            phases.setdefault(span.phase, []).append(span.duration)
+        return phases
+
+    def by_subject(self):
+        subjects = {}
+        for span in self.phase_spans():
+            if span.subject is not None:
+                subjects.setdefault(span.subject, {}).setdefault(span.phase, 0)
+                subjects[span.subject][span.phase] += span.duration
+        return subjects
+
+    def by_command_type(self):
+        command_types = {}
+        for span in self.phase_spans():
+            if span.command_type is not None and span.subject is not None:
+                command_types.setdefault(span.command_type, 0)
+                command_types[span.command_type] += span.duration
+        return command_types
+
+    def report(self, top=10):
+        """Per-phase and per-task breakdown as printable lines"""
+        lines = ["❰ Profile ❱"]
+        wall = time.perf_counter() - self.origin
+        lines.append(f"wall time: {wall * 1000:.1f}ms")
+        lines.append(f"{'phase':<12} {'count':>6} {'total':>11} {'mean':>11} {'max':>11}")
+        phases = self.by_phase()
+        for phase, durations in sorted(phases.items(), key=lambda p: -sum(p[1])):
+            lines.append(f"{phase:<12} {len(durations):>6} {sum(durations) * 1000:>9.1f}ms "
+                         f"{sum(durations) / len(durations) * 1000:>9.1f}ms {max(durations) * 1000:>9.1f}ms")
+        command_types = self.by_command_type()
+        if command_types:
+            lines.append("by command type: " + ", ".join(f"{command_type} {duration * 1000:.1f}ms"
+                for command_type, duration in sorted(command_types.items(), key=lambda c: -c[1])))
+        subjects = self.by_subject()
+        if subjects:
+            order = sorted(subjects.items(), key=lambda s: -sum(s[1].values()))
+            lines.append(f"Top {min(top, len(order))} slowest of {len(order)} subjects:")
+            for subject, subject_phases in order[:top]:
+                breakdown = ", ".join(f"{phase} {duration * 1000:.1f}ms" for phase, duration in
+                    sorted(subject_phases.items(), key=lambda p: -p[1]))
+                lines.append(f" {sum(subject_phases.values()) * 1000:>9.1f}ms {subject} ({breakdown})")
+        return lines
+
+    def threads(self):
+        """Thread names in order of first appearance, one track each"""
+        threads = []
+        for span in self.spans:
+            if span.thread not in threads:
+                threads.append(span.thread)
+        return threads
+
+    def span_name(self, span):
+        if span.category == "subject":
+            return f"{span.phase} {span.subject}"
+        return span.phase
+
+    def span_attributes(self, span):
+        attributes = {}
+        if span.subject is not None:
+            attributes["subject"] = span.subject
+        if span.command_type is not None:
+            attributes["command_type"] = span.command_type
+        return attributes
+
+    def write_chrome_trace(self, path):
+        """Write the spans in Chrome Trace Event Format (e.g., for Perfetto)"""
+        import json
+        threads = self.threads()
+        events = [{"name": "process_name", "ph": "M", "pid": 1,
+                   "args": {"name": "access-cli"}}]
+        for tid, thread in enumerate(threads, start=1):
+            events.append({"name": "thread_name", "ph": "M", "pid": 1, "tid": tid,
+                           "args": {"name": thread}})
+        for span in self.spans:
+            events.append({"name": self.span_name(span), "cat": span.category,
+                "ph": "X", "pid": 1, "tid": threads.index(span.thread) + 1,
+                "ts": round(span.start * 1e6, 3),
+                "dur": round((span.end - span.start) * 1e6, 3),
+                "args": self.span_attributes(span)})
+        with open(path, "w") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+    def write_otlp(self, path):
+        """Write the spans as OTLP/JSON, as accepted by OpenTelemetry collectors"""
+        import json
+        import secrets
+        trace_id = secrets.token_hex(16)
+        span_ids = {span.id: secrets.token_hex(8) for span in self.spans}
+        def nanos(seconds):
+            return str(self.origin_ns + int(seconds * 1e9))
+        spans = []
+        for span in self.spans:
+            attributes = dict(self.span_attributes(span), category=span.category,
+                              thread=span.thread)
+            otlp_span = {"traceId": trace_id, "spanId": span_ids[span.id],
+                "name": self.span_name(span), "kind": 1,
+                "startTimeUnixNano": nanos(span.start),
+                "endTimeUnixNano": nanos(span.end),
+                "attributes": [{"key": key, "value": {"stringValue": str(value)}}
+                               for key, value in attributes.items()]}
+            if span.parent is not None:
+                otlp_span["parentSpanId"] = span_ids[span.parent]
+            spans.append(otlp_span)
+        with open(path, "w") as f:
+            json.dump({"resourceSpans": [{
+                "resource": {"attributes": [{"key": "service.name",
+                    "value": {"stringValue": "access-cli"}}]},
+                "scopeSpans": [{"scope": {"name": "access_cli_sealuzh"},
+                                "spans": spans}]}]}, f)
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+
+# Flaky grader detection (--repeat N). Validates with every execution
+# scheduled N times. The repetitions run concurrently from one shared stage of
+# each task's files and are never answered from the result cache. Each check
+# whose return code, points or timeouts vary across the repetitions is
+# reported with the distribution of its outcomes. With --perturb, each
+# execution gets a random cpu limit and hash seed, to expose graders which
+# depend on timing or on the iteration order of sets and dicts. Docker rejects
+# cpu limits above the number of cpus of the host, so those are never chosen.
+
+import os
+import random
+from collections import Counter
+
+CPUS = ["0.5", "1", "2"]
+
+def available_cpus(count=None):
+    """The cpu limits of CPUS a host with count cpus can provide"""
+    count = count if count is not None else (os.cpu_count() or 1)
+    return [cpus for cpus in CPUS if float(cpus) <= count]
+
+def perturbation():
+    """Options for docker create limiting the cpus of an execution and
+    setting its hash seed at random"""
+    return ["--cpus", random.choice(available_cpus()),
+            "-e", f"PYTHONHASHSEED={random.randrange(1 << 32)}"]
+
+def check_key(execution):
+    return (execution["subject"], execution["command_type"],
+            execution["solve_command"], execution["submission"])
+
+def describe(key):
+    subject, command_type, solve_command, submission = key
+    if submission is not None:
+        return f"{subject} {command_type} on {submission}"
+    if solve_command is not None:
+        return f"{subject} {command_type} solved by {solve_command}"
+    return f"{subject} {command_type}"
+
+def distributions(executions):
+    """Distribution of the outcomes of each check (by check_key, in order of
+    their first execution), and whether they vary"""
+    runs = {}
+    for execution in executions:
+        runs.setdefault(check_key(execution), []).append(execution)
+    checks = {}
+    for key, executions in runs.items():
+        completed = [e for e in executions if not e["timed_out"]]
+        returncodes = Counter(e["returncode"] for e in completed)
+        points = Counter(e["points"] for e in completed if e["points"] is not None)
+        timeouts = len(executions) - len(completed)
+        walls = sorted(e["usage"]["wall"] for e in executions if "wall" in e["usage"])
+        checks[key] = {"runs": len(executions), "returncodes": returncodes,
+            "points": points, "timeouts": timeouts,
+            "wall": (walls[0], walls[len(walls) // 2], walls[-1]) if walls else None,
+            "flaky": len(returncodes) > 1 or len(points) > 1 or 0 < timeouts < len(executions)}
+    return checks
+
+def format_counts(counter):
+    return ", ".join(f"{value:g} ×{count}" for value, count in counter.most_common())
+
+def format_distribution(check):
+    parts = [f"return code {format_counts(check['returncodes'])}"]
+    if check["points"]:
+        parts.append(f"points {format_counts(check['points'])}")
+    if check["timeouts"]:
+        parts.append(f"{check['timeouts']} timeouts")
+    if check["wall"]:
+        parts.append("wall {:.2f}/{:.2f}/{:.2f}s (min/median/max)".format(*check["wall"]))
+    return "; ".join(parts)
+
+def repeat(args, session):
+    from access_cli_sealuzh import print_results
+    from access_cli_sealuzh.main import AccessValidator
+    session.executor.caching = False
+    try:
+        validator = AccessValidator(args, session)
+        validator.shared_staging = True
+        logger = validator.run()
+    finally:
+        session.executor.caching = True
+    # each failing repetition reported the same error
+    for subject, messages in logger.results.items():
+        logger.results[subject] = list(dict.fromkeys(messages))
+    print_results(logger)
+
+    checks = distributions(logger.executions)
+    flaky = [key for key, check in checks.items() if check["flaky"]]
+    perturbed = ", perturbed" if args.perturb else ""
+    print(f"❰ Repeated executions ({args.repeat} runs{perturbed}): {len(flaky)} of {len(checks)} checks flaky ❱")
+    for key, check in checks.items():
+        if check["flaky"] or args.verbose:
+            print(f" {'✗' if check['flaky'] else '✓'} {describe(key)}: {format_distribution(check)}")
+    return 1 if logger.error_results() or flaky else 0
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+
+# Replay of a corpus of past submissions (access-cli replay). The corpus
+# mirrors the course: for each task, the directory at the task's path relative
+# to the validated directory contains one subdirectory per submission, with
+# the editable files of the submission and the grade_results.json it was
+# graded with. Each submission is graded again and the points awarded are
+# compared to the recorded ones.
+#
+# Submissions are read lazily and fed through a bounded queue to the executor,
+# and only mismatches are kept, so corpora of any size can be replayed. The
+# files of each task are staged once and shared by all its submissions (see
+# staging.py).
+
+import os
+import sys
+import json
+import argparse
+
+def corpus_submissions(directory):
+    """Yield (path, expected points) of the submissions in a task's corpus
+    directory, in no particular order"""
+    if not os.path.isdir(directory):
+        return
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            results = os.path.join(entry.path, "grade_results.json")
+            if entry.is_dir() and os.path.isfile(results):
+                with open(results) as f:
+                    yield entry.path, json.load(f).get("points")
+
+class Replay:
+    """Outcome of a replay, updated as submissions are graded"""
+
+    def __init__(self):
+        self.graded = 0
+        self.timeouts = 0
+        self.mismatches = []
+        self.errors = []
+
+    def done(self, job):
+        self.graded += 1
+        task, submission, expected = job.args[0], job.kwargs["submission"], job.expected
+        self.errors.extend(job.errors)
+        for execution in job.executions:
+            if execution["timed_out"]:
+                self.timeouts += 1
+            elif execution["points"] != expected:
+                self.mismatches.append({"task": task, "submission": submission,
+                    "expected": expected, "points": execution["points"]})
+                print(f" ✗ {submission}: {execution['points']} points awarded instead of {expected}")
+
+    def to_dict(self):
+        return {"graded": self.graded, "timeouts": self.timeouts,
+                "mismatches": self.mismatches, "errors": self.errors}
+
+def replay(validator, corpus, jobs):
+    """Grade the submissions in corpus for each task validator.args.directory
+    contains, returning a Replay"""
+    from access_cli_sealuzh.loadtest import task_config
+    from access_cli_sealuzh.pipeline import Job, Pipeline
+    model = validator.build_model()
+    validator.model = model
+    executor = validator.session.executor
+    executor.pull(model.images())
+    outcome = Replay()
+    validator.shared_staging = True
+    validator.pipeline = Pipeline(executor.get_pool(), jobs, done=outcome.done)
+    validator.pipeline.start()
+    try:
+        for node in model.tasks():
+            task = os.path.normpath(os.path.join(model.root, node["path"]))
+            validator.logger.set_subject(task)
+            config = task_config(validator, task)
+            if config is None or "grade_command" not in config["evaluator"]:
+                continue
+            for submission, expected in corpus_submissions(os.path.join(corpus, node["path"])):
+                job = Job(task, validator.execute_command, task, config,
+                          "grade_command", submission=submission)
+                job.expected = expected
+                validator.pipeline.put(job)
+    finally:
+        # jobs whose outcome could not be recorded
+        for job in validator.pipeline.finish():
+            outcome.errors.extend(job.errors)
+        validator.pipeline = None
+        validator.remove_stages()
+    return outcome
+
+def main(argv):
+    parser = argparse.ArgumentParser(
+        prog = 'access-cli replay',
+        description = 'Grade a corpus of past submissions and compare the points to those recorded')
+    parser.add_argument('corpus',
+        help = "directory with one subdirectory per submission for each task, at the task's path relative to --directory")
+    parser.add_argument('-d', '--directory', default=".",
+        help = "path to the course, assignment or task whose submissions are replayed")
+    parser.add_argument('-j', '--jobs', type=int, default=4,
+        help = "number of submissions graded in parallel")
+    parser.add_argument('-u', '--user', default="autodetect",
+        help = "set docker user uid")
+    parser.add_argument('-f', '--global-file', action='append', default=[],
+        help = "global files (relative to course root)")
+    parser.add_argument('-C', '--course-root',
+        help = "path to course root (default: auto-detected)")
+    parser.add_argument('--report', type=str,
+        help = "write the outcome (including all mismatches) as JSON to the given path")
+    args = parser.parse_args(argv)
+
+    from access_cli_sealuzh.loadtest import task_arguments
+    from access_cli_sealuzh.main import AccessValidator, Session
+    if args.user == "autodetect":
+        args.user = str(os.getuid()) if hasattr(os, "getuid") else None
+    validator_args = task_arguments(args.directory, user=args.user, jobs=args.jobs,
+        course_root=args.course_root, global_files=args.global_file)
+    session = Session(args.jobs)
+    if not session.check_docker(args.user):
+        print("Docker is required for replaying submissions, but it's not working correctly: exiting.")
+        return 14
+    validator = AccessValidator(validator_args, session)
+    outcome = replay(validator, args.corpus, args.jobs)
+    session.executor.shutdown()
+
+    print(f"❰ Replay: {outcome.graded} submissions, {len(outcome.mismatches)} mismatches, "
+          f"{outcome.timeouts} timeouts ❱")
+    for error in outcome.errors:
+        print(f" ✗ {error}")
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(outcome.to_dict(), f, indent=2)
+    return 1 if outcome.mismatches or outcome.timeouts or outcome.errors else 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
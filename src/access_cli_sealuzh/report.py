@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+
+# Structured JSON reports of a validation run (--report), for tooling which
+# needs more than the printed summary: the errors of each subject and every
+# execution performed, including its resource usage, and the checks skipped
+# for lack of time (--time-budget). Reports of the shards of
+# a run (--shard i/n) are combined with access-cli merge-reports, which checks
+# that together they validated every task of the course exactly once.
+
+import sys
+import json
+import argparse
+
+def build_report(loggers, shard=None):
+    """Combine the results and executions of one or more loggers (e.g., one
+    per course of a batch) into a report"""
+    results = {}
+    executions = []
+    skipped = []
+    for logger in loggers:
+        results.update(logger.results)
+        executions.extend(logger.executions)
+        skipped.extend(logger.skipped)
+    report = {"passed": not any(results.values()),
+              "results": results, "executions": executions}
+    if skipped:
+        report["skipped"] = skipped
+    if shard is not None:
+        report["shard"] = list(shard)
+        for logger in loggers:
+            if logger.partition is not None:
+                report.update(logger.partition)
+    return report
+
+def write_report(path, loggers, shard=None):
+    with open(path, "w") as f:
+        json.dump(build_report(loggers, shard), f, indent=2)
+
+def merge_reports(reports):
+    """Combine the reports of several shards into one. Subjects reported by
+    more than one shard (e.g., the course) keep each distinct error once."""
+    results = {}
+    executions = []
+    skipped = []
+    for report in reports:
+        for subject, messages in report["results"].items():
+            merged = results.setdefault(subject, [])
+            merged.extend(m for m in messages if m not in merged)
+        executions.extend(report["executions"])
+        skipped.extend(report.get("skipped", []))
+    merged = {"passed": not any(results.values()),
+              "results": results, "executions": executions}
+    if skipped:
+        merged["skipped"] = skipped
+    return merged
+
+def missing_shards(reports):
+    """Indices of the shards none of the reports is from, if sharded"""
+    shards = [tuple(report["shard"]) for report in reports if "shard" in report]
+    if not shards:
+        return []
+    count = shards[0][1]
+    return sorted(set(range(1, count + 1)) - {index for index, _ in shards})
+
+def coverage_errors(reports):
+    """Why the shards' reports do not cover every task of the course exactly
+    once, if they don't"""
+    sharded = [report for report in reports if "course_tasks" in report]
+    if not sharded:
+        return []
+    errors = []
+    counts = {report["shard"][1] for report in sharded}
+    if len(counts) > 1:
+        errors.append(f"Reports of different numbers of shards: {', '.join(map(str, sorted(counts)))}")
+    course_tasks = {tuple(report["course_tasks"]) for report in sharded}
+    if len(course_tasks) > 1:
+        errors.append("Shards partitioned different tasks (e.g., different checkouts of the course)")
+    validated = {}
+    for report in sharded:
+        for task in report["tasks"]:
+            validated.setdefault(task, []).append(report["shard"][0])
+    for task in sorted(set().union(*course_tasks) - set(validated)):
+        errors.append(f"Task {task} was not validated by any shard")
+    for task, shards in sorted(validated.items()):
+        if len(shards) > 1:
+            errors.append(f"Task {task} was validated by shards {', '.join(map(str, shards))}")
+    return errors
+
+def main(argv):
+    parser = argparse.ArgumentParser(
+        prog = 'access-cli merge-reports',
+        description = 'Combine the reports (--report) of the shards of a validation into one')
+    parser.add_argument('reports', nargs='+',
+        help = "paths of the reports to combine")
+    parser.add_argument('-o', '--output', type=str,
+        help = "write the combined report to the given path")
+    args = parser.parse_args(argv)
+
+    reports = []
+    for path in args.reports:
+        with open(path) as f:
+            reports.append(json.load(f))
+    merged = merge_reports(reports)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(merged, f, indent=2)
+
+    from access_cli_sealuzh import print_results, print_skipped
+    from access_cli_sealuzh.logger import Logger
+    logger = Logger()
+    logger.results = merged["results"]
+    logger.skipped = merged.get("skipped", [])
+    print_results(logger)
+    print_skipped(logger)
+    missing = missing_shards(reports)
+    if missing:
+        print(f"Missing reports of shards {', '.join(map(str, missing))}")
+    errors = coverage_errors(reports)
+    for error in errors:
+        print(error)
+    if missing or errors:
+        return 1
+    return 0 if merged["passed"] else 1
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+
+# Seeded sampling for smoke validations (--sample FRACTION|N --seed S). All
+# static checks run, but only the tasks of a random sample execute commands.
+# The sample is stratified by docker_image: every image used by the course is
+# exercised by at least one task, and the remaining tasks are distributed over
+# the images in proportion to how many tasks use them. The same course and
+# seed always give the same sample, so that coverage builds up over time by
+# rotating the seed (e.g., one per night).
+
+import argparse
+
+def parse_sample(value):
+    """Parse a fraction (0 < f < 1) or a number of tasks (N >= 1)"""
+    try:
+        number = float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected a fraction or a number of tasks, not {value}")
+    if number <= 0 or (number >= 1 and not number.is_integer()):
+        raise argparse.ArgumentTypeError(f"expected a fraction between 0 and 1 or a number of tasks, not {value}")
+    return number if number < 1 else int(number)
+
+def sample_size(sample, count):
+    """Number of tasks to sample out of count"""
+    if isinstance(sample, float):
+        return min(count, round(sample * count))
+    return min(count, sample)
+
+def allocate(sizes, size):
+    """Distribute size over the strata (of the given sizes), at least one
+    each, the rest in proportion to their size (largest remainder first)"""
+    counts = {stratum: 1 for stratum in sizes}
+    rest = size - len(sizes)
+    if rest <= 0:
+        return counts
+    remaining = {stratum: sizes[stratum] - 1 for stratum in sizes}
+    total = sum(remaining.values())
+    shares = {stratum: rest * remaining[stratum] / total for stratum in sizes}
+    for stratum in sizes:
+        counts[stratum] += int(shares[stratum])
+    order = sorted(sizes, key=lambda stratum: (-(shares[stratum] % 1), stratum))
+    for stratum in order[:size - sum(counts.values())]:
+        counts[stratum] += 1
+    return counts
+
+def sample_tasks(model, sample, seed=0, paths=None):
+    """Paths (in the model) of the sampled tasks, among those at the given
+    paths if any"""
+    import random
+    strata = {}
+    for node in sorted(model.tasks(), key=lambda node: node["path"]):
+        if paths is None or node["path"] in paths:
+            strata.setdefault(str(node.get("docker_image")), []).append(node["path"])
+    size = sample_size(sample, sum(len(tasks) for tasks in strata.values()))
+    counts = allocate({image: len(tasks) for image, tasks in strata.items()}, size)
+    generator = random.Random(seed)
+    sampled = set()
+    for image in sorted(strata):
+        sampled.update(generator.sample(strata[image], counts[image]))
+    return sampled
@@ -80,6 +80,8 @@ task_information_schema = {
 # - that grade_command is present for homework tasks
 # - that none of the grading or solution files are editable or visible
 # - that editable files are also visible
+# - that variant names are unique, each variant has a solve_command or a
+#   directory, the directory exists and the points do not exceed max_points
 # - OPTIONALLY: that the run, test and grade commands execute correctly
 task_schema = {
     "slug":         {'required': True, 'type': 'string'},
@@ -96,7 +98,11 @@ task_schema = {
                     {'docker_image':  {'required': True, 'type': 'string'},
                      'run_command':   {                  'type': 'string'},
                      'grade_command': {                  'type': 'string'},
-                     'test_command':  {                  'type': 'string'}}},
+                     'test_command':  {                  'type': 'string'},
+                     'timeout':       {                  'type': 'dict', 'schema':
+                                      {'run_command':   {'type': 'integer', 'min': 1},
+                                       'test_command':  {'type': 'integer', 'min': 1},
+                                       'grade_command': {'type': 'integer', 'min': 1}}}}},
     "files":        {'required': True, 'type': 'dict', 'schema':
                     {"visible":     {'required': True, 'type': 'list',
                                      'schema': {'type': 'string'}},
@@ -108,6 +114,11 @@ task_schema = {
                                      'schema': {'type': 'string'}},
                      "persist":     {'required': False, 'type': 'list',
                                      'schema': {'type': 'string'}}
-                    }}
+                    }},
+    "variants":     {'required': False, 'type': 'list', 'schema': {'type': 'dict', 'schema':
+                    {"name":          {'required': True, 'type': 'string'},
+                     "points":        {'required': True, 'type': 'float'},
+                     "solve_command": {                  'type': 'string'},
+                     "directory":     {                  'type': 'string'}}}}
 }
 
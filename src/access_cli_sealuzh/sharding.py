@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+
+# Deterministic, cost-balanced sharding of a course's tasks across CI machines
+# (--shard i/n). The cost of a task is estimated from its number of commands
+# and files, which only depend on the checked-in course, so every machine
+# computes the same partition regardless of its checkout path and local state.
+# With --shard-by-history, the cost of a task is instead the sum of the median
+# durations of its commands recorded in the history database (see history.py),
+# by the task's path within the course; then all shards must use the same
+# database (e.g., restored from a CI cache). Tasks are assigned by decreasing
+# cost to the least loaded shard (greedy bin packing), with ties broken by
+# path. The static checks of the course and its assignments are performed by
+# the first shard only. Each shard's report lists the tasks it validated and
+# those of the whole course, so that merge-reports can check that every task
+# was validated exactly once.
+
+import os
+import argparse
+
+# Relative cost of staging a file, compared to executing a command
+FILE_WEIGHT = 0.01
+
+def parse_shard(value):
+    """Parse i/n (1 <= i <= n) as the tuple (i, n)"""
+    try:
+        index, count = (int(part) for part in value.split("/"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected i/n, e.g. 1/4, not {value}")
+    if not 1 <= index <= count:
+        raise argparse.ArgumentTypeError(f"shard index must be between 1 and {count}")
+    return index, count
+
+def recorded_costs(history):
+    """Sum of the median durations of each subject's commands in history, by
+    the subject's path relative to the directory validated"""
+    import statistics
+    from access_cli_sealuzh.history import connect, durations
+    if not history or not os.path.isfile(history):
+        return {}
+    connection = connect(history)
+    series = durations(connection, relative=True)
+    connection.close()
+    costs = {}
+    for (subject, command_type, solution), walls in series.items():
+        costs[subject] = costs.get(subject, 0) + statistics.median(walls)
+    return costs
+
+def task_costs(model, history=None):
+    """Estimated cost of each task of model, by its path in the model"""
+    import statistics
+    recorded = recorded_costs(history)
+    costs = {}
+    for node in model.tasks():
+        if node["path"] in recorded:
+            costs[node["path"]] = recorded[node["path"]]
+    # seconds per command of the tasks with a recorded cost, to estimate the
+    # other tasks in the same unit
+    per_command = [costs[node["path"]] / len(node["commands"]) for node in model.tasks()
+                   if node["path"] in costs and node["commands"]]
+    per_command = statistics.median(per_command) if per_command else 1.0
+    for node in model.tasks():
+        if node["path"] not in costs:
+            files = len(model.files_of(node["path"]))
+            costs[node["path"]] = per_command * (len(node["commands"]) + FILE_WEIGHT * files)
+    return costs
+
+def partition(costs, count):
+    """Assign tasks (by cost) to count shards, returning the tasks and the
+    total cost of each shard"""
+    tasks = [[] for _ in range(count)]
+    loads = [0.0] * count
+    for path, cost in sorted(costs.items(), key=lambda item: (-item[1], item[0])):
+        shard = min(range(count), key=lambda i: (loads[i], i))
+        tasks[shard].append(path)
+        loads[shard] += cost
+    return tasks, loads
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+
+# Shared staging for executing many submissions of the same task (e.g., when
+# replaying a corpus of submissions). The files of the task are gathered once
+# into a stage (read from the course, an archive or a revision only once), and
+# the workspace of each execution is populated with its own copy of them.
+# Workspaces are mounted writable, so graders may write to any file; linking
+# files from the stage would let one execution change them for all others.
+# Where the file system supports it, files are cloned (reflinks), which shares
+# their blocks until either copy is written, and copied otherwise.
+
+import os
+import shutil
+import tempfile
+
+# ioctl cloning a file on Linux, _IOW(0x94, 9, int)
+FICLONE = 0x40049409
+
+def reflink(source, target):
+    """Clone source to target, returning whether the file system supports it"""
+    try:
+        import fcntl
+        with open(source, "rb") as src, open(target, "wb") as dst:
+            fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+        return True
+    except (ImportError, OSError):
+        return False
+
+def clone(source, target):
+    """Copy source to target, as a reflink if the file system supports it"""
+    if not reflink(source, target):
+        shutil.copyfile(source, target)
+
+def can_clone(source_directory, target_directory):
+    """Whether files in source_directory can be cloned into target_directory"""
+    with tempfile.NamedTemporaryFile(dir=source_directory) as source, \
+         tempfile.TemporaryDirectory(dir=target_directory) as target:
+        source.write(b"\0")
+        source.flush()
+        return reflink(source.name, os.path.join(target, "clone"))
+
+class Stage:
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def files(self):
+        """Paths of all staged files, relative to the stage"""
+        for root, dirs, files in os.walk(self.directory):
+            for name in files:
+                yield os.path.relpath(os.path.join(root, name), self.directory)
+
+    def populate(self, workspace):
+        for path in self.files():
+            target = os.path.join(workspace, path)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            clone(os.path.join(self.directory, path), target)
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+
+# Content-addressed file store (--dedupe-files, or --file-store DIR to keep it
+# across runs). Tasks share many identical files (test harnesses, datasets,
+# boilerplate), which would otherwise be read from the course again for the
+# workspace of every execution. Instead, each file referenced by a task is
+# hashed once, stored once under its digest and cloned into workspaces.
+# Digests are memoized by the file's device and inode and validated against
+# its modification time and size, so unchanged files are never hashed again,
+# also across runs with a persistent store.
+#
+# Workspaces are mounted writable and commands may run as root, so objects are
+# never hard linked into them: a write would change the object for every later
+# execution. A clone (reflink) shares the object's blocks until either is
+# written. Without reflinks, the store would only add a copy into the store to
+# the copy into each workspace, so it is not used then (see can_clone in
+# staging.py). The modification time and size of each object are recorded as
+# well, and objects which no longer match them are removed and stored again.
+# Only files which neither submissions nor solve commands replace (i.e., not
+# editable files) are stored.
+
+import os
+import json
+import hashlib
+import tempfile
+import threading
+
+class FileStore:
+
+    def __init__(self, directory=None):
+        # without a directory, the store only lasts for the run
+        self.temporary = tempfile.TemporaryDirectory() if directory is None else None
+        self.directory = directory if directory is not None else self.temporary.name
+        os.makedirs(self.objects_directory(), exist_ok=True)
+        self.lock = threading.Lock()
+        memo = self.load_memo() if directory is not None else {}
+        # (stamp, digest) by file identity, see identity()
+        self.digests = memo.get("files", {})
+        # stamp of each object by digest, see object_stamp()
+        self.objects = memo.get("objects", {})
+        self.hashed = self.copied = self.evicted = 0
+
+    def memo_path(self):
+        return os.path.join(self.directory, "digests.json")
+
+    def objects_directory(self):
+        return os.path.join(self.directory, "objects")
+
+    def load_memo(self):
+        try:
+            with open(self.memo_path()) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def close(self):
+        """Keep the memoized digests of a persistent store, or remove a
+        temporary one"""
+        if self.temporary is not None:
+            self.temporary.cleanup()
+            return
+        with self.lock:
+            descriptor, path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with os.fdopen(descriptor, "w") as f:
+                json.dump({"files": self.digests, "objects": self.objects}, f)
+            os.replace(path, self.memo_path())
+
+    def object_path(self, digest):
+        return os.path.join(self.objects_directory(), digest[:2], digest)
+
+    @staticmethod
+    def identity(path, fs):
+        """Key and stamp of the file at path: its device and inode and its
+        modification time and size on disk, or its path and fs.stat_key in
+        archives and revisions"""
+        if fs.name(path) is None:
+            stat = os.stat(path)
+            return f"{stat.st_dev}:{stat.st_ino}", f"{stat.st_mtime_ns}:{stat.st_size}"
+        return f"{fs.path}:{fs.name(path)}", repr(fs.stat_key(path))
+
+    @staticmethod
+    def object_stamp(path):
+        """Modification time and size of an object, or None if it is missing"""
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return f"{stat.st_mtime_ns}:{stat.st_size}"
+
+    def intact(self, digest):
+        """Whether the object of digest exists unchanged since it was stored,
+        removing it if it was changed. Called with the lock held."""
+        path = self.object_path(digest)
+        stamp = self.object_stamp(path)
+        if stamp is None:
+            return False
+        if self.objects.get(digest) == stamp:
+            return True
+        os.remove(path)
+        self.evicted += 1
+        return False
+
+    def put(self, path, fs):
+        """Store the file at path unless it is already, returning its object"""
+        key, stamp = self.identity(path, fs)
+        with self.lock:
+            memo = self.digests.get(key)
+            if memo is not None and memo[0] == stamp and self.intact(memo[1]):
+                return self.object_path(memo[1])
+        # hash the file while copying it into the store, reading it once
+        descriptor, temporary = tempfile.mkstemp(dir=self.objects_directory(), suffix=".tmp")
+        digest = hashlib.sha256()
+        with fs.open(path) as f, os.fdopen(descriptor, "wb") as out:
+            for chunk in iter(lambda: f.read(1 << 16), b""):
+                digest.update(chunk)
+                out.write(chunk)
+        digest = digest.hexdigest()
+        target = self.object_path(digest)
+        with self.lock:
+            if self.intact(digest):
+                os.remove(temporary)
+            else:
+                os.chmod(temporary, 0o444)
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                os.replace(temporary, target)
+                self.objects[digest] = self.object_stamp(target)
+            self.digests[key] = (stamp, digest)
+            self.hashed += 1
+        return target
+
+    def copy(self, path, fs, target):
+        """Put the file at path into the workspace at target"""
+        from access_cli_sealuzh.staging import clone
+        clone(self.put(path, fs), target)
+        with self.lock:
+            self.copied += 1
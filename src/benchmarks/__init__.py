@@ -0,0 +1,2 @@
+# Benchmarks measuring how access-cli scales with the size of courses. They are
+# not part of the test suite, see README.md on how to run them.
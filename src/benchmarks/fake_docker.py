@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+
+# A stand-in for the docker CLI, so that benchmarks measure access-cli rather
+# than docker. install() puts a `docker` executable running this module first
+# on PATH. Containers are simulated: creating one takes FAKE_DOCKER_STARTUP
+# seconds, running its command FAKE_DOCKER_LATENCY seconds, and the commands
+# of generated tasks (see generate.py) are interpreted instead of executed:
+#
+#   fake-run           exits with 0
+#   fake-test          exits with 0 if the task has been solved, 1 otherwise
+#   fake-grade POINTS  writes grade_results.json awarding POINTS if solved
+#
+# If FAKE_DOCKER_LOG is set, the size of each workspace and the time its
+# command started are appended to it.
+
+import os
+import sys
+import json
+import time
+import uuid
+import tempfile
+
+FLAGS = {"--rm", "-d", "-i", "-t", "--attach", "-a", "--force", "-f"}
+
+def install(directory):
+    """Write a docker executable to directory and prepend it to PATH"""
+    path = os.path.join(directory, "docker")
+    with open(path, "w") as f:
+        f.write(f"#!/bin/sh\nexec '{sys.executable}' '{os.path.abspath(__file__)}' \"$@\"\n")
+    os.chmod(path, 0o755)
+    os.environ["PATH"] = directory + os.pathsep + os.environ.get("PATH", "")
+    return path
+
+def state_directory():
+    directory = os.environ.get("FAKE_DOCKER_STATE",
+        os.path.join(tempfile.gettempdir(), "fake-docker"))
+    os.makedirs(directory, exist_ok=True)
+    return directory
+
+def parse(arguments):
+    """Split docker create/run arguments into options, image and command"""
+    options = {}
+    while arguments and arguments[0].startswith("-"):
+        option = arguments.pop(0)
+        options[option] = True if option in FLAGS else arguments.pop(0)
+    return options, arguments[0], arguments[1:]
+
+def sleep(variable):
+    time.sleep(float(os.environ.get(variable, 0)))
+
+def workspace_size(workspace):
+    size = 0
+    for root, dirs, files in os.walk(workspace):
+        for name in files:
+            size += os.path.getsize(os.path.join(root, name))
+    return size
+
+def solved(workspace):
+    try:
+        with open(os.path.join(workspace, "task", "answer.txt")) as f:
+            return f.read().strip() != "TODO"
+    except OSError:
+        return False
+
+def execute(workspace, command):
+    if os.environ.get("FAKE_DOCKER_LOG"):
+        with open(os.environ["FAKE_DOCKER_LOG"], "a") as log:
+            log.write(json.dumps({"command": command, "started": time.time(),
+                "bytes": workspace_size(workspace)}) + "\n")
+    sleep("FAKE_DOCKER_LATENCY")
+    if not command:
+        return 0
+    if command[0] == "fake-test":
+        return 0 if solved(workspace) else 1
+    if command[0] == "fake-grade":
+        points = float(command[1]) if solved(workspace) else 0
+        with open(os.path.join(workspace, "grade_results.json"), "w") as f:
+            json.dump({"points": points, "hints": []}, f)
+    return 0
+
+def main(arguments):
+    if not arguments:
+        return 0
+    subcommand, arguments = arguments[0], arguments[1:]
+    if subcommand == "image":
+        print("sha256:" + "0" * 64)
+    elif subcommand == "pull":
+        sleep("FAKE_DOCKER_PULL")
+    elif subcommand == "run":
+        options, image, command = parse(arguments)
+        sleep("FAKE_DOCKER_STARTUP")
+        if image == "hello-world":
+            print("Hello from Docker!")
+            return 0
+        return execute(options.get("-v", "").split(":")[0], command)
+    elif subcommand == "create":
+        options, image, command = parse(arguments)
+        sleep("FAKE_DOCKER_STARTUP")
+        cid = uuid.uuid4().hex
+        with open(os.path.join(state_directory(), cid), "w") as f:
+            json.dump({"workspace": options.get("-v", "").split(":")[0],
+                       "command": command}, f)
+        print(cid)
+    elif subcommand == "start":
+        with open(os.path.join(state_directory(), arguments[-1])) as f:
+            container = json.load(f)
+        return execute(container["workspace"], container["command"])
+    elif subcommand == "rm":
+        try: os.unlink(os.path.join(state_directory(), arguments[-1]))
+        except OSError: pass
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
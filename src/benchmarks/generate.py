@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+
+# Generator for synthetic courses of arbitrary size. Generated tasks use the
+# commands understood by the fake docker shim (see fake_docker.py): the
+# template fails its tests and is awarded 0 points, while the solution (applied
+# with SOLVE_COMMAND) passes them and is awarded max_points.
+
+import os
+import argparse
+
+SOLVE_COMMAND = "cp solution/answer.txt task/answer.txt"
+
+def write(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(content)
+
+def filler(size, seed):
+    """Text of the given size, distinct per seed so that tasks don't share
+    execution results"""
+    line = f"# {seed} " + "x" * 60 + "\n"
+    return (line * (size // len(line) + 1))[:size]
+
+def toml_list(items):
+    return "[" + ", ".join(f'"{item}"' for item in items) + "]"
+
+def information(languages, **fields):
+    blocks = []
+    for language in languages:
+        blocks.append(f"[information.{language}]")
+        for key, value in fields.items():
+            blocks.append(f'{key} = "{value.format(language=language)}"')
+    return "\n".join(blocks) + "\n"
+
+def generate_course(root, assignments=2, tasks=5, files=3, file_size=1024,
+                    global_files=1, languages=("en",), docker_image="python:latest"):
+    """Write a course with the given number of assignments, each with the given
+    number of tasks, to root and return the number of tasks"""
+    global_paths = [f"universal/harness{i}.py" for i in range(global_files)]
+    for path in global_paths:
+        write(os.path.join(root, path), filler(file_size, path))
+    assignment_dirs = [f"assignment_{a}" for a in range(1, assignments + 1)]
+    write(os.path.join(root, "config.toml"),
+        f'slug = "synthetic-course"\n'
+        f'assignments = {toml_list(assignment_dirs)}\n'
+        f'[visibility]\ndefault = "hidden"\n' +
+        information(languages, title="Synthetic course", description="Benchmark",
+                    university="Benchmark", period="Spring") +
+        (f'[global_files]\ngrading = {toml_list(global_paths)}\n' if global_paths else ""))
+    for assignment in assignment_dirs:
+        task_dirs = [f"task_{t}" for t in range(1, tasks + 1)]
+        write(os.path.join(root, assignment, "config.toml"),
+            f'slug = "{assignment}"\n'
+            f'start = 2023-01-01T13:00:00\nend = 2028-01-01T13:00:00\n'
+            f'tasks = {toml_list(task_dirs)}\n' +
+            information(languages, title=assignment))
+        for task in task_dirs:
+            generate_task(os.path.join(root, assignment, task), f"{assignment}-{task}",
+                          files, file_size, languages, docker_image)
+    return assignments * tasks
+
+def generate_task(directory, slug, files, file_size, languages, docker_image):
+    visible = [f"task/module{i}.py" for i in range(files)]
+    grading = [f"grading/tests{i}.py" for i in range(files)]
+    for path in visible + grading:
+        write(os.path.join(directory, path), filler(file_size, f"{slug}/{path}"))
+    write(os.path.join(directory, "task/answer.txt"), "TODO\n")
+    write(os.path.join(directory, "solution/answer.txt"), "42\n")
+    for language in languages:
+        write(os.path.join(directory, f"instructions_{language}.md"), f"# {slug}\n")
+    write(os.path.join(directory, "config.toml"),
+        f'slug = "{slug}"\nmax_points = 2\n' +
+        information(languages, title=slug, instructions_file="instructions_{language}.md") +
+        f'[evaluator]\ndocker_image = "{docker_image}"\n'
+        f'run_command = "fake-run"\ntest_command = "fake-test"\n'
+        f'grade_command = "fake-grade 2"\n'
+        f'[files]\n'
+        f'visible = {toml_list(["task/answer.txt"] + visible)}\n'
+        f'editable = {toml_list(["task/answer.txt"])}\n'
+        f'grading = {toml_list(grading)}\n'
+        f'solution = {toml_list(["solution/answer.txt"])}\n')
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.generate",
+        description="Generate a synthetic ACCESS course")
+    parser.add_argument("directory")
+    parser.add_argument("-a", "--assignments", type=int, default=2)
+    parser.add_argument("-t", "--tasks", type=int, default=5,
+        help="tasks per assignment")
+    parser.add_argument("-n", "--files", type=int, default=3,
+        help="visible and grading files per task")
+    parser.add_argument("-s", "--file-size", type=int, default=1024,
+        help="size of each generated file in bytes")
+    parser.add_argument("-g", "--global-files", type=int, default=1)
+    parser.add_argument("-L", "--languages", default="en",
+        help="comma-separated information languages")
+    args = parser.parse_args(argv)
+    count = generate_course(args.directory, args.assignments, args.tasks,
+        args.files, args.file_size, args.global_files, args.languages.split(","))
+    print(f"generated {count} tasks in {args.directory}")
+
+if __name__ == "__main__":
+    main()
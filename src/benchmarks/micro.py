@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+
+# Microbenchmarks of the static hot paths, with stored baselines. To make
+# baselines comparable across machines, each time is stored relative to a
+# fixed pure-Python calibration workload timed in the same run. A benchmark
+# which becomes slower than its baseline by more than its threshold fails the
+# run (exit code 1), e.g., when run before a release. Benchmarks dominated by
+# file system operations are noisier and have higher thresholds.
+
+import os
+import io
+import sys
+import json
+import timeit
+import argparse
+import tempfile
+import contextlib
+
+BASELINES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines.json")
+
+# Benchmarks by name. Each is a function taking a scratch directory and
+# returning the function to be timed.
+BENCHMARKS = {}
+# Tolerated slowdown of each benchmark relative to its baseline
+THRESHOLDS = {}
+
+def benchmark(name, threshold=0.5):
+    def register(setup):
+        BENCHMARKS[name] = setup
+        THRESHOLDS[name] = threshold
+        return setup
+    return register
+
+def validator(verbose=False):
+    from argparse import Namespace
+    from access_cli_sealuzh.main import AccessValidator
+    return AccessValidator(Namespace(directory=".", level="task", global_file=set(),
+        user=None, run=None, test=None, test_solution=False, grade_template=False,
+        grade_solution=False, solve_command=None, verbose=verbose, debug=False,
+        recursive=False))
+
+def large_task(directory, files=2000):
+    from benchmarks.generate import generate_task
+    task = os.path.join(directory, "task")
+    generate_task(task, "large-task", files, 16, ["en", "de"], "python:latest")
+    return task
+
+@benchmark("read_config_large")
+def read_config_large(directory):
+    from access_cli_sealuzh.main import AccessValidator
+    path = os.path.join(large_task(directory), "config.toml")
+    return lambda: AccessValidator.read_config(path)
+
+@benchmark("task_schema_normalize")
+def task_schema_normalize(directory):
+    from access_cli_sealuzh.main import AccessValidator
+    config = AccessValidator.read_config(os.path.join(large_task(directory), "config.toml"))
+    v = validator()
+    schema = v.schema_validator("task_schema")
+    def normalize():
+        if v.normalize(schema, config, "task") is None:
+            raise ValueError(v.pformat(schema.errors))
+    return normalize
+
+def staging(directory, count, size):
+    from benchmarks.generate import write, filler
+    task = os.path.join(directory, "task")
+    paths = [f"task/file{i}.txt" for i in range(count)]
+    for path in paths:
+        write(os.path.join(task, path), filler(size, path))
+    v = validator()
+    def copy():
+        with tempfile.TemporaryDirectory(dir=directory) as workspace:
+            for path in paths:
+                v.copy_file(task, path, workspace)
+    return copy
+
+@benchmark("copy_file_many_small", threshold=1.0)
+def copy_file_many_small(directory):
+    return staging(directory, 500, 1 << 10)
+
+@benchmark("copy_file_few_large", threshold=1.0)
+def copy_file_few_large(directory):
+    return staging(directory, 2, 4 << 20)
+
+@benchmark("logger_10k_subjects")
+def logger_10k_subjects(directory):
+    from access_cli_sealuzh.logger import Logger
+    def log():
+        logger = Logger()
+        for i in range(10000):
+            logger.set_subject(f"course/assignment/task_{i}")
+            if i % 3 == 0:
+                logger.error(f"task_{i} schema errors")
+        return logger.error_results()
+    return log
+
+@benchmark("print_command_result_large")
+def print_command_result_large(directory):
+    v = validator(verbose=True)
+    stdout = "\n".join(f"test_{i} ... ok" for i in range(50000))
+    stderr = "\n".join(f"warning {i}" for i in range(10000))
+    def print_result():
+        with contextlib.redirect_stdout(io.StringIO()):
+            v.print_command_result("python:latest", "grade_command",
+                                   "python -m unittest", 0, stdout, stderr)
+    return print_result
+
+def calibration():
+    total = 0
+    for i in range(200000):
+        total += i * i % 7
+    return total
+
+def best(function, repeat):
+    """Best time of a single call out of repeat rounds"""
+    timer = timeit.Timer(function)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat, number)) / number
+
+def run(names=None, repeat=5):
+    """Return the time of each benchmark relative to the calibration workload,
+    which is timed right before each benchmark to follow changes in load"""
+    results = {}
+    for name, setup in BENCHMARKS.items():
+        if names and name not in names:
+            continue
+        with tempfile.TemporaryDirectory() as directory:
+            function = setup(directory)
+            unit = best(calibration, repeat)
+            results[name] = best(function, repeat) / unit
+    return results
+
+def regressions(results, baselines, threshold=None):
+    """Lines describing each benchmark slower than its baseline by more than
+    its threshold (e.g., 0.5 for 50%), or threshold if given"""
+    lines = []
+    for name, relative in results.items():
+        if name not in baselines:
+            continue
+        limit = threshold if threshold is not None else THRESHOLDS.get(name, 0.5)
+        if relative > baselines[name] * (1 + limit):
+            lines.append(f"{name}: {relative / baselines[name]:.2f}x its baseline "
+                         f"(threshold {limit:.0%})")
+    return lines
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.micro",
+        description="Run the microbenchmarks and compare them to their baselines")
+    parser.add_argument("names", nargs="*", help="benchmarks to run (default: all)")
+    parser.add_argument("--threshold", type=float,
+        help="fail if a benchmark is slower than its baseline by more than this fraction (default: per benchmark)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--baselines", default=BASELINES)
+    parser.add_argument("--update", action="store_true",
+        help="store the results as the new baselines")
+    args = parser.parse_args(argv)
+
+    results = run(args.names, args.repeat)
+    baselines = {}
+    if os.path.isfile(args.baselines):
+        with open(args.baselines) as f:
+            baselines = json.load(f)
+    for name, relative in results.items():
+        baseline = f"{relative / baselines[name]:.2f}x baseline" if name in baselines else "no baseline"
+        print(f"{name:<28} {relative:>10.3f} ({baseline})")
+    if args.update:
+        baselines.update(results)
+        with open(args.baselines, "w") as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+        return 0
+    failures = regressions(results, baselines, args.threshold)
+    for line in failures:
+        print(f"regression: {line}")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+
+# End-to-end scaling benchmark: generates synthetic courses of increasing size
+# and measures AccessValidator.run() on each with several job counts, against
+# the fake docker shim. Every measurement runs in a fresh interpreter so that
+# peak memory and caches are not shared between measurements. Results are
+# written as JSON and can be compared to the results of an earlier run.
+
+import os
+import io
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+import contextlib
+import subprocess
+
+SRC = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def measure(course, jobs):
+    """Validate course with all executions and return the measurements.
+    Runs in the benchmark's child process."""
+    import resource
+    from argparse import Namespace
+    from benchmarks.generate import SOLVE_COMMAND
+    from access_cli_sealuzh.main import AccessValidator, Session, autodetect, with_defaults
+    args = with_defaults(Namespace(directory=course, level=None, auto_detect=True,
+        global_file=set(), course_root=None, user=None, run=None, test=None,
+        test_solution=None, grade_template=None, grade_solution=None,
+        solve_command=SOLVE_COMMAND, verbose=False, debug=False, recursive=None,
+        jobs=jobs))
+    args = autodetect(args)
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        logger = AccessValidator(args, Session(jobs)).run()
+    wall = time.perf_counter() - start
+    return {"wall": wall, "errors": len(logger.error_list()),
+            # kilobytes on Linux, bytes on macOS
+            "peak_rss": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss}
+
+def run_case(course, jobs, environment):
+    """Measure course in a child process, adding what the fake docker logged"""
+    with tempfile.TemporaryDirectory() as tmp:
+        log = os.path.join(tmp, "executions.jsonl")
+        env = dict(environment, FAKE_DOCKER_LOG=log,
+                   FAKE_DOCKER_STATE=os.path.join(tmp, "state"),
+                   PYTHONPATH=os.pathsep.join([SRC, environment.get("PYTHONPATH", "")]))
+        child = subprocess.run([sys.executable, "-m", "benchmarks.scaling",
+            "--measure", course, "--jobs", str(jobs)],
+            env=env, capture_output=True, check=True)
+        result = json.loads(child.stdout)
+        executions = []
+        if os.path.isfile(log):
+            with open(log) as f:
+                executions = [json.loads(line) for line in f]
+    result["executions"] = len(executions)
+    result["bytes_copied"] = sum(e["bytes"] for e in executions)
+    return result
+
+def parse_sizes(sizes):
+    return [tuple(int(n) for n in size.split("x")) for size in sizes.split(",")]
+
+def key(result):
+    return (result["assignments"], result["tasks"], result["jobs"])
+
+def compare(results, baseline):
+    """Lines comparing results to those of an earlier run"""
+    previous = {key(result): result for result in baseline["results"]}
+    lines = []
+    for result in results:
+        if key(result) in previous:
+            old = previous[key(result)]
+            lines.append(f"{result['assignments']}x{result['tasks']} -j{result['jobs']}: "
+                f"wall {result['wall'] / old['wall']:.2f}x, "
+                f"peak memory {result['peak_rss'] / old['peak_rss']:.2f}x, "
+                f"bytes copied {result['bytes_copied'] - old['bytes_copied']:+d}")
+    return lines
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.scaling",
+        description="Measure access-cli on synthetic courses of increasing size")
+    parser.add_argument("--sizes", default="1x5,4x10,10x20",
+        help="comma-separated course sizes as ASSIGNMENTSxTASKS")
+    parser.add_argument("--jobs", default="1,4",
+        help="comma-separated job counts")
+    parser.add_argument("--files", type=int, default=3,
+        help="visible and grading files per task")
+    parser.add_argument("--file-size", type=int, default=1024)
+    parser.add_argument("--startup", type=float, default=0.05,
+        help="simulated container startup latency in seconds")
+    parser.add_argument("--latency", type=float, default=0.05,
+        help="simulated command latency in seconds")
+    parser.add_argument("-o", "--output", help="write results as JSON to this path")
+    parser.add_argument("-c", "--compare", help="results of an earlier run to compare to")
+    parser.add_argument("--measure", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.measure:
+        print(json.dumps(measure(args.measure, int(args.jobs))))
+        return 0
+
+    from benchmarks import fake_docker
+    from benchmarks.generate import generate_course
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        fake_docker.install(tmp)
+        environment = dict(os.environ, FAKE_DOCKER_STARTUP=str(args.startup),
+                           FAKE_DOCKER_LATENCY=str(args.latency))
+        for assignments, tasks in parse_sizes(args.sizes):
+            course = os.path.join(tmp, f"course-{assignments}x{tasks}")
+            generate_course(course, assignments, tasks, args.files, args.file_size)
+            for jobs in [int(j) for j in args.jobs.split(",")]:
+                result = dict(assignments=assignments, tasks=tasks, jobs=jobs,
+                              **run_case(course, jobs, environment))
+                results.append(result)
+                print(f"{assignments}x{tasks} -j{jobs}: {result['wall']:.2f}s, "
+                      f"{result['executions']} executions, "
+                      f"{result['bytes_copied']} bytes copied, "
+                      f"peak memory {result['peak_rss']}, {result['errors']} errors")
+    report = {"python": platform.python_version(), "platform": platform.platform(),
+              "files": args.files, "file_size": args.file_size,
+              "startup": args.startup, "latency": args.latency, "results": results}
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            for line in compare(results, json.load(f)):
+                print(line)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,5 @@
+#!/usr/bin/env python3
+
+x = 21 + 21
+print(x)
+
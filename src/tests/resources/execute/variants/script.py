@@ -0,0 +1,7 @@
+#!/usr/bin/env python3
+
+# This is the arithmetic expression you should change
+x = 0
+
+print("hello, world")
+
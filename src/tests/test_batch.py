@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+
+import unittest
+import io
+import os
+import tempfile
+import contextlib
+from argparse import Namespace
+from importlib.resources import files
+
+class BatchValidationTests(unittest.TestCase):
+
+    def args(self, courses=None, manifest=None, glob=None):
+        return Namespace(directory=".", level=None, auto_detect=False,
+                         global_file=set(), course_root=None,
+                         user=os.environ.get("DOCKER_USER", ""),
+                         run=None, test=None, test_solution=False,
+                         grade_template=False, grade_solution=False,
+                         solve_command=None, verbose=False, debug=False,
+                         recursive=None, dump_model=None, jobs=1,
+                         courses=courses, manifest=manifest, glob=glob)
+
+    def validate(self, args):
+        from access_cli_sealuzh import validate
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            returncode = validate(args)
+        return returncode, out.getvalue()
+
+    def test_discover_from_manifest(self):
+        from access_cli_sealuzh.batch import discover_courses
+        with tempfile.TemporaryDirectory() as tmp:
+            manifest = os.path.join(tmp, "courses.txt")
+            with open(manifest, "w") as f:
+                f.write("# nightly courses\ncourse-a\n\ncourse-b # second\n")
+            self.assertEqual([os.path.join(tmp, "course-a"), os.path.join(tmp, "course-b")],
+                             discover_courses(manifest=manifest))
+
+    def test_discover_from_glob(self):
+        from access_cli_sealuzh.batch import discover_courses
+        pattern = os.path.join(str(files('tests.resources').joinpath('recursive')), "*")
+        roots = discover_courses(pattern=pattern)
+        self.assertEqual(["task-missing-file", "valid"], [os.path.basename(r) for r in roots])
+
+    def test_discover_removes_duplicates(self):
+        from access_cli_sealuzh.batch import discover_courses
+        course = str(files('tests.resources.recursive').joinpath('valid'))
+        pattern = os.path.join(str(files('tests.resources').joinpath('recursive')), "*")
+        self.assertEqual(2, len(discover_courses([course], pattern=pattern)))
+
+    def test_global_files_per_course(self):
+        from access_cli_sealuzh.batch import course_arguments
+        args = self.args()
+        with_global = course_arguments(args, str(files('tests.resources.autodetect').joinpath('valid-course')))
+        without_global = course_arguments(args, str(files('tests.resources.recursive').joinpath('valid')))
+        self.assertEqual({"universal/harness.py"}, with_global.global_file)
+        self.assertEqual(set(), without_global.global_file)
+        self.assertEqual(set(), args.global_file)
+        self.assertEqual(with_global.directory, with_global.course_root)
+
+    def test_valid_courses(self):
+        returncode, out = self.validate(self.args(courses=[
+            str(files('tests.resources.autodetect').joinpath('valid-course')),
+            str(files('tests.resources.recursive').joinpath('valid'))]))
+        self.assertEqual(0, returncode)
+        self.assertIn("2 of 2 courses passed validation", out)
+
+    def test_invalid_course(self):
+        returncode, out = self.validate(self.args(courses=[
+            str(files('tests.resources.recursive').joinpath('valid')),
+            str(files('tests.resources.recursive').joinpath('task-missing-file'))]))
+        self.assertEqual(1, returncode)
+        self.assertIn("1 of 2 courses passed validation", out)
+        self.assertIn("files references non-existing file", out)
+
+    def test_malformed_course(self):
+        import shutil
+        with tempfile.TemporaryDirectory() as tmp:
+            broken = os.path.join(tmp, "broken")
+            shutil.copytree(str(files('tests.resources.recursive').joinpath('valid')), broken)
+            with open(os.path.join(broken, "config.toml"), "a") as f:
+                f.write("\nslug = [unterminated\n")
+            returncode, out = self.validate(self.args(courses=[broken,
+                str(files('tests.resources.recursive').joinpath('valid'))]))
+        self.assertEqual(1, returncode)
+        # the other course is still validated
+        self.assertIn("1 of 2 courses passed validation", out)
+        self.assertIn("could not be auto-detected", out)
+        self.assertIn("TOMLDecodeError", out)
+
+    def test_malformed_assignment(self):
+        import shutil
+        with tempfile.TemporaryDirectory() as tmp:
+            broken = os.path.join(tmp, "broken")
+            shutil.copytree(str(files('tests.resources.recursive').joinpath('valid')), broken)
+            with open(os.path.join(broken, "assignment_1", "config.toml"), "a") as f:
+                f.write("\nslug = [unterminated\n")
+            returncode, out = self.validate(self.args(courses=[broken,
+                str(files('tests.resources.recursive').joinpath('valid'))]))
+        self.assertEqual(1, returncode)
+        self.assertIn("1 of 2 courses passed validation", out)
+        self.assertIn("could not be validated: TOMLDecodeError", out)
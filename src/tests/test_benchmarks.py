@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+
+import unittest
+import io
+import os
+import json
+import tempfile
+import contextlib
+from argparse import Namespace
+
+class BenchmarkTests(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.environ["PATH"]
+
+    def tearDown(self):
+        os.environ["PATH"] = self.path
+        for variable in ["FAKE_DOCKER_LOG", "FAKE_DOCKER_STATE"]:
+            os.environ.pop(variable, None)
+        self.tmp.cleanup()
+
+    def validate(self, course, **kwargs):
+        from access_cli_sealuzh import validate
+        args = Namespace(directory=course, level=None, auto_detect=True,
+                         global_file=set(), course_root=None, user=None,
+                         run=None, test=None, test_solution=None,
+                         grade_template=None, grade_solution=None,
+                         solve_command=None, verbose=False, debug=False,
+                         recursive=None)
+        for name, value in kwargs.items():
+            setattr(args, name, value)
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            returncode = validate(args)
+        return returncode, out.getvalue()
+
+    def test_generated_course_is_valid(self):
+        from benchmarks.generate import generate_course
+        course = os.path.join(self.tmp.name, "course")
+        self.assertEqual(6, generate_course(course, assignments=2, tasks=3,
+                                            languages=["en", "de"]))
+        returncode, out = self.validate(course, auto_detect=False, level="course",
+            recursive=True, grade_template=False)
+        self.assertEqual(0, returncode, out)
+        # course, assignments and tasks
+        self.assertEqual(9, out.count(" ✓ "))
+
+    def test_fake_docker(self):
+        from benchmarks import fake_docker
+        from benchmarks.generate import generate_course, SOLVE_COMMAND
+        course = os.path.join(self.tmp.name, "course")
+        generate_course(course, assignments=1, tasks=1, files=2, file_size=100)
+        bin_dir = os.path.join(self.tmp.name, "bin")
+        os.mkdir(bin_dir)
+        fake_docker.install(bin_dir)
+        log = os.path.join(self.tmp.name, "executions.jsonl")
+        os.environ["FAKE_DOCKER_LOG"] = log
+        os.environ["FAKE_DOCKER_STATE"] = os.path.join(self.tmp.name, "state")
+        returncode, out = self.validate(course, solve_command=SOLVE_COMMAND)
+        self.assertEqual(0, returncode, out)
+        with open(log) as f:
+            executions = [json.loads(line) for line in f]
+        # run, test, grade template, test solution, grade solution
+        self.assertEqual(5, len(executions))
+        self.assertTrue(all(e["bytes"] >= 200 for e in executions))
+        self.assertEqual([], os.listdir(os.environ["FAKE_DOCKER_STATE"]))
+
+    def test_microbenchmarks_run(self):
+        from benchmarks.micro import BENCHMARKS
+        for name, setup in BENCHMARKS.items():
+            with self.subTest(name), tempfile.TemporaryDirectory() as directory:
+                setup(directory)()
+
+    def test_microbenchmark_regressions(self):
+        from benchmarks.micro import regressions
+        baselines = {"logger_10k_subjects": 1.0, "copy_file_many_small": 1.0}
+        results = {"logger_10k_subjects": 1.6, "copy_file_many_small": 1.6, "new": 5.0}
+        self.assertEqual(["logger_10k_subjects: 1.60x its baseline (threshold 50%)"],
+                         regressions(results, baselines))
+        self.assertEqual(2, len(regressions(results, baselines, threshold=0.1)))
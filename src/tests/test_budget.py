@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+
+import unittest
+import os
+import time
+import shutil
+import argparse
+import tempfile
+from types import SimpleNamespace
+from importlib.resources import files
+
+class BudgetTests(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.history = os.path.join(self.tmp.name, "history.sqlite")
+        self.course = os.path.join(self.tmp.name, "course")
+        shutil.copytree(files('tests.resources.autodetect').joinpath('valid-course'), self.course)
+        self.task = os.path.join(self.course, "assignment", "task")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def validate(self, time_budget):
+        from access_cli_sealuzh.main import AccessValidator, Session, with_defaults
+        args = with_defaults(SimpleNamespace(directory=self.course, level="course",
+            recursive=True, verbose=False, debug=False, global_file=set(),
+            user=os.environ.get("DOCKER_USER", ""), run=0, test=1, test_solution=True,
+            grade_template=True, grade_solution=True, solve_command="cp -R solution/* task/",
+            history=self.history, time_budget=time_budget, jobs=2))
+        return AccessValidator(args, Session(args.jobs)).run()
+
+    def record(self, executions=(), results=None):
+        from access_cli_sealuzh.history import record
+        from access_cli_sealuzh.logger import Logger
+        logger = Logger()
+        logger.executions = [{"subject": subject, "command_type": command_type,
+            "solution": False, "docker_image": "python:latest", "command": "fake",
+            "returncode": 0, "timed_out": False, "cached": False, "usage": {"wall": wall}}
+            for subject, command_type, wall in executions]
+        logger.results = results or {}
+        record(self.history, [logger], self.course)
+
+    def test_parse_duration(self):
+        from access_cli_sealuzh.budget import parse_duration
+        self.assertEqual(600, parse_duration("600"))
+        self.assertEqual(90, parse_duration("90s"))
+        self.assertEqual(600, parse_duration("10m"))
+        self.assertEqual(5400, parse_duration("1h30m"))
+        for value in ["", "ten", "10x", "m"]:
+            with self.assertRaises(argparse.ArgumentTypeError):
+                parse_duration(value)
+
+    def test_value(self):
+        from access_cli_sealuzh.budget import Budget, CHANGED, FAILING, UNTESTED
+        other = os.path.join(self.course, "assignment", "task_2")
+        self.record([(self.task, "grade_command", 4.0), (other, "grade_command", 2.0)],
+                    {f"{self.task} (task-1)": ["failed"], f"{other} (task-2)": []})
+        source = os.path.join(self.task, "config.toml")
+        budget = Budget(600, self.history)
+        self.assertEqual(FAILING, budget.value(self.task, [source]))
+        self.assertEqual(0, budget.value(other, [source]))
+        self.assertEqual(UNTESTED, budget.value(os.path.join(self.course, "new"), []))
+        self.assertEqual(4.0, budget.estimate(self.task, "grade_command", False))
+        # unknown commands are estimated by the median of all known ones
+        self.assertEqual(4.0, budget.estimate(self.task, "run_command", False))
+        later = time.time() + 10
+        os.utime(source, (later, later))
+        self.assertEqual(CHANGED + FAILING, Budget(600, self.history).value(self.task, [source]))
+        changed = Budget(600, self.history, changed={os.path.join(other, "removed.py")})
+        self.assertEqual(CHANGED, changed.value(other, [source]))
+        self.assertEqual(FAILING, changed.value(self.task, [source]))
+
+    def test_within_budget(self):
+        logger = self.validate(600)
+        self.assertEqual(5, len(logger.executions))
+        self.assertEqual([], logger.skipped)
+
+    def test_budget_used_up(self):
+        logger = self.validate(0.001)
+        # skipped checks are no errors, but listed
+        self.assertEqual({}, logger.error_results())
+        self.assertEqual([], logger.executions)
+        self.assertEqual(["run_command", "test_command", "test_command on solution",
+                          "grade_command on template", "grade_command on solution"],
+                         [check["check"] for check in logger.skipped])
+        from access_cli_sealuzh.report import build_report
+        self.assertEqual(5, len(build_report([logger])["skipped"]))
+
+    def test_order_by_value(self):
+        self.record([(self.task, "grade_command", 1.0), (self.task, "run_command", 3.0),
+                     (self.task, "test_command", 2.0)])
+        logger = self.validate(600)
+        # equally valuable checks by increasing estimated cost, where checks on
+        # the solution are estimated by the median of the recorded durations
+        self.assertEqual([("grade_command", False), ("test_command", False), ("test_command", True),
+                          ("grade_command", True), ("run_command", False)],
+                         [(e["command_type"], e["solution"]) for e in logger.executions])
+
+if __name__ == '__main__':
+    unittest.main()
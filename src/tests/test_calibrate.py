@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+
+import unittest
+import os
+import tempfile
+
+CONFIG = """slug = "task"
+
+[evaluator]
+docker_image = "python:latest"
+run_command = "python script.py"
+"""
+
+class CalibrationTests(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "config.toml")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, content):
+        with open(self.path, "w") as f:
+            f.write(content)
+
+    def read(self):
+        import tomli
+        with open(self.path, "rb") as f:
+            return tomli.load(f)
+
+    def test_suggest(self):
+        from access_cli_sealuzh.calibrate import percentile, suggest
+        durations = [0.5] * 19 + [4.0]
+        self.assertEqual(0.5, percentile(durations, 0.95))
+        self.assertEqual(4.0, percentile(durations + [4.0], 0.95))
+        self.assertEqual(5, suggest([0.1, 0.2], 3))
+        self.assertEqual(8, suggest([2.1, 2.6, 2.5], 3))
+
+    def test_append_timeouts(self):
+        from access_cli_sealuzh.calibrate import write_timeouts
+        self.write(CONFIG)
+        self.assertTrue(write_timeouts(self.path, {"run_command": 5}))
+        config = self.read()
+        self.assertEqual({"run_command": 5}, config["evaluator"]["timeout"])
+        self.assertEqual("python script.py", config["evaluator"]["run_command"])
+
+    def test_replace_timeouts(self):
+        from access_cli_sealuzh.calibrate import write_timeouts
+        self.write(CONFIG + "\n[evaluator.timeout]\nrun_command = 30\n\n[files]\nvisible = []\n")
+        self.assertTrue(write_timeouts(self.path, {"run_command": 6, "grade_command": 9}))
+        config = self.read()
+        self.assertEqual({"run_command": 6, "grade_command": 9}, config["evaluator"]["timeout"])
+        self.assertEqual({"visible": []}, config["files"])
+
+    def test_inline_timeouts_are_kept(self):
+        from access_cli_sealuzh.calibrate import write_timeouts
+        self.write(CONFIG + "timeout = { run_command = 30 }\n")
+        self.assertFalse(write_timeouts(self.path, {"run_command": 6}))
+        self.assertEqual({"run_command": 30}, self.read()["evaluator"]["timeout"])
+
+    def test_timeout_schema(self):
+        from cerberus import Validator
+        from access_cli_sealuzh.schema import task_schema
+        v = Validator(task_schema["evaluator"]["schema"])
+        self.assertTrue(v.validate({"docker_image": "python", "timeout": {"grade_command": 60}}))
+        self.assertFalse(v.validate({"docker_image": "python", "timeout": {"grade_command": 0}}))
+        self.assertFalse(v.validate({"docker_image": "python", "timeout": {"solve": 3}}))
@@ -2,14 +2,16 @@
 
 import unittest
 import os
+import shutil
+import tempfile
 from types import SimpleNamespace
 from importlib.resources import files
 
 class CommandExecutionTests(unittest.TestCase):
 
-    def validator(self, directory, commands, global_file=None, course_root=None):
+    def validator(self, directory, commands, global_file=None, course_root=None, jobs=1):
         if global_file is None: global_file=set()
-        from access_cli_sealuzh.main import AccessValidator
+        from access_cli_sealuzh.main import AccessValidator, Session
         args = SimpleNamespace(directory=str(directory), execute=True, verbose=False,
                                global_file=global_file, course_root=course_root,
                                run=0 if "run" in commands else None, user=os.environ.get("DOCKER_USER", ""),
@@ -17,9 +19,10 @@ class CommandExecutionTests(unittest.TestCase):
                                test_solution=True if "test_solution" in commands else False,
                                grade_template=True if "template" in commands else False,
                                grade_solution=True if "solution" in commands else False,
+                               grade_variants=True if "variants" in commands else False,
                                solve_command = "cp solution.py script.py",
                                level="task", recursive=False)
-        return AccessValidator(args)
+        return AccessValidator(args, Session(jobs))
 
     def test_valid_config(self):
         validator = self.validator(files('tests.resources.execute').joinpath('valid'),
@@ -33,6 +36,16 @@ class CommandExecutionTests(unittest.TestCase):
         errors = validator.run().error_list()
         self.assertEqual(0, len(errors))
 
+    def test_executions_recorded(self):
+        validator = self.validator(files('tests.resources.execute').joinpath('valid'),
+          ["run", "test", "test_solution", "template", "solution"], jobs=2)
+        validator.args.usage = True
+        executions = validator.run().executions
+        self.assertEqual(["run_command", "test_command", "test_command", "grade_command", "grade_command"],
+                         [e["command_type"] for e in executions])
+        self.assertEqual([False, False, True, False, True], [e["solution"] for e in executions])
+        self.assertTrue(all("wall" in e["usage"] for e in executions))
+
     def test_global_file(self):
         validator = self.validator(files('tests.resources.execute.global-file.as').joinpath('task'),
           ["template"], global_file=["universal/harness.py"],
@@ -40,6 +53,38 @@ class CommandExecutionTests(unittest.TestCase):
         errors = validator.run().error_list()
         self.assertEqual(0, len(errors))
 
+    def test_global_file_without_grading_files(self):
+        # global files are staged once per grading execution, also for tasks
+        # without grading files of their own
+        validator = self.validator(files('tests.resources.execute.global-file.as').joinpath('task'),
+          ["template"], global_file=["universal/harness.py"],
+          course_root=str(files('tests.resources.execute').joinpath('global-file')))
+        config = validator.read_config(os.path.join(validator.args.directory, "config.toml"))
+        config["files"]["grading"] = []
+        with tempfile.TemporaryDirectory() as workspace:
+            validator.stage_files(validator.args.directory, config, "grade_command", workspace)
+            self.assertTrue(os.path.isfile(os.path.join(workspace, "universal", "harness.py")))
+        with tempfile.TemporaryDirectory() as workspace:
+            validator.stage_files(validator.args.directory, config, "run_command", workspace)
+            self.assertFalse(os.path.exists(os.path.join(workspace, "universal")))
+
+    def test_result_cache(self):
+        from access_cli_sealuzh.executor import Executor, ExecutionResult
+        executor = Executor()
+        executor.cache_size = 2
+        executed = []
+        def execute(workspace, docker_image, command, *args):
+            executed.append(command)
+            return ExecutionResult(125 if command == "fail" else 0, failed=command == "fail")
+        executor.execute = execute
+        with tempfile.TemporaryDirectory() as workspace:
+            for command in ["a", "b", "a", "c", "b", "fail", "fail"]:
+                executor.run(workspace, "python:latest", command)
+        # "b" was the least recently used when "c" was added, failures are
+        # never cached
+        self.assertEqual(["a", "b", "c", "b", "fail", "fail"], executed)
+        self.assertEqual(2, len(executor.cache))
+
     def test_invalid_run_command(self):
         validator = self.validator(
             files('tests.resources.execute').joinpath('run-command-returns-nonzero'),
@@ -48,6 +93,14 @@ class CommandExecutionTests(unittest.TestCase):
         self.assertEqual(1, len(errors))
         self.assertIn("Expected returncode 0 but got ", errors[0])
 
+    def test_configured_timeout(self):
+        validator = self.validator(
+            files('tests.resources.execute').joinpath('run-command-times-out'),
+            ["run"])
+        errors = validator.run().error_list()
+        self.assertEqual(1, len(errors))
+        self.assertIn("Timeout during execution", errors[0])
+
     def test_test_template_succeeds(self):
         validator = self.validator(
             files('tests.resources.execute').joinpath('test-on-template-returns-zero'),
@@ -80,3 +133,40 @@ class CommandExecutionTests(unittest.TestCase):
         self.assertEqual(1, len(errors))
         self.assertIn("1 points awarded instead of expected 2", errors[0])
 
+    def test_parallel_jobs(self):
+        validator = self.validator(
+            files('tests.resources.execute').joinpath('grading-gives-points-for-template'),
+            ["run", "test", "test_solution", "template", "solution"], jobs=3)
+        errors = validator.run().error_list()
+        self.assertEqual(1, len(errors))
+        self.assertIn("1 points awarded instead of expected 0", errors[0])
+
+    def test_variants(self):
+        validator = self.validator(files('tests.resources.execute').joinpath('variants'),
+          ["template", "solution", "variants"], jobs=4)
+        logger = validator.run()
+        self.assertEqual([], logger.error_list())
+        self.assertEqual([0, 2, 1, 0], [e["points"] for e in logger.executions])
+
+    def test_variant_points_mismatch(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            task = os.path.join(tmp, "variants")
+            shutil.copytree(files('tests.resources.execute').joinpath('variants'), task)
+            with open(os.path.join(task, "config.toml")) as f:
+                config = f.read()
+            with open(os.path.join(task, "config.toml"), "w") as f:
+                f.write(config.replace('name = "wrong"\npoints = 0', 'name = "wrong"\npoints = 1'))
+            validator = self.validator(task, ["variants"], jobs=2)
+            errors = validator.run().error_list()
+        self.assertEqual(1, len(errors))
+        self.assertIn("variant wrong: 0 points awarded instead of expected 1", errors[0])
+
+    def test_variant_without_directory(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            task = os.path.join(tmp, "variants")
+            shutil.copytree(files('tests.resources.execute').joinpath('variants'), task)
+            shutil.rmtree(os.path.join(task, "variants"))
+            validator = self.validator(task, ["variants"])
+            errors = validator.run().error_list()
+        self.assertEqual(1, len(errors))
+        self.assertIn("variant literal references non-existing directory variants/literal", errors[0])
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+
+import unittest
+import os
+import tempfile
+from importlib.resources import files
+
+class CourseModelTests(unittest.TestCase):
+
+    def model(self, directory, level, global_file=None, course_root=None):
+        if global_file is None: global_file=set()
+        from access_cli_sealuzh.model import CourseModel
+        return CourseModel.build(str(directory), level, global_file, course_root)
+
+    def test_course_structure(self):
+        model = self.model(files('tests.resources.autodetect').joinpath('valid-course'), "course")
+        self.assertEqual("course", model.nodes["."]["kind"])
+        self.assertEqual(["assignment"], model.nodes["."]["children"])
+        self.assertEqual(["assignment/task"], model.nodes["assignment"]["children"])
+        self.assertEqual(["assignment/task"], [t["path"] for t in model.tasks()])
+
+    def test_tasks_using_image(self):
+        model = self.model(files('tests.resources.autodetect').joinpath('valid-course'), "course")
+        self.assertEqual(1, len(model.tasks_using_image("python:latest")))
+        self.assertEqual(0, len(model.tasks_using_image("python:3.12")))
+
+    def test_tasks_depending_on_file(self):
+        model = self.model(files('tests.resources.autodetect').joinpath('valid-course'), "course")
+        self.assertEqual(1, len(model.tasks_depending_on("universal/harness.py")))
+        self.assertEqual(1, len(model.tasks_depending_on("assignment/task/grading/tests.py")))
+        self.assertEqual(0, len(model.tasks_depending_on("assignment/task/missing.py")))
+
+    def test_global_file_relative_to_course_root(self):
+        model = self.model(files('tests.resources.execute.global-file.as').joinpath('task'), "task",
+            global_file={"universal/harness.py"},
+            course_root=str(files('tests.resources.execute').joinpath('global-file')))
+        self.assertEqual(["../../universal/harness.py"], model.files_of(".", ["grading"])[-1:])
+
+    def test_save_and_load(self):
+        from access_cli_sealuzh.model import CourseModel
+        model = self.model(files('tests.resources.recursive').joinpath('valid'), "course")
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "model.json")
+            model.save(path)
+            loaded = CourseModel.load(path)
+        self.assertEqual(model.to_dict(), loaded.to_dict())
+
+    def test_missing_config_is_skipped(self):
+        model = self.model(files('tests.resources.course').joinpath('invalid-assignments'), "course")
+        self.assertEqual([], model.nodes["."]["children"])
+        self.assertEqual(["."], list(model.nodes))
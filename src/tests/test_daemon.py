@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+
+import unittest
+import io
+import os
+import tempfile
+import threading
+import contextlib
+from argparse import Namespace
+from importlib.resources import files
+
+class DaemonTests(unittest.TestCase):
+
+    def setUp(self):
+        from access_cli_sealuzh.daemon import ValidationServer
+        self.tmp = tempfile.TemporaryDirectory()
+        self.socket = os.path.join(self.tmp.name, "access-cli.sock")
+        self.server = ValidationServer(self.socket)
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+        self.tmp.cleanup()
+
+    def args(self, directory, level="task"):
+        return Namespace(directory=str(directory), level=level, auto_detect=False,
+                         global_file=set(), course_root=None, user=None,
+                         run=None, test=None, test_solution=None,
+                         grade_template=None, grade_solution=None,
+                         solve_command=None, verbose=False, debug=False,
+                         recursive=None, dump_model=None, socket=self.socket)
+
+    def in_process(self, args):
+        from access_cli_sealuzh import validate
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            returncode = validate(args)
+        return returncode, out.getvalue()
+
+    def forwarded(self, args):
+        from access_cli_sealuzh.daemon import forward
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            returncode = forward(args, self.socket, required=True)
+        return returncode, out.getvalue()
+
+    def test_valid_task(self):
+        directory = files('tests.resources.task').joinpath('valid')
+        expected = self.in_process(self.args(directory))
+        self.assertEqual(0, expected[0])
+        self.assertEqual(expected, self.forwarded(self.args(directory)))
+        # second run is served from the daemon's warm caches
+        self.assertEqual(expected, self.forwarded(self.args(directory)))
+
+    def test_invalid_task(self):
+        directory = files('tests.resources.task').joinpath('missing-file')
+        expected = self.in_process(self.args(directory))
+        self.assertEqual(1, expected[0])
+        self.assertEqual(expected, self.forwarded(self.args(directory)))
+
+    def test_relative_directory(self):
+        directory = files('tests.resources.recursive').joinpath('valid')
+        cwd = os.getcwd()
+        try:
+            os.chdir(str(directory))
+            args = self.args(".", level="course")
+            args.recursive = True
+            expected = self.in_process(args)
+            self.assertEqual(expected, self.forwarded(args))
+        finally:
+            os.chdir(cwd)
+
+    def test_jobs(self):
+        import json
+        from benchmarks import fake_docker
+        from benchmarks.generate import generate_course
+        course = os.path.join(self.tmp.name, "course")
+        generate_course(course, assignments=1, tasks=4)
+        bin_dir = os.path.join(self.tmp.name, "bin")
+        os.mkdir(bin_dir)
+        log = os.path.join(self.tmp.name, "log.jsonl")
+        environment = dict(os.environ)
+        try:
+            fake_docker.install(bin_dir)
+            os.environ.update(FAKE_DOCKER_STATE=os.path.join(self.tmp.name, "state"),
+                              FAKE_DOCKER_LOG=log, FAKE_DOCKER_LATENCY="0.5")
+            args = self.args(course, level="course")
+            args.recursive = True
+            args.run = 0
+            args.jobs = 4
+            returncode, out = self.forwarded(args)
+        finally:
+            os.environ.clear()
+            os.environ.update(environment)
+        self.assertEqual(0, returncode, out)
+        with open(log) as f:
+            started = sorted(json.loads(line)["started"] for line in f)
+        self.assertEqual(4, len(started))
+        # with -j 4, the commands of the tasks overlapped rather than ran one
+        # after another
+        self.assertLess(started[-1] - started[0], 0.5)
+
+    def test_request_session(self):
+        session = self.server.session
+        session.executor.images["python:latest"] = "sha256:old"
+        request = session.for_request(4)
+        self.assertIs(session.validators, request.validators)
+        self.assertIs(session.configs, request.configs)
+        # images may have been pulled or rebuilt since, results are not shared
+        self.assertEqual({}, request.executor.images)
+        self.assertIsNot(session.executor.cache, request.executor.cache)
+        self.assertEqual(4, request.executor.jobs)
+
+    def test_socket_permissions(self):
+        import stat
+        import socket
+        from access_cli_sealuzh.daemon import peer_uid
+        self.assertEqual(0o600, stat.S_IMODE(os.stat(self.socket).st_mode))
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.connect(self.socket)
+            self.assertIn(peer_uid(sock), (None, os.getuid()))
+
+    def test_no_daemon(self):
+        from access_cli_sealuzh.daemon import forward
+        missing = os.path.join(self.tmp.name, "missing.sock")
+        self.assertIsNone(forward(self.args("."), missing))
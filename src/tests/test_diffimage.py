@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+
+import unittest
+import io
+import os
+import json
+import tempfile
+import contextlib
+from importlib.resources import files
+
+class DiffImageTests(unittest.TestCase):
+
+    def test_compare(self):
+        from access_cli_sealuzh.diffimage import compare
+        old = {"returncode": 0, "points": 2, "timed_out": False, "output": "Ran 2 tests"}
+        new = {"returncode": 1, "points": 2, "timed_out": False, "output": "ImportError"}
+        self.assertEqual([("returncode", 0, 1)], compare(old, new))
+        self.assertEqual([("returncode", 0, 1), ("output", "Ran 2 tests", "ImportError")],
+                         compare(old, new, output=True))
+        self.assertEqual([("returncode", 0, None), ("points", 2, None), ("timed_out", False, None)],
+                         compare(old, {}))
+
+    def test_checks(self):
+        from access_cli_sealuzh.diffimage import checks
+        config = {"evaluator": {"run_command": "python script.py", "grade_command": "python grading.py"},
+                  "variants": [{"name": "half", "points": 1, "directory": "half"}]}
+        self.assertEqual([("run_command", "run_command", {}),
+                          ("grade_command", "grade_command", {}),
+                          ("grade_command on solution", "grade_command", {"solve_command": "solve"}),
+                          ("grade_command on variant half", "grade_command",
+                           {"submission": os.path.join("task", "half"), "solve_command": None})],
+                         checks("task", config, "solve"))
+
+    def test_diff_image(self):
+        from access_cli_sealuzh.diffimage import main
+        task = files('tests.resources.execute').joinpath('variants')
+        with tempfile.TemporaryDirectory() as tmp:
+            report = os.path.join(tmp, "report.json")
+            arguments = ["--from", "python:latest", "--to", "python:3.12", "-d", str(task),
+                "-C", str(files('tests.resources').joinpath('execute')), "-j", "4",
+                "-s", "cp solution.py script.py", "-u", os.environ.get("DOCKER_USER", ""),
+                "--cache", os.path.join(tmp, "cache"), "--report", report]
+            summaries = []
+            for run in range(3):
+                out = io.StringIO()
+                with contextlib.redirect_stdout(out):
+                    # the third run starts from an empty cache
+                    returncode = main(arguments + (["--clear-cache"] if run == 2 else []))
+                self.assertEqual(0, returncode, out.getvalue())
+                with open(report) as f:
+                    summaries.append(json.load(f))
+        self.assertEqual(7, summaries[0]["checks"])
+        self.assertEqual([], summaries[0]["differences"])
+        self.assertEqual({"python:latest": 0, "python:3.12": 0}, summaries[0]["cached"])
+        # the second run is answered from the persistent result cache
+        self.assertEqual({"python:latest": 7, "python:3.12": 7}, summaries[1]["cached"])
+        self.assertEqual({"python:latest": 0, "python:3.12": 0}, summaries[2]["cached"])
+
+    def diff_with_docker(self, tmp, script):
+        """Run diff-image on a valid task with docker replaced by script"""
+        from access_cli_sealuzh.diffimage import main
+        path = os.environ["PATH"]
+        with open(os.path.join(tmp, "docker"), "w") as f:
+            f.write("#!/bin/sh\n" + script)
+        os.chmod(os.path.join(tmp, "docker"), 0o755)
+        os.environ["PATH"] = tmp + os.pathsep + path
+        try:
+            out = io.StringIO()
+            with contextlib.redirect_stdout(out):
+                returncode = main(["--from", "python:latest", "--to", "python:3.12",
+                    "-d", str(files('tests.resources.execute').joinpath('valid')),
+                    "-C", str(files('tests.resources').joinpath('execute')),
+                    "--cache", os.path.join(tmp, "cache")])
+        finally:
+            os.environ["PATH"] = path
+        return returncode, out.getvalue()
+
+    def test_unknown_image(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            # docker works, but the images can neither be inspected nor pulled
+            returncode, out = self.diff_with_docker(tmp,
+                'case "$1" in image|pull) exit 1;; esac\nexit 0\n')
+            self.assertEqual(1, returncode)
+            self.assertIn("Could not pull or inspect python:latest, python:3.12", out)
+            self.assertFalse(os.path.exists(os.path.join(tmp, "cache")))
+
+    def test_nothing_executed(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            returncode, out = self.diff_with_docker(tmp,
+                'case "$1" in\n'
+                '  image) echo "sha256:$5";;\n'
+                '  create) echo "Error response from daemon: no space left" >&2; exit 1;;\n'
+                'esac\nexit 0\n')
+            self.assertEqual(1, returncode)
+            self.assertIn("0 differences", out)
+            self.assertIn("docker failed: Error response from daemon: no space left", out)
+
+    def test_persistent_cache_needs_image_id(self):
+        from access_cli_sealuzh.executor import Executor, ExecutionResult
+        with tempfile.TemporaryDirectory() as tmp:
+            executor = Executor()
+            executor.cache_directory = os.path.join(tmp, "cache")
+            executor.execute = lambda *args: ExecutionResult(0)
+            workspace = os.path.join(tmp, "workspace")
+            os.mkdir(workspace)
+            executor.run(workspace, "python:latest", "python script.py")
+            self.assertFalse(os.path.exists(executor.cache_directory))
+            executor.images["python:latest"] = "sha256:1234"
+            executor.run(workspace, "python:latest", "python script.py")
+            self.assertTrue(os.path.exists(executor.cache_directory))
+
+    def test_prune_results(self):
+        import time
+        from access_cli_sealuzh.executor import Executor, ExecutionResult
+        with tempfile.TemporaryDirectory() as tmp:
+            executor = Executor()
+            executor.cache_directory = os.path.join(tmp, "cache")
+            executor.images["python:latest"] = "sha256:1234"
+            executor.execute = lambda *args: ExecutionResult(0)
+            workspace = os.path.join(tmp, "workspace")
+            os.mkdir(workspace)
+            executor.run(workspace, "python:latest", "python old.py")
+            executor.run(workspace, "python:latest", "python used.py")
+            week = time.time() - 7 * 24 * 60 * 60
+            for root, dirs, names in os.walk(executor.cache_directory):
+                for name in names:
+                    os.utime(os.path.join(root, name), (week, week))
+            # using a result keeps it
+            executor.cache.clear()
+            self.assertTrue(executor.run(workspace, "python:latest", "python used.py").cached)
+            self.assertEqual(1, executor.prune_results(24 * 60 * 60))
+            self.assertEqual(0, executor.prune_results(24 * 60 * 60))
+            executor.cache.clear()
+            self.assertTrue(executor.run(workspace, "python:latest", "python used.py").cached)
+            self.assertFalse(executor.run(workspace, "python:latest", "python old.py").cached)
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+
+import unittest
+import io
+import os
+import shutil
+import tarfile
+import zipfile
+import tempfile
+import contextlib
+from argparse import Namespace
+from types import SimpleNamespace
+from importlib.resources import files
+
+class FileSystemTests(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.course = os.path.join(self.tmp.name, "course")
+        shutil.copytree(files('tests.resources.autodetect').joinpath('valid-course'), self.course)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def archive(self, name, top=None):
+        """Archive the course (within the directory top, if given)"""
+        path = os.path.join(self.tmp.name, name)
+        members = []
+        for root, dirs, names in os.walk(self.course):
+            for file in names:
+                source = os.path.join(root, file)
+                member = os.path.relpath(source, self.course)
+                members.append((source, os.path.join(top, member) if top else member))
+        if name.endswith(".zip"):
+            with zipfile.ZipFile(path, "w") as archive:
+                for source, member in members:
+                    archive.write(source, member)
+        else:
+            with tarfile.open(path, "w:gz") as archive:
+                for source, member in members:
+                    archive.add(source, member)
+        return path
+
+    def validate(self, directory, execute=False):
+        from access_cli_sealuzh.main import AccessValidator, Session, with_defaults
+        args = with_defaults(SimpleNamespace(directory=directory, level="course",
+            recursive=True, verbose=False, debug=False, global_file=set(),
+            user=os.environ.get("DOCKER_USER", ""), run=0 if execute else None,
+            test=1 if execute else None, test_solution=False, grade_template=False,
+            grade_solution=False, solve_command=None, jobs=2))
+        return AccessValidator(args, Session(args.jobs)).run()
+
+    def results(self, logger, directory):
+        return {subject.replace(directory, "<course>"): [m.replace(directory, "<course>")
+                for m in messages] for subject, messages in logger.results.items()}
+
+    def test_archive_fs(self):
+        from access_cli_sealuzh.filesystem import ArchiveFS, open_filesystem, LocalFS
+        path = self.archive("course.zip", top="valid-course")
+        fs = open_filesystem(path)
+        self.assertIsInstance(fs, ArchiveFS)
+        self.assertIsInstance(open_filesystem(self.course), LocalFS)
+        self.assertTrue(fs.isfile(os.path.join(path, "config.toml")))
+        self.assertTrue(fs.isdir(os.path.join(path, "assignment", "task")))
+        self.assertFalse(fs.isfile(os.path.join(path, "assignment", "task")))
+        self.assertFalse(fs.exists(os.path.join(path, "missing")))
+        # outside the archive
+        self.assertTrue(fs.isdir(self.course))
+        with fs.open(os.path.join(path, "assignment", "config.toml")) as f, \
+             open(os.path.join(self.course, "assignment", "config.toml"), "rb") as g:
+            self.assertEqual(g.read(), f.read())
+        with self.assertRaises(FileNotFoundError):
+            fs.open(os.path.join(path, "missing"))
+        walked = sorted(os.path.relpath(os.path.join(root, name), path)
+                        for root, dirs, names in fs.walk(path) for name in names)
+        expected = sorted(os.path.relpath(os.path.join(root, name), self.course)
+                          for root, dirs, names in os.walk(self.course) for name in names)
+        self.assertEqual(expected, walked)
+
+    def test_validate_archives(self):
+        os.remove(os.path.join(self.course, "assignment", "task", "instructions_en.md"))
+        expected = self.results(self.validate(self.course), self.course)
+        self.assertEqual(1, len([m for m in expected.values() if m]))
+        for name in ["course.zip", "course.tar.gz"]:
+            with self.subTest(name):
+                path = self.archive(name)
+                self.assertEqual(expected, self.results(self.validate(path), path))
+
+    def test_execute_from_archive(self):
+        path = self.archive("course.tar.gz", top="course")
+        expected = self.validate(self.course, execute=True)
+        logger = self.validate(path, execute=True)
+        self.assertEqual(self.results(expected, self.course), self.results(logger, path))
+        self.assertEqual([(e["command_type"], e["returncode"]) for e in expected.executions],
+                         [(e["command_type"], e["returncode"]) for e in logger.executions])
+    def test_autodetect_in_archive(self):
+        from access_cli_sealuzh import validate
+        for name, top in [("course.zip", None), ("course.tar.gz", "course")]:
+            with self.subTest(name):
+                path = self.archive(name, top=top)
+                args = Namespace(directory=os.path.join(path, "assignment", "task"), level=None,
+                    auto_detect=True, global_file=set(), course_root=None,
+                    user=os.environ.get("DOCKER_USER", ""), run=0, test=1, test_solution=None,
+                    grade_template=False, grade_solution=None, grade_variants=None,
+                    solve_command=None, verbose=False, debug=False, recursive=None)
+                out = io.StringIO()
+                with contextlib.redirect_stdout(out):
+                    returncode = validate(args)
+                self.assertEqual(0, returncode, out.getvalue())
+                self.assertEqual("task", args.level)
+                self.assertEqual(path, str(args.course_root))
+                self.assertEqual({"universal/harness.py"}, args.global_file)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+
+import unittest
+import io
+import os
+import shutil
+import tempfile
+import contextlib
+import subprocess
+from argparse import Namespace
+from importlib.resources import files
+
+class GitFSTests(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.repository = os.path.join(self.tmp.name, "repository")
+        self.course = os.path.join(self.repository, "course")
+        shutil.copytree(files('tests.resources.autodetect').joinpath('valid-course'), self.course)
+        self.git("init", "-q")
+        self.commit("v1")
+        # v2 references an instructions file which does not exist
+        os.remove(os.path.join(self.course, "assignment", "task", "instructions_en.md"))
+        self.commit("v2")
+        # the working tree is neither checked out at v1 nor at v2
+        shutil.rmtree(self.course)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def git(self, *args):
+        return subprocess.check_output(["git", "-C", self.repository, "-c", "user.name=test",
+            "-c", "user.email=test@example.com", *args], text=True)
+
+    def commit(self, tag):
+        self.git("add", "-A")
+        self.git("commit", "-q", "-m", tag)
+        self.git("tag", tag)
+
+    def test_read_revision(self):
+        from access_cli_sealuzh.main import Session
+        from access_cli_sealuzh.gitfs import revision_filesystem, close_repositories
+        session = Session()
+        fs = revision_filesystem(session, self.course, "v1")
+        course = fs.mounted(self.course)
+        top = self.git("rev-parse", "--show-toplevel").strip()
+        self.assertEqual(os.path.join(top + "@v1", "course"), course)
+        self.assertTrue(fs.isfile(os.path.join(course, "assignment", "task", "instructions_en.md")))
+        self.assertTrue(fs.isdir(os.path.join(course, "assignment")))
+        with fs.open(os.path.join(course, "config.toml")) as f:
+            self.assertIn(b"access-mock-course", f.read())
+        v2 = revision_filesystem(session, self.course, "v2")
+        self.assertFalse(v2.isfile(os.path.join(v2.mounted(self.course), "assignment", "task",
+                                                "instructions_en.md")))
+        # unchanged files are read once for both revisions
+        with v2.open(os.path.join(v2.mounted(self.course), "config.toml")) as f:
+            self.assertIn(b"access-mock-course", f.read())
+        self.assertEqual((1, 1), (session.blobs.hits, session.blobs.misses))
+        self.assertIsNone(revision_filesystem(session, self.course, "v3"))
+        close_repositories(session)
+
+    def test_revisions_with_slashes(self):
+        from access_cli_sealuzh.main import Session
+        from access_cli_sealuzh.gitfs import revision_filesystem, close_repositories
+        self.git("branch", "v1/next", "v2")
+        session = Session()
+        v1 = revision_filesystem(session, self.course, "v1")
+        next = revision_filesystem(session, self.course, "v1/next")
+        top = self.git("rev-parse", "--show-toplevel").strip()
+        self.assertEqual(top + "@v1%2Fnext", next.path)
+        # neither revision is mounted within the other
+        instructions = os.path.join("assignment", "task", "instructions_en.md")
+        self.assertIsNone(v1.name(next.mounted(self.course)))
+        self.assertIs(next, session.filesystem(next.mounted(self.course)))
+        self.assertTrue(session.filesystem(v1.mounted(self.course)).isfile(
+            os.path.join(v1.mounted(self.course), instructions)))
+        self.assertFalse(session.filesystem(next.mounted(self.course)).isfile(
+            os.path.join(next.mounted(self.course), instructions)))
+        close_repositories(session)
+
+    def test_blob_cache_eviction(self):
+        from access_cli_sealuzh.gitfs import BlobCache
+        cache = BlobCache(limit=4)
+        read = lambda blob: blob.encode()
+        for blob in ["ab", "cd", "ef", "ab"]:
+            cache.get(blob, read)
+        self.assertEqual(["ef", "ab"], list(cache.contents))
+        self.assertEqual(4, cache.size)
+
+    def test_validate_revisions(self):
+        from access_cli_sealuzh import validate
+        args = Namespace(directory=self.course, level=None, auto_detect=True,
+                         global_file=set(), course_root=None, user=os.environ.get("DOCKER_USER", ""),
+                         run=0, test=1, test_solution=None, grade_template=False,
+                         grade_solution=None, grade_variants=None, solve_command=None,
+                         verbose=False, debug=False, recursive=None, rev=["v1", "v2"])
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            returncode = validate(args)
+        out = out.getvalue()
+        self.assertEqual(1, returncode, out)
+        self.assertIn("❰ v1: Validation successful ❱", out)
+        self.assertIn("❰ v2: Validation failed ❱", out)
+        self.assertIn("references non-existing instructions_en.md", out)
+        self.assertIn("❰ 1 of 2 revisions passed validation ❱", out)
+    def test_autodetect_revisions(self):
+        from access_cli_sealuzh import validate
+        top = self.git("rev-parse", "--show-toplevel").strip()
+        for level, directory in [("assignment", os.path.join(self.course, "assignment")),
+                                 ("task", os.path.join(self.course, "assignment", "task"))]:
+            with self.subTest(level):
+                args = Namespace(directory=directory, level=None, auto_detect=True,
+                    global_file=set(), course_root=None, user=os.environ.get("DOCKER_USER", ""),
+                    run=0, test=1, test_solution=None, grade_template=False,
+                    grade_solution=None, grade_variants=None, solve_command=None,
+                    verbose=False, debug=False, recursive=None, rev=["v1"])
+                out = io.StringIO()
+                with contextlib.redirect_stdout(out):
+                    returncode = validate(args)
+                self.assertEqual(0, returncode, out.getvalue())
+                self.assertIn("❰ 1 of 1 revisions passed validation ❱", out.getvalue())
+                # the course config was read from the revision, the working
+                # tree does not contain the course at all
+                self.assertIn(f"{top}@v1", out.getvalue())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+
+import unittest
+import io
+import os
+import tempfile
+import contextlib
+
+class HistoryTests(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "history.sqlite")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def logger(self, wall, cached=False, variant=None, submission=None):
+        from access_cli_sealuzh.logger import Logger
+        logger = Logger()
+        logger.set_subject("course/task")
+        logger.executions.append({"subject": "course/task", "command_type": "grade_command",
+            "solution": True, "docker_image": "python:latest", "command": "python grade.py",
+            "returncode": 0, "timed_out": False, "cached": cached,
+            "usage": {"wall": wall, "cpu": wall / 2},
+            "variant": variant, "submission": submission})
+        return logger
+
+    def history(self, *argv):
+        from access_cli_sealuzh.history import main
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            returncode = main(["--history", self.path, *argv])
+        return returncode, out.getvalue()
+
+    def test_record(self):
+        from access_cli_sealuzh.history import record, connect, durations
+        record(self.path, [self.logger(1.0)], ".")
+        record(self.path, [self.logger(1.5), self.logger(0.0, cached=True)], ".")
+        connection = connect(self.path)
+        series = durations(connection)
+        connection.close()
+        self.assertEqual([[1.0, 1.5]], list(series.values()))
+        key, = series
+        self.assertEqual(("grade_command", True), key[1:])
+
+    def test_variants_not_in_series(self):
+        from access_cli_sealuzh.history import record, connect, durations
+        record(self.path, [self.logger(1.0), self.logger(9.0, variant="slow"),
+                           self.logger(5.0, submission="course/task/variants/half")], ".")
+        connection = connect(self.path)
+        self.assertEqual([[1.0]], list(durations(connection).values()))
+        variants = {row[0] for row in connection.execute("SELECT variant FROM executions")}
+        connection.close()
+        self.assertEqual({"", "slow", os.path.abspath("course/task/variants/half")}, variants)
+
+    def test_upgrade_database(self):
+        import sqlite3
+        from access_cli_sealuzh.history import record, connect, durations
+        connection = sqlite3.connect(self.path)
+        connection.executescript("""CREATE TABLE executions (run INTEGER, subject TEXT,
+            command_type TEXT, solution INTEGER, docker_image TEXT, command TEXT,
+            returncode INTEGER, timed_out INTEGER, cached INTEGER, wall REAL, cpu REAL,
+            memory INTEGER, io_read INTEGER, io_write INTEGER)""")
+        connection.execute("INSERT INTO executions VALUES (0, ?, 'grade_command', 1, NULL, NULL, 0, 0, 0, 2.0, NULL, NULL, NULL, NULL)",
+                           (os.path.abspath("course/task"),))
+        connection.commit()
+        connection.close()
+        record(self.path, [self.logger(1.0)], ".")
+        connection = connect(self.path)
+        self.assertEqual([[2.0, 1.0]], list(durations(connection).values()))
+        connection.close()
+
+    def test_regression(self):
+        from access_cli_sealuzh.history import regression
+        self.assertIsNone(regression([1.0]))
+        self.assertIsNone(regression([1.0, 1.2, 0.9, 1.4]))
+        self.assertAlmostEqual(2.0, regression([1.0, 1.2, 0.8, 2.0]))
+        # only the window of previous runs forms the baseline
+        self.assertIsNone(regression([0.1, 0.1, 2.0, 2.0, 2.5], window=2))
+
+    def test_command(self):
+        from access_cli_sealuzh.history import record
+        for wall in [1.0, 1.1, 0.9]:
+            record(self.path, [self.logger(wall)], ".")
+        returncode, out = self.history()
+        self.assertEqual(0, returncode)
+        self.assertIn("grade_command on solution: 1.00 1.10 0.90", out)
+        record(self.path, [self.logger(3.0)], ".")
+        returncode, out = self.history("--regressions")
+        self.assertEqual(1, returncode)
+        self.assertIn("3.00x baseline", out)
+
+    def test_no_history(self):
+        returncode, out = self.history()
+        self.assertEqual(0, returncode)
+        self.assertIn("No history recorded", out)
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+
+import unittest
+import os
+import shutil
+import tempfile
+from types import SimpleNamespace
+from importlib.resources import files
+
+class JournalTests(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.journal = os.path.join(self.tmp.name, "journal.jsonl")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def validate(self, course, resume=False, execute=False):
+        from access_cli_sealuzh.main import AccessValidator, Session, with_defaults
+        args = with_defaults(SimpleNamespace(directory=course, level="course",
+            recursive=True, verbose=False, debug=False, global_file=set(),
+            user=os.environ.get("DOCKER_USER", ""), run=0 if execute else None,
+            test=1 if execute else None, test_solution=execute, grade_template=execute,
+            grade_solution=execute, solve_command="cp -R solution/* task/",
+            journal=self.journal, resume=resume, jobs=2))
+        return AccessValidator(args, Session(args.jobs)).run()
+
+    def entries(self):
+        with open(self.journal) as f:
+            return f.read().splitlines()
+
+    def test_resume_static(self):
+        from benchmarks.generate import generate_course
+        course = os.path.join(self.tmp.name, "course")
+        generate_course(course, assignments=2, tasks=2)
+        first = self.validate(course)
+        self.assertEqual(4, len(self.entries()))
+        with open(os.path.join(course, "assignment_2", "task_1", "grading", "tests0.py"), "a") as f:
+            f.write("# changed\n")
+        os.remove(os.path.join(course, "assignment_1", "task_2", "task", "module0.py"))
+        resumed = self.validate(course, resume=True)
+        # only the changed tasks were validated (and recorded) again
+        self.assertEqual(6, len(self.entries()))
+        errors = resumed.error_results()
+        self.assertEqual(1, len(errors))
+        self.assertIn("non-existing file: task/module0.py", list(errors.values())[0][0])
+        self.assertEqual(list(first.results), list(resumed.results))
+
+    def test_resume_executions(self):
+        course = os.path.join(self.tmp.name, "course")
+        shutil.copytree(files('tests.resources.autodetect').joinpath('valid-course'), course)
+        first = self.validate(course, execute=True)
+        self.assertEqual(5, len(first.executions))
+        resumed = self.validate(course, resume=True, execute=True)
+        self.assertEqual(1, len(self.entries()))
+        self.assertEqual(first.results, resumed.results)
+        self.assertEqual(first.executions, resumed.executions)
+
+    def test_interrupted_entry_is_ignored(self):
+        from access_cli_sealuzh.journal import Journal
+        with open(self.journal, "w") as f:
+            f.write('{"task": "/course/task", "key": "a"}\n{"task": "/course/other", "ke')
+        self.assertEqual(["/course/task"], list(Journal.load(self.journal)))
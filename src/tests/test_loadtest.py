@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+
+import unittest
+import io
+import os
+import json
+import shutil
+import tempfile
+import contextlib
+from importlib.resources import files
+
+class LoadTestTests(unittest.TestCase):
+
+    def job(self, name, points, timed_out=False):
+        from access_cli_sealuzh.pipeline import Job
+        job = Job(name, None)
+        job.started, job.finished = 0.0, 1.0
+        job.executions.append({"points": points, "timed_out": timed_out})
+        return job
+
+    def test_summarize(self):
+        from access_cli_sealuzh.loadtest import summarize
+        jobs = [self.job("template", 0), self.job("solution", 2), self.job("solution", 1),
+                self.job("sample", 1), self.job("template", None, timed_out=True)]
+        summary = summarize(jobs, {"template": 0, "solution": 2}, 2.5)
+        self.assertEqual(2.0, summary["throughput"])
+        self.assertEqual(1, summary["timeouts"])
+        self.assertTrue(summary["points"]["template"]["consistent"])
+        self.assertFalse(summary["points"]["solution"]["consistent"])
+        self.assertEqual([1, 2], summary["points"]["solution"]["points"])
+        self.assertTrue(summary["points"]["sample"]["consistent"])
+
+    def test_summarize_nothing(self):
+        from access_cli_sealuzh.loadtest import summarize, print_summary
+        summary = summarize([], {"template": 0}, 0.0)
+        self.assertEqual(0, summary["throughput"])
+        self.assertEqual({"p50": None, "p90": None, "p95": None, "p99": None, "max": None},
+                         summary["latency"])
+        with contextlib.redirect_stdout(io.StringIO()) as out:
+            print_summary(summary, 4)
+        self.assertIn("latency: p50 n/a", out.getvalue())
+
+    def test_loadtest(self):
+        from access_cli_sealuzh.loadtest import main
+        task = files('tests.resources.execute').joinpath('valid')
+        with tempfile.TemporaryDirectory() as tmp:
+            os.makedirs(os.path.join(tmp, "samples", "correct"))
+            shutil.copyfile(task.joinpath("solution.py"),
+                            os.path.join(tmp, "samples", "correct", "script.py"))
+            report = os.path.join(tmp, "report.json")
+            out = io.StringIO()
+            with contextlib.redirect_stdout(out):
+                returncode = main([str(task), "-C", str(files('tests.resources').joinpath('execute')),
+                    "-c", "2", "-n", "6", "-s", "cp solution.py script.py",
+                    "-S", os.path.join(tmp, "samples"), "-u", os.environ.get("DOCKER_USER", ""),
+                    "--report", report])
+            with open(report) as f:
+                summary = json.load(f)
+        self.assertEqual(0, returncode, out.getvalue())
+        self.assertEqual(6, summary["submissions"])
+        self.assertEqual({"template": [0], "solution": [2], "correct": [2]},
+                         {name: result["points"] for name, result in summary["points"].items()})
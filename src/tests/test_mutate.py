@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+
+import unittest
+import io
+import os
+import json
+import tempfile
+import contextlib
+from importlib.resources import files
+
+JAVA = """public class Counter {
+    // counts == up
+    public int next(int count) {
+        String label = "a + b";
+        count++;
+        System.out.println(label); // a - b
+        return count * 2;
+    }
+}
+"""
+
+class MutationTests(unittest.TestCase):
+
+    def test_python_mutants(self):
+        from access_cli_sealuzh.mutate import python_mutants
+        mutants = dict(python_mutants('"""Docstring"""\nx = 21 + 21\nif x > 0 and True:\n    print("x")\n'))
+        self.assertEqual('"""Docstring"""\nx = 21 - 21\nif x > 0 and True:\n    print(\'x\')\n',
+                         mutants["line 2: Add → Sub"])
+        self.assertIn("if x >= 0 and True:", mutants["line 3: Gt → GtE"])
+        self.assertIn("if x > 0 or True:", mutants["line 3: And → Or"])
+        self.assertIn("if x > 0 and False:", mutants["line 3: True → False"])
+        self.assertIn("    pass", mutants["line 4: deleted expr statement"])
+        self.assertIn("print('')", mutants["line 4: 'x' → ''"])
+        self.assertNotIn("line 1: deleted expr statement", mutants)
+        self.assertNotIn("line 1: 'Docstring' → ''", mutants)
+        self.assertEqual([], list(python_mutants("x = (")))
+
+    def test_python_docstrings_not_mutated(self):
+        from access_cli_sealuzh.mutate import python_mutants
+        source = 'def f():\n    """Docstring"""\n    return "value"\n'
+        self.assertEqual(["line 3: 'value' → ''", "line 3: deleted return statement"],
+                         sorted(description for description, _ in python_mutants(source)))
+
+    def test_java_mutants(self):
+        from access_cli_sealuzh.mutate import java_mutants
+        mutants = dict(java_mutants(JAVA))
+        self.assertEqual(["line 5: ++ → --", "line 5: deleted statement",
+                          "line 6: deleted statement", "line 7: * → /", "line 7: 2 → 3"],
+                         list(mutants))
+        self.assertIn("        return count / 2;\n", mutants["line 7: * → /"])
+        self.assertNotIn("System.out.println", mutants["line 6: deleted statement"])
+
+    def test_generate_mutants(self):
+        from access_cli_sealuzh.mutate import generate_mutants
+        mutants = generate_mutants({"script.py": "x = 1 + 1\n", "notes.txt": "1 + 1"})
+        self.assertEqual({"script.py"}, {mutant["path"] for mutant in mutants})
+        self.assertEqual(["line 1: 1 → 2", "line 1: 1 → 2", "line 1: Add → Sub",
+                          "line 1: deleted assign statement"],
+                         [mutant["description"] for mutant in mutants])
+        self.assertEqual(["x = 2 + 1\n", "x = 1 + 2\n", "x = 1 - 1\n", "pass\n"],
+                         [mutant["source"] for mutant in mutants])
+
+    def test_mutate(self):
+        from access_cli_sealuzh.mutate import main
+        task = files('tests.resources.execute').joinpath('valid')
+        with tempfile.TemporaryDirectory() as tmp:
+            report = os.path.join(tmp, "report.json")
+            out = io.StringIO()
+            with contextlib.redirect_stdout(out):
+                returncode = main([str(task), "-s", "cp solution.py script.py", "-j", "2",
+                    "-C", str(files('tests.resources').joinpath('execute')),
+                    "-u", os.environ.get("DOCKER_USER", ""), "--report", report])
+            with open(report) as f:
+                outcome = json.load(f)
+        self.assertEqual(1, returncode, out.getvalue())
+        self.assertEqual(5, outcome["graded"])
+        self.assertEqual(4, outcome["killed"])
+        # the grader does not check what the solution prints
+        self.assertEqual([{"path": "script.py", "description": "line 4: deleted expr statement"}],
+                         outcome["survivors"])
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+
+import unittest
+import io
+import os
+import contextlib
+from types import SimpleNamespace
+from concurrent.futures import ThreadPoolExecutor
+from importlib.resources import files
+
+class PipelineTests(unittest.TestCase):
+
+    def pipeline(self, workers, maxsize=None):
+        from access_cli_sealuzh.pipeline import Pipeline
+        self.pool = ThreadPoolExecutor(workers)
+        self.addCleanup(self.pool.shutdown)
+        return Pipeline(self.pool, workers, maxsize)
+
+    def test_jobs_are_returned_in_order(self):
+        from access_cli_sealuzh.pipeline import Job, Pipeline
+        pipeline = self.pipeline(4, maxsize=2)
+        pipeline.start()
+        def fail(i):
+            Pipeline.current_job().errors.append(f"error {i}")
+        for i in range(20):
+            pipeline.put(Job(f"task{i}", fail, i))
+        jobs = pipeline.finish()
+        self.assertEqual([f"error {i}" for i in range(20)], [j.errors[0] for j in jobs])
+        self.assertEqual([f"task{i}" for i in range(20)], [j.subject for j in jobs])
+
+    def test_output_is_printed_per_job(self):
+        from access_cli_sealuzh.pipeline import Job, Pipeline
+        pipeline = self.pipeline(2)
+        def output(i):
+            Pipeline.current_job().output.extend([f"{i}a", f"{i}b"])
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            pipeline.start()
+            for i in range(10):
+                pipeline.put(Job("task", output, i))
+            pipeline.finish()
+        lines = out.getvalue().splitlines()
+        for i in range(10):
+            self.assertEqual(lines.index(f"{i}a") + 1, lines.index(f"{i}b"))
+
+    def test_exception_is_recorded_as_error(self):
+        from access_cli_sealuzh.pipeline import Job
+        pipeline = self.pipeline(1)
+        pipeline.start()
+        pipeline.put(Job("task", lambda: 1 / 0))
+        jobs = pipeline.finish()
+        self.assertIn("internal error", jobs[0].errors[0])
+        self.assertIn("ZeroDivisionError", jobs[0].errors[0])
+
+    def test_failing_callback(self):
+        import threading
+        from access_cli_sealuzh.pipeline import Job, Pipeline
+        self.pool = ThreadPoolExecutor(1)
+        self.addCleanup(self.pool.shutdown)
+        def done(job):
+            if job.args[0] == 0:
+                raise OSError("journal not writable")
+        pipeline = Pipeline(self.pool, 1, maxsize=1, done=done)
+        pipeline.start()
+        def produce():
+            for i in range(5):
+                pipeline.put(Job(f"task{i}", lambda i: None, i))
+        # the producer is not blocked by a dead consumer
+        producer = threading.Thread(target=produce)
+        producer.start()
+        producer.join(timeout=10)
+        self.assertFalse(producer.is_alive())
+        jobs = pipeline.finish()
+        self.assertEqual(["task0"], [job.subject for job in jobs])
+        self.assertIn("journal not writable", jobs[0].errors[0])
+
+    def test_statically_invalid_task_is_not_executed(self):
+        from access_cli_sealuzh.main import AccessValidator
+        args = SimpleNamespace(directory=str(files('tests.resources.task').joinpath('missing-file')),
+                               global_file=set(), user=os.environ.get("DOCKER_USER", ""),
+                               test_solution=False, run=0, test=1, verbose=False, debug=False,
+                               grade_template=True, grade_solution=False,
+                               level="task", recursive=False)
+        validator = AccessValidator(args)
+        executed = []
+        validator.execute_command = lambda *args, **kwargs: executed.append(args)
+        validator.execute_grade_command = lambda *args, **kwargs: executed.append(args)
+        with contextlib.redirect_stdout(io.StringIO()):
+            errors = validator.run().error_list()
+        self.assertEqual(1, len(errors))
+        self.assertEqual([], executed)
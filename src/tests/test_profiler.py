@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+
+import unittest
+import os
+import json
+import tempfile
+from types import SimpleNamespace
+from importlib.resources import files
+
+class ProfilerTests(unittest.TestCase):
+
+    def test_spans(self):
+        from access_cli_sealuzh.profiler import Profiler
+        profiler = Profiler()
+        with profiler.span("docker", "./course/task", "run_command"):
+            pass
+        with profiler.span("docker", "course/task", "grade_command"):
+            pass
+        with profiler.span("pull"):
+            pass
+        self.assertEqual(2, len(profiler.by_phase()["docker"]))
+        self.assertEqual(["course/task"], list(profiler.by_subject()))
+        self.assertEqual({"run_command", "grade_command"}, set(profiler.by_command_type()))
+
+    def test_report(self):
+        from access_cli_sealuzh.profiler import Profiler
+        profiler = Profiler()
+        for i in range(5):
+            with profiler.span("schema", f"task{i}"):
+                pass
+        report = "\n".join(profiler.report(top=3))
+        self.assertIn("schema", report)
+        self.assertIn("Top 3 slowest of 5 subjects", report)
+
+    def test_subject_spans_are_not_reported(self):
+        from access_cli_sealuzh.profiler import Profiler
+        profiler = Profiler()
+        with profiler.span("task", "course/task", category="subject") as task:
+            with profiler.span("schema", "course/task") as schema:
+                pass
+        self.assertEqual(task.id, schema.parent)
+        self.assertEqual(["schema"], list(profiler.by_phase()))
+
+    def test_chrome_trace(self):
+        from access_cli_sealuzh.profiler import Profiler
+        profiler = Profiler()
+        with profiler.span("task", "course/task", category="subject"):
+            with profiler.span("docker", "course/task", "run_command"):
+                pass
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "trace.json")
+            profiler.write_chrome_trace(path)
+            with open(path) as f:
+                events = json.load(f)["traceEvents"]
+        spans = [e for e in events if e["ph"] == "X"]
+        self.assertEqual(["task course/task", "docker"], [e["name"] for e in spans])
+        self.assertEqual({"subject": "course/task", "command_type": "run_command"}, spans[1]["args"])
+        self.assertIn({"name": "thread_name", "ph": "M", "pid": 1, "tid": 1,
+                       "args": {"name": "MainThread"}}, events)
+
+    def test_otlp(self):
+        from access_cli_sealuzh.profiler import Profiler
+        profiler = Profiler()
+        with profiler.span("task", "course/task", category="subject"):
+            with profiler.span("schema", "course/task"):
+                pass
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "trace.json")
+            profiler.write_otlp(path)
+            with open(path) as f:
+                trace = json.load(f)
+        task, schema = trace["resourceSpans"][0]["scopeSpans"][0]["spans"]
+        self.assertEqual(task["traceId"], schema["traceId"])
+        self.assertEqual(task["spanId"], schema["parentSpanId"])
+        self.assertNotIn("parentSpanId", task)
+        self.assertLessEqual(int(task["startTimeUnixNano"]), int(schema["startTimeUnixNano"]))
+
+    def args(self):
+        return SimpleNamespace(directory=str(files('tests.resources.recursive').joinpath('valid')),
+                               global_file=set(), user=os.environ.get("DOCKER_USER", ""),
+                               test_solution=False, run=None, test=None, verbose=False, debug=False,
+                               grade_template=False, grade_solution=False,
+                               level="course", recursive=True)
+
+    def test_static_validation_is_profiled(self):
+        from access_cli_sealuzh.main import AccessValidator, Session
+        args = self.args()
+        session = Session()
+        session.enable_profiling()
+        AccessValidator(args, session).run()
+        phases = session.profiler.by_phase()
+        self.assertEqual(3, len(phases["read_config"]))
+        self.assertEqual(3, len(phases["schema"]))
+        subjects = [span.phase for span in session.profiler.spans if span.category == "subject"]
+        self.assertEqual(["course", "assignment", "task"], subjects)
+
+    def test_trace_option(self):
+        import io
+        import contextlib
+        from access_cli_sealuzh import validate
+        with tempfile.TemporaryDirectory() as tmp:
+            args = self.args()
+            args.trace = os.path.join(tmp, "trace.json")
+            with contextlib.redirect_stdout(io.StringIO()):
+                self.assertEqual(0, validate(args))
+            with open(args.trace) as f:
+                self.assertTrue(json.load(f)["traceEvents"])
+
+    def test_profiling_ends_with_run(self):
+        import io
+        import contextlib
+        from access_cli_sealuzh import validate
+        from access_cli_sealuzh.main import Session
+        from access_cli_sealuzh.profiler import NullProfiler
+        session = Session()
+        args = self.args()
+        args.profile = True
+        with contextlib.redirect_stdout(io.StringIO()) as out:
+            self.assertEqual(0, validate(args, session))
+        self.assertIn("read_config", out.getvalue())
+        # a later run sharing the session does not record spans
+        self.assertIsInstance(session.profiler, NullProfiler)
+        self.assertIsInstance(session.executor.profiler, NullProfiler)
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+
+import unittest
+import io
+import os
+import shutil
+import tempfile
+import contextlib
+from types import SimpleNamespace
+from importlib.resources import files
+
+class RepeatTests(unittest.TestCase):
+
+    def execution(self, returncode, points=None, timed_out=False, solve_command=None):
+        return {"subject": "task", "command_type": "grade_command", "solve_command": solve_command,
+                "submission": None, "returncode": returncode, "points": points,
+                "timed_out": timed_out, "usage": {"wall": 1.0}}
+
+    def test_distributions(self):
+        from access_cli_sealuzh.repeat import distributions, format_distribution
+        checks = distributions([self.execution(0, 0), self.execution(0, 2, solve_command="solve"),
+                                self.execution(0, 0), self.execution(0, 1, solve_command="solve"),
+                                self.execution(None, timed_out=True), self.execution(0, 2, solve_command="solve")])
+        template, solution = checks.values()
+        self.assertTrue(template["flaky"])
+        self.assertEqual(1, template["timeouts"])
+        self.assertTrue(solution["flaky"])
+        self.assertEqual("return code 0 ×3; points 2 ×2, 1 ×1; wall 1.00/1.00/1.00s (min/median/max)",
+                         format_distribution(solution))
+        stable = distributions([self.execution(1), self.execution(1)])
+        self.assertFalse(stable[("task", "grade_command", None, None)]["flaky"])
+
+    def test_perturbation(self):
+        from access_cli_sealuzh.repeat import CPUS, perturbation
+        options = perturbation()
+        self.assertIn(options[1], CPUS)
+        self.assertTrue(options[3].startswith("PYTHONHASHSEED="))
+        self.assertLessEqual(float(options[1]), os.cpu_count())
+
+    def test_available_cpus(self):
+        from access_cli_sealuzh.repeat import CPUS, available_cpus
+        self.assertEqual(["0.5", "1"], available_cpus(1))
+        self.assertEqual(CPUS, available_cpus(8))
+
+    def test_repeat(self):
+        from access_cli_sealuzh.main import Session, with_defaults
+        from access_cli_sealuzh.repeat import repeat
+        args = with_defaults(SimpleNamespace(directory=str(files('tests.resources.execute').joinpath('valid')),
+            level="task", recursive=False, verbose=False, debug=False, global_file=set(),
+            user=os.environ.get("DOCKER_USER", ""), run=0, test=1, test_solution=True,
+            grade_template=True, grade_solution=True, solve_command="cp solution.py script.py",
+            repeat=3, perturb=True, jobs=4))
+        session = Session(args.jobs)
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            returncode = repeat(args, session)
+        self.assertEqual(0, returncode, out.getvalue())
+        self.assertIn("0 of 5 checks flaky", out.getvalue())
+        self.assertTrue(session.executor.caching)
+
+    def test_grader_writing_to_files(self):
+        # a grader writing to a file which is neither editable nor replaced by
+        # submissions must not affect the other repetitions
+        from access_cli_sealuzh.main import Session, with_defaults
+        from access_cli_sealuzh.repeat import repeat
+        with tempfile.TemporaryDirectory() as tmp:
+            task = os.path.join(tmp, "task")
+            shutil.copytree(files('tests.resources.execute').joinpath('valid'), task)
+            with open(os.path.join(task, "counter.txt"), "w") as f:
+                f.write("0")
+            with open(os.path.join(task, "count.py"), "w") as f:
+                f.write("import json\n"
+                        "count = int(open('counter.txt').read())\n"
+                        "open('counter.txt', 'w').write(str(count + 1))\n"
+                        "json.dump({'points': count}, open('grade_results.json', 'w'))\n")
+            with open(os.path.join(task, "config.toml")) as f:
+                config = f.read()
+            with open(os.path.join(task, "config.toml"), "w") as f:
+                f.write(config.replace('grade_command = "python -m unittest grading.py -v"',
+                                       'grade_command = "python count.py"')
+                              .replace('"tests.py",\n]\neditable', '"tests.py",\n  "counter.txt",\n]\neditable')
+                              .replace('grading = [\n', 'grading = [\n  "count.py",\n'))
+            args = with_defaults(SimpleNamespace(directory=task,
+                level="task", recursive=False, verbose=False, debug=False, global_file=set(),
+                user=os.environ.get("DOCKER_USER", ""), run=None, test=None, test_solution=False,
+                grade_template=True, grade_solution=False, solve_command=None,
+                repeat=4, jobs=2))
+            out = io.StringIO()
+            with contextlib.redirect_stdout(out):
+                returncode = repeat(args, Session(args.jobs))
+            self.assertEqual(0, returncode, out.getvalue())
+            self.assertIn("0 of 1 checks flaky", out.getvalue())
+            with open(os.path.join(task, "counter.txt")) as f:
+                self.assertEqual("0", f.read())
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+
+import unittest
+import io
+import os
+import json
+import shutil
+import tempfile
+import contextlib
+from importlib.resources import files
+
+class ReplayTests(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, content):
+        path = os.path.join(self.tmp.name, path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(content)
+        return path
+
+    def test_stage(self):
+        from access_cli_sealuzh.staging import Stage
+        self.write("stage/task/script.py", "x = 0")
+        self.write("stage/grading/tests.py", "pass")
+        stage = Stage(os.path.join(self.tmp.name, "stage"))
+        workspace = os.path.join(self.tmp.name, "workspace")
+        stage.populate(workspace)
+        for path in ["task/script.py", "grading/tests.py"]:
+            self.assertFalse(os.path.samefile(os.path.join(self.tmp.name, "stage", path),
+                                              os.path.join(workspace, path)))
+        # writes to the workspace don't reach the stage
+        with open(os.path.join(workspace, "grading/tests.py"), "w") as f:
+            f.write("changed")
+        with open(os.path.join(self.tmp.name, "stage/grading/tests.py")) as f:
+            self.assertEqual("pass", f.read())
+
+    def test_corpus_submissions(self):
+        from access_cli_sealuzh.replay import corpus_submissions
+        self.write("corpus/a/grade_results.json", '{"points": 1.5}')
+        self.write("corpus/b/task/script.py", "x = 1")
+        self.assertEqual([(os.path.join(self.tmp.name, "corpus", "a"), 1.5)],
+                         list(corpus_submissions(os.path.join(self.tmp.name, "corpus"))))
+        self.assertEqual([], list(corpus_submissions(os.path.join(self.tmp.name, "missing"))))
+
+    def test_replay(self):
+        from access_cli_sealuzh.replay import main
+        course = files('tests.resources.autodetect').joinpath('valid-course')
+        solution = course.joinpath('assignment', 'task', 'solution', 'script.py')
+        corpus = os.path.join(self.tmp.name, "corpus")
+        for name, script, points in [("solved", solution.read_text(), 2),
+                                     ("unsolved", "x = 1\n", 0),
+                                     ("regraded", "x = 3\n", 2)]:
+            self.write(f"corpus/assignment/task/{name}/task/script.py", script)
+            self.write(f"corpus/assignment/task/{name}/grade_results.json", json.dumps({"points": points}))
+        report = os.path.join(self.tmp.name, "report.json")
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            returncode = main([corpus, "-d", str(course), "-j", "2", "--report", report,
+                               "-u", os.environ.get("DOCKER_USER", "")])
+        with open(report) as f:
+            outcome = json.load(f)
+        self.assertEqual(1, returncode, out.getvalue())
+        self.assertEqual(3, outcome["graded"])
+        self.assertEqual([os.path.join(corpus, "assignment", "task", "regraded")],
+                         [m["submission"] for m in outcome["mismatches"]])
+        self.assertEqual([], outcome["errors"])
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+
+import unittest
+import io
+import os
+import json
+import tempfile
+import contextlib
+from types import SimpleNamespace
+from importlib.resources import files
+
+class ReportTests(unittest.TestCase):
+
+    def test_parse_cgroup_v2_usage(self):
+        from access_cli_sealuzh.executor import parse_usage
+        usage = parse_usage("==> /sys/fs/cgroup/cpu.stat\nusage_usec 1500000\nuser_usec 1000000\n"
+                            "==> /sys/fs/cgroup/memory.peak\n52428800\n"
+                            "==> /sys/fs/cgroup/io.stat\n"
+                            "8:0 rbytes=1024 wbytes=2048 rios=1 wios=2\n"
+                            "8:16 rbytes=1024 wbytes=0 rios=1 wios=0\n")
+        self.assertEqual({"cpu": 1.5, "memory": 52428800, "io_read": 2048, "io_write": 2048}, usage)
+
+    def test_parse_cgroup_v1_usage(self):
+        from access_cli_sealuzh.executor import parse_usage
+        usage = parse_usage("==> /sys/fs/cgroup/cpuacct/cpuacct.usage\n2000000000\n"
+                            "==> /sys/fs/cgroup/memory/memory.max_usage_in_bytes\n1024\n"
+                            "==> /sys/fs/cgroup/blkio/blkio.throttle.io_service_bytes\n"
+                            "8:0 Read 4096\n8:0 Write 512\n8:0 Total 4608\nTotal 4608\n")
+        self.assertEqual({"cpu": 2.0, "memory": 1024, "io_read": 4096, "io_write": 512}, usage)
+
+    def test_format_usage(self):
+        from access_cli_sealuzh.executor import format_usage
+        self.assertEqual("wall 1.25s, cpu 0.50s, peak memory 50.0 MiB, read 0 B",
+            format_usage({"wall": 1.25, "cpu": 0.5, "memory": 50 << 20, "io_read": 0}))
+
+    def test_report(self):
+        from access_cli_sealuzh import validate
+        with tempfile.TemporaryDirectory() as tmp:
+            args = SimpleNamespace(directory=str(files('tests.resources.task').joinpath('missing-file')),
+                                   level="task", global_file=set(), user=None, run=None, test=None,
+                                   test_solution=False, grade_template=False, grade_solution=False,
+                                   solve_command=None, verbose=False, debug=False, recursive=False,
+                                   report=os.path.join(tmp, "report.json"))
+            with contextlib.redirect_stdout(io.StringIO()):
+                self.assertEqual(1, validate(args))
+            with open(args.report) as f:
+                report = json.load(f)
+        self.assertFalse(report["passed"])
+        self.assertEqual([], report["executions"])
+        self.assertEqual(1, len(report["results"]))
+
+    def test_merge_reports(self):
+        from access_cli_sealuzh.report import merge_reports, missing_shards
+        first = {"passed": False, "shard": [1, 3], "executions": [{"subject": "course/a"}],
+                 "results": {"course": ["course error"], "course/a": []}}
+        second = {"passed": True, "shard": [2, 3], "executions": [{"subject": "course/b"}],
+                  "results": {"course": [], "course/b": []}}
+        merged = merge_reports([first, second])
+        self.assertFalse(merged["passed"])
+        self.assertEqual({"course": ["course error"], "course/a": [], "course/b": []},
+                         merged["results"])
+        self.assertEqual(2, len(merged["executions"]))
+        self.assertEqual([3], missing_shards([first, second]))
+        self.assertEqual([], missing_shards([{"results": {}, "executions": []}]))
+
+    def test_coverage(self):
+        from access_cli_sealuzh.report import coverage_errors
+        course_tasks = ["a/1", "a/2", "b/1"]
+        first = {"shard": [1, 2], "tasks": ["a/1", "b/1"], "course_tasks": course_tasks}
+        second = {"shard": [2, 2], "tasks": ["a/2"], "course_tasks": course_tasks}
+        self.assertEqual([], coverage_errors([first, second]))
+        self.assertEqual([], coverage_errors([{"results": {}, "executions": []}]))
+        # shards which partitioned differently, e.g. by different histories
+        other = dict(second, tasks=["b/1"])
+        self.assertEqual(["Task a/2 was not validated by any shard",
+                          "Task b/1 was validated by shards 1, 2"],
+                         coverage_errors([first, other]))
+        moved = dict(second, course_tasks=["a/1", "a/2", "c/1"])
+        errors = coverage_errors([first, moved])
+        self.assertIn("Shards partitioned different tasks (e.g., different checkouts of the course)", errors)
+        self.assertIn("Task c/1 was not validated by any shard", errors)
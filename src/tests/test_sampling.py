@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+
+import unittest
+import os
+import argparse
+import tempfile
+from types import SimpleNamespace
+
+class SamplingTests(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.environ["PATH"]
+        self.course = os.path.join(self.tmp.name, "course")
+        from benchmarks.generate import generate_course
+        generate_course(self.course, assignments=2, tasks=5, files=1, file_size=100)
+        # the second assignment uses another image
+        for task in range(1, 6):
+            config = os.path.join(self.course, "assignment_2", f"task_{task}", "config.toml")
+            with open(config) as f:
+                content = f.read()
+            with open(config, "w") as f:
+                f.write(content.replace("python:latest", "java:latest"))
+
+    def tearDown(self):
+        os.environ["PATH"] = self.path
+        os.environ.pop("FAKE_DOCKER_STATE", None)
+        self.tmp.cleanup()
+
+    def model(self):
+        from access_cli_sealuzh.model import CourseModel
+        return CourseModel.build(self.course, "course")
+
+    def test_parse_sample(self):
+        from access_cli_sealuzh.sampling import parse_sample
+        self.assertEqual(0.25, parse_sample("0.25"))
+        self.assertEqual(20, parse_sample("20"))
+        self.assertIsInstance(parse_sample("20"), int)
+        for value in ["0", "-1", "1.5", "all"]:
+            with self.assertRaises(argparse.ArgumentTypeError):
+                parse_sample(value)
+
+    def test_allocate(self):
+        from access_cli_sealuzh.sampling import allocate
+        self.assertEqual({"a": 1, "b": 1}, allocate({"a": 8, "b": 2}, 1))
+        self.assertEqual({"a": 4, "b": 1}, allocate({"a": 8, "b": 2}, 5))
+        self.assertEqual({"a": 2, "b": 1}, allocate({"a": 5, "b": 5}, 3))
+
+    def test_sample_tasks(self):
+        from access_cli_sealuzh.sampling import sample_tasks
+        model = self.model()
+        sampled = sample_tasks(model, 0.1, seed=1)
+        # every image at least once, although 10% of 10 tasks is one task
+        self.assertEqual(2, len(sampled))
+        self.assertEqual({"python:latest", "java:latest"},
+                         {model.nodes[path]["docker_image"] for path in sampled})
+        self.assertEqual(sampled, sample_tasks(self.model(), 0.1, seed=1))
+        self.assertEqual(6, len(sample_tasks(model, 6, seed=1)))
+        self.assertEqual(10, len(sample_tasks(model, 50, seed=1)))
+        # rotating the seed covers all tasks eventually
+        covered = set()
+        for seed in range(50):
+            covered.update(sample_tasks(model, 4, seed=seed))
+        self.assertEqual(10, len(covered))
+
+    def test_sampled_executions(self):
+        from benchmarks import fake_docker
+        from benchmarks.generate import SOLVE_COMMAND
+        from access_cli_sealuzh.main import AccessValidator, Session, with_defaults
+        bin_dir = os.path.join(self.tmp.name, "bin")
+        os.mkdir(bin_dir)
+        fake_docker.install(bin_dir)
+        os.environ["FAKE_DOCKER_STATE"] = os.path.join(self.tmp.name, "state")
+        # a static error in a task which is not sampled is still reported
+        os.remove(os.path.join(self.course, "assignment_1", "task_1", "task", "module0.py"))
+        args = with_defaults(SimpleNamespace(directory=self.course, level="course",
+            recursive=True, verbose=False, debug=False, global_file=set(), user=None,
+            run=0, test=1, test_solution=False, grade_template=True, grade_solution=False,
+            solve_command=SOLVE_COMMAND, sample=3, seed=7))
+        validator = AccessValidator(args, Session())
+        logger = validator.run()
+        self.assertEqual(3, len(validator.sampled_tasks))
+        executed = {os.path.relpath(e["subject"], self.course) for e in logger.executions}
+        self.assertEqual(validator.sampled_tasks - {os.path.join("assignment_1", "task_1")},
+                         executed)
+        self.assertEqual(1, len(logger.error_results()))
+
+if __name__ == '__main__':
+    unittest.main()
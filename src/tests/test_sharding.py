@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+
+import unittest
+import os
+import argparse
+import tempfile
+from types import SimpleNamespace
+
+class ShardingTests(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.course = os.path.join(self.tmp.name, "course")
+        from benchmarks.generate import generate_course
+        generate_course(self.course, assignments=2, tasks=3)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def model(self):
+        from access_cli_sealuzh.model import CourseModel
+        return CourseModel.build(self.course, "course")
+
+    def test_parse_shard(self):
+        from access_cli_sealuzh.sharding import parse_shard
+        self.assertEqual((2, 4), parse_shard("2/4"))
+        for value in ["0/4", "5/4", "2", "a/b"]:
+            with self.assertRaises(argparse.ArgumentTypeError):
+                parse_shard(value)
+
+    def test_partition(self):
+        from access_cli_sealuzh.sharding import partition
+        tasks, loads = partition({"a": 5, "b": 4, "c": 3, "d": 3, "e": 1}, 2)
+        self.assertEqual([["a", "d"], ["b", "c", "e"]], tasks)
+        self.assertEqual([8, 8], loads)
+
+    def test_task_costs(self):
+        from access_cli_sealuzh.history import record
+        from access_cli_sealuzh.logger import Logger
+        from access_cli_sealuzh.sharding import task_costs
+        history = os.path.join(self.tmp.name, "history.sqlite")
+        logger = Logger()
+        for command_type, wall in [("run_command", 1.0), ("test_command", 2.0), ("grade_command", 3.0)]:
+            logger.executions.append({"subject": os.path.join(self.course, "assignment_1", "task_1"),
+                "command_type": command_type, "solution": False, "docker_image": "python:latest",
+                "command": "fake", "returncode": 0, "timed_out": False, "cached": False,
+                "usage": {"wall": wall}})
+        record(history, [logger], self.course)
+        costs = task_costs(self.model(), history)
+        self.assertEqual(6.0, costs[os.path.join("assignment_1", "task_1")])
+        # 3 commands at 2s each, and 10 files (including the global file)
+        self.assertAlmostEqual(6.2, costs[os.path.join("assignment_2", "task_3")])
+        self.assertEqual(costs, task_costs(self.model(), history))
+        self.assertAlmostEqual(3.1, task_costs(self.model())[os.path.join("assignment_1", "task_1")])
+        # a checkout of the same course at another path sees the same costs
+        other = os.path.join(self.tmp.name, "other")
+        os.rename(self.course, other)
+        from access_cli_sealuzh.model import CourseModel
+        self.assertEqual(costs, task_costs(CourseModel.build(other, "course"), history))
+
+    def test_shards(self):
+        from access_cli_sealuzh.main import AccessValidator, Session, with_defaults
+        config = os.path.join(self.course, "config.toml")
+        with open(config) as f:
+            content = f.read()
+        with open(config, "w") as f:
+            f.write(content.replace('slug = "synthetic-course"\n',
+                                    'slug = "synthetic-course"\nlogo = "missing.svg"\n'))
+        history = os.path.join(self.tmp.name, "history.sqlite")
+        validated, errors, partitions = [], [], []
+        for index in range(1, 4):
+            args = with_defaults(SimpleNamespace(directory=self.course, level="course",
+                recursive=True, verbose=False, debug=False, global_file=set(), user=None,
+                run=None, test=None, test_solution=False, grade_template=False,
+                grade_solution=False, solve_command=None, shard=(index, 3), history=history))
+            logger = AccessValidator(args, Session()).run()
+            validated.append([subject for subject in logger.results if "task_" in subject])
+            errors.append(logger.error_list())
+            partitions.append(logger.partition)
+            # the local history of one shard does not change the partition
+            self.record_slow_task(history)
+        self.assertEqual([2, 2, 2], [len(tasks) for tasks in validated])
+        self.assertEqual(6, len(set(sum(validated, []))))
+        # course checks are only performed by the first shard
+        self.assertEqual(1, len(errors[0]))
+        self.assertIn("non-existing logo", errors[0][0])
+        self.assertEqual([[], []], errors[1:])
+        self.assertEqual(6, len(partitions[0]["course_tasks"]))
+        self.assertEqual(sorted(sum((p["tasks"] for p in partitions), [])),
+                         partitions[0]["course_tasks"])
+
+    def record_slow_task(self, history):
+        from access_cli_sealuzh.history import record
+        from access_cli_sealuzh.logger import Logger
+        logger = Logger()
+        logger.executions.append({"subject": os.path.join(self.course, "assignment_1", "task_2"),
+            "command_type": "grade_command", "solution": False, "docker_image": "python:latest",
+            "command": "fake", "returncode": 0, "timed_out": False, "cached": False,
+            "usage": {"wall": 100.0}})
+        record(history, [logger], self.course)
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+
+import unittest
+import os
+import sys
+import subprocess
+from importlib.resources import files
+
+# Regression budgets for the import time of access-cli (in microseconds), as
+# reported by python -X importtime. They are deliberately generous to tolerate
+# slow CI machines; their purpose is to catch heavy imports sneaking back in.
+HELP_BUDGET_US = 100_000
+STATIC_TASK_BUDGET_US = 300_000
+
+class StartupTests(unittest.TestCase):
+
+    def importtime(self, *cli_args):
+        src = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        env = dict(os.environ, PYTHONPATH=src)
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c",
+             "from access_cli_sealuzh import main; main()", *cli_args],
+            capture_output=True, env=env, text=True)
+        imports = {}
+        total, started = 0, False
+        for line in result.stderr.splitlines():
+            if not line.startswith("import time:") or "imported package" in line:
+                continue
+            _, cumulative, name = line[len("import time:"):].split("|")
+            imports[name.strip()] = int(cumulative)
+            if name.strip().startswith("access_cli_sealuzh"):
+                started = True
+            # only count top-level imports caused by access-cli itself
+            if started and not name.startswith("  "):
+                total += int(cumulative)
+        return result.returncode, imports, total
+
+    def test_help(self):
+        returncode, imports, total = self.importtime("--help")
+        self.assertEqual(0, returncode)
+        for module in ["access_cli_sealuzh.main", "cerberus", "tomli",
+                       "subprocess", "tempfile", "json", "pprint"]:
+            self.assertNotIn(module, imports)
+        self.assertLess(total, HELP_BUDGET_US)
+
+    def test_static_task_check(self):
+        returncode, imports, total = self.importtime(
+            "-l", "task", "-d", str(files('tests.resources.task').joinpath('valid')))
+        self.assertEqual(0, returncode)
+        for module in ["subprocess", "json"]:
+            self.assertNotIn(module, imports)
+        self.assertLess(total, STATIC_TASK_BUDGET_US)
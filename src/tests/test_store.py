@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+
+import unittest
+import io
+import os
+import time
+import tempfile
+import contextlib
+from unittest import mock
+from types import SimpleNamespace
+
+class FileStoreTests(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.environ["PATH"]
+        self.files = os.path.join(self.tmp.name, "files")
+        os.mkdir(self.files)
+        for name, content in [("a.py", "shared"), ("b.py", "shared"), ("c.py", "other")]:
+            with open(os.path.join(self.files, name), "w") as f:
+                f.write(content)
+
+    def tearDown(self):
+        os.environ["PATH"] = self.path
+        os.environ.pop("FAKE_DOCKER_STATE", None)
+        self.tmp.cleanup()
+
+    def test_dedupe(self):
+        from access_cli_sealuzh.filesystem import LocalFS
+        from access_cli_sealuzh.store import FileStore
+        store = FileStore()
+        fs = LocalFS()
+        a, b, c = (store.put(os.path.join(self.files, name), fs) for name in ["a.py", "b.py", "c.py"])
+        self.assertEqual(a, b)
+        self.assertNotEqual(a, c)
+        self.assertEqual(3, store.hashed)
+        # memoized
+        store.put(os.path.join(self.files, "a.py"), fs)
+        self.assertEqual(3, store.hashed)
+        target = os.path.join(self.tmp.name, "workspace.py")
+        store.copy(os.path.join(self.files, "a.py"), fs, target)
+        self.assertFalse(os.stat(a).st_mode & 0o222)
+        # writes to the workspace (e.g. by a grader running as root) do not
+        # reach the store
+        self.assertNotEqual(os.stat(a).st_ino, os.stat(target).st_ino)
+        with open(target, "w") as f:
+            f.write("changed")
+        with open(a) as f:
+            self.assertEqual("shared", f.read())
+        directory = store.directory
+        store.close()
+        self.assertFalse(os.path.exists(directory))
+
+    def test_persistent_digests(self):
+        from access_cli_sealuzh.filesystem import LocalFS
+        from access_cli_sealuzh.store import FileStore
+        directory = os.path.join(self.tmp.name, "store")
+        fs = LocalFS()
+        store = FileStore(directory)
+        for name in ["a.py", "b.py", "c.py"]:
+            store.put(os.path.join(self.files, name), fs)
+        store.close()
+        later = time.time() + 10
+        with open(os.path.join(self.files, "c.py"), "w") as f:
+            f.write("changed")
+        os.utime(os.path.join(self.files, "c.py"), (later, later))
+        store = FileStore(directory)
+        for name in ["a.py", "b.py", "c.py"]:
+            store.put(os.path.join(self.files, name), fs)
+        # only the changed file was hashed again
+        self.assertEqual(1, store.hashed)
+        store.close()
+        self.assertTrue(os.path.isfile(os.path.join(directory, "digests.json")))
+
+    def test_evict_changed(self):
+        from access_cli_sealuzh.filesystem import LocalFS
+        from access_cli_sealuzh.store import FileStore
+        directory = os.path.join(self.tmp.name, "store")
+        fs = LocalFS()
+        store = FileStore(directory)
+        stored = store.put(os.path.join(self.files, "a.py"), fs)
+        store.close()
+        # e.g. written by hand
+        os.chmod(stored, 0o644)
+        with open(stored, "w") as f:
+            f.write("corrupted")
+        store = FileStore(directory)
+        target = os.path.join(self.tmp.name, "workspace.py")
+        store.copy(os.path.join(self.files, "a.py"), fs, target)
+        with open(target) as f:
+            self.assertEqual("shared", f.read())
+        self.assertEqual((1, 1), (store.evicted, store.hashed))
+        # objects are checked by their stamp, not hashed again
+        store.put(os.path.join(self.files, "b.py"), fs)
+        store.put(os.path.join(self.files, "a.py"), fs)
+        self.assertEqual((1, 2), (store.evicted, store.hashed))
+        store.close()
+
+    def test_validate_with_store(self):
+        from benchmarks import fake_docker
+        from benchmarks.generate import generate_course, SOLVE_COMMAND
+        from access_cli_sealuzh.main import AccessValidator, Session, with_defaults
+        course = os.path.join(self.tmp.name, "course")
+        generate_course(course, assignments=1, tasks=2, files=1, file_size=100)
+        bin_dir = os.path.join(self.tmp.name, "bin")
+        os.mkdir(bin_dir)
+        fake_docker.install(bin_dir)
+        os.environ["FAKE_DOCKER_STATE"] = os.path.join(self.tmp.name, "state")
+        args = with_defaults(SimpleNamespace(directory=course, level="course",
+            recursive=True, verbose=False, debug=False, user=None,
+            global_file={"universal/harness0.py"}, course_root=course,
+            run=0, test=1, test_solution=True, grade_template=True, grade_solution=True,
+            solve_command=SOLVE_COMMAND, file_store=os.path.join(self.tmp.name, "store")))
+        with mock.patch("access_cli_sealuzh.staging.can_clone", return_value=True):
+            logger = AccessValidator(args, Session()).run()
+        self.assertEqual({}, logger.error_results())
+        self.assertEqual(10, len(logger.executions))
+        # the solution replaced the editable answer.txt in the workspace only
+        with open(os.path.join(course, "assignment_1", "task_1", "task", "answer.txt")) as f:
+            self.assertEqual("TODO\n", f.read())
+        from access_cli_sealuzh.store import FileStore
+        store = FileStore(args.file_store)
+        # the global file is stored once for both tasks
+        digests = {digest for stamp, digest in store.digests.values()}
+        harness = FileStore.identity(os.path.join(course, "universal", "harness0.py"),
+                                     AccessValidator(args, Session()).fs)[0]
+        self.assertIn(harness, store.digests)
+        # one module and one grading file per task, and the global file
+        self.assertEqual(2 * 2 + 1, len(digests))
+    def test_no_reflinks(self):
+        from benchmarks import fake_docker
+        from benchmarks.generate import generate_course
+        from access_cli_sealuzh.main import AccessValidator, Session, with_defaults
+        course = os.path.join(self.tmp.name, "course")
+        generate_course(course, assignments=1, tasks=1)
+        bin_dir = os.path.join(self.tmp.name, "bin")
+        os.mkdir(bin_dir)
+        fake_docker.install(bin_dir)
+        os.environ["FAKE_DOCKER_STATE"] = os.path.join(self.tmp.name, "state")
+        store = os.path.join(self.tmp.name, "store")
+        args = with_defaults(SimpleNamespace(directory=course, level="course",
+            recursive=True, verbose=False, debug=False, user=None, global_file=set(),
+            run=0, test=None, test_solution=False, grade_template=False, grade_solution=False,
+            solve_command=None, file_store=store))
+        out = io.StringIO()
+        with mock.patch("access_cli_sealuzh.staging.can_clone", return_value=False), \
+             contextlib.redirect_stdout(out):
+            logger = AccessValidator(args, Session()).run()
+        self.assertEqual({}, logger.error_results())
+        self.assertIn("Not deduplicating files", out.getvalue())
+        # files were copied from the course rather than through the store
+        self.assertEqual([], os.listdir(os.path.join(store, "objects")))
+
+if __name__ == '__main__':
+    unittest.main()